@@ -0,0 +1,81 @@
+"""difflib over every fact key vs FuzzyKeyIndex, at 10k and 100k keys.
+
+Run from the Eureka directory:  python benchmarks/bench_fuzzy_recall.py
+
+Keys are made-up multi-word fact names. Queries are misspelt versions of
+stored keys (a dropped, doubled, swapped or replaced letter, or a
+dropped word) plus unrelated phrases that should not match. Reported:
+time per fuzzy lookup and how often the index returns the same key as
+difflib.get_close_matches(n=1, cutoff=0.6).
+"""
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.fuzzy_index import FuzzyKeyIndex
+
+SIZES = (10_000, 100_000)
+QUERIES = 60
+WORDS = ("favourite colour food song movie book city car password wifi office home birthday "
+         "anniversary meeting doctor dentist gym locker number code manager team project deadline "
+         "server printer email phone address parking spot flight hotel booking reference account "
+         "bank pin door alarm garage mother father sister brother friend neighbour ali sara john "
+         "maria ahmed ken").split()
+
+
+def make_keys(n, rng):
+    keys = set()
+    while len(keys) < n:
+        keys.add(' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))) + f" {rng.randint(1, 999)}")
+    return sorted(keys)
+
+
+def misspell(key, rng):
+    i = rng.randrange(len(key))
+    kind = rng.choice(('drop', 'double', 'swap', 'replace', 'word'))
+    if kind == 'drop':
+        return key[:i] + key[i + 1:]
+    if kind == 'double':
+        return key[:i] + key[i] + key[i:]
+    if kind == 'swap' and i < len(key) - 1:
+        return key[:i] + key[i + 1] + key[i] + key[i + 2:]
+    if kind == 'word':
+        words = key.split()
+        del words[rng.randrange(len(words))]
+        return ' '.join(words)
+    return key[:i] + rng.choice('abcdefghijklmnopqrstuvwxyz') + key[i + 1:]
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'keys':>8}{'difflib ms':>12}{'index ms':>10}{'speedup':>9}"
+          f"{'same: misspelt':>16}{'unrelated':>11}{'index build s':>15}")
+    for size in SIZES:
+        keys = make_keys(size, rng)
+        queries = [misspell(rng.choice(keys), rng) for _ in range(QUERIES * 2 // 3)]
+        misspelt = len(queries)
+        queries += ["what is the weather", "tell me a joke", "zzz qqq", "open the pod bay doors"] * (QUERIES // 12)
+        start = time.perf_counter()
+        index = FuzzyKeyIndex((key, f"value of {key}") for key in keys)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [(difflib.get_close_matches(q, keys, n=1, cutoff=0.6) or [None])[0] for q in queries]
+        difflib_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        start = time.perf_counter()
+        found = [(index.closest(q) or (None,))[0] for q in queries]
+        index_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        same = [a == b for a, b in zip(expected, found)]
+        print(f"{size:>8}{difflib_ms:>12.1f}{index_ms:>10.2f}{difflib_ms / index_ms:>8.0f}x"
+              f"{sum(same[:misspelt]):>13}/{misspelt}{sum(same[misspelt:]):>8}/{len(queries) - misspelt}"
+              f"{build:>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
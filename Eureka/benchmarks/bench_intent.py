@@ -0,0 +1,135 @@
+"""Compare the offline intent engine with the substring rules it replaced.
+
+Run from the Eureka directory:  python benchmarks/bench_intent.py
+
+Reports per-utterance latency and, over the same held-out labelled set,
+how many utterances each approach decided correctly or wrongly offline and
+how many it would have sent to the LLM instead.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.intent_engine import IntentEngine
+
+# The phrase lists NLU.simple_rules used before the intent engine
+LEGACY_PHRASES = [
+    'query database', 'database query', 'query the database', 'show database',
+    'database info', 'adventureworks', 'adventure works', 'sql', 'query',
+    'how many', 'count', 'total', 'list', 'show me', 'what', 'who', 'when', 'where',
+    'sales', 'products', 'customers', 'orders', 'employees', 'database', 'data',
+    'table', 'tables', 'records', 'rows', 'information', 'details'
+]
+LEGACY_QUESTION_WORDS = ['?', 'how', 'what', 'which', 'tell me', 'show', 'get', 'find']
+
+# Not part of the training examples
+EVAL_SET = [
+    ("how many orders were placed in 2012", 1),
+    ("show me the five biggest customers", 1),
+    ("which employees joined last month", 1),
+    ("who was absent on tuesday", 1),
+    ("list all bikes under 500 dollars", 1),
+    ("what is the total revenue for europe", 1),
+    ("give me the attendance summary for this week", 1),
+    ("which products have never been ordered", 1),
+    ("who is our top salesperson", 1),
+    ("what is the average salary by department", 1),
+    ("find the customer with the most orders", 1),
+    ("show the check in time of ali today", 1),
+    ("how much did we sell in june", 1),
+    ("which suppliers are in germany", 1),
+    ("what is the stock level of helmets", 1),
+    ("tell me the names of all managers", 1),
+    ("did ali take leave yesterday", 1),
+    ("was sara late on monday", 1),
+    ("is ahmed present today", 1),
+    ("late arrivals this week", 1),
+    ("who worked from home today", 1),
+    ("good evening", 0),
+    ("thanks eureka", 0),
+    ("open calculator", 0),
+    ("play my playlist", 0),
+    ("what's the weather tomorrow", 0),
+    ("tell me a story", 0),
+    ("whatever works", 0),
+    ("update windows", 0),
+    ("who are you", 0),
+    ("what can you help me with", 0),
+    ("send a message to ahmed", 0),
+    ("stop the music", 0),
+    ("what is the time now", 0),
+    ("create a new folder", 0),
+    ("how is your day going", 0),
+    ("show me a funny video", 0),
+]
+
+# (previous utterance, follow-up, label of the follow-up)
+FOLLOW_UP_SET = [
+    ("was sara late on monday", "what about sara", 1),
+    ("who was absent yesterday", "and today", 1),
+    ("how many orders came in june", "what about july", 1),
+    ("tell me a joke", "what about another one", 0),
+    ("how many orders came in june", "what about you", 0),
+]
+
+
+def legacy_rules(text):
+    txt = text.lower()
+    if any(phrase in txt for phrase in LEGACY_PHRASES):
+        return 'query_database'
+    if any(word in txt for word in LEGACY_QUESTION_WORDS):
+        return 'query_database'
+    return 'unknown'
+
+
+def time_per_call(fn, texts, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    texts = [text for text, _ in EVAL_SET]
+
+    start = time.perf_counter()
+    engine = IntentEngine()
+    train_ms = (time.perf_counter() - start) * 1000
+
+    # Every utterance lands in exactly one column: decided right, decided
+    # wrong, or handed to the LLM
+    legacy = {'correct': 0, 'wrong': 0, 'llm': 0}
+    scored = {'correct': 0, 'wrong': 0, 'llm': 0}
+
+    def score(tally, name, label):
+        if name is None:
+            tally['llm'] += 1
+        elif (name == 'query_database') == bool(label):
+            tally['correct'] += 1
+        else:
+            tally['wrong'] += 1
+
+    cases = [(None, text, label) for text, label in EVAL_SET] + FOLLOW_UP_SET
+    for previous, text, label in cases:
+        # The old parse() asked the LLM about everything the rules called unknown
+        name = legacy_rules(text)
+        score(legacy, None if name == 'unknown' else name, label)
+        previous_intent = engine.classify(previous)[0] if previous else None
+        name, _, source = engine.classify(text, previous_intent)
+        score(scored, None if source == 'uncertain' else name, label)
+
+    total = len(cases)
+    print(f"Utterances: {total}, {len(FOLLOW_UP_SET)} of them follow-ups  (engine trained in {train_ms:.0f} ms)")
+    print(f"{'':<16}{'us/utterance':>14}{'correct':>10}{'wrong':>10}{'LLM calls':>12}")
+    for title, fn, tally in (('legacy rules', legacy_rules, legacy),
+                             ('intent engine', engine.classify, scored)):
+        print(f"{title:<16}{time_per_call(fn, texts):>14.1f}{tally['correct'] / total:>10.0%}"
+              f"{tally['wrong'] / total:>10.0%}{tally['llm'] / total:>12.0%}")
+    print("(all columns are shares of the full set; legacy rules see each follow-up without its context)")
+
+
+if __name__ == '__main__':
+    main()
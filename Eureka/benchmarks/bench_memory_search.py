@@ -0,0 +1,88 @@
+"""LIKE scans vs the FTS5 indexes in Memory as word and chat history grow.
+
+Run from the Eureka directory:  python benchmarks/bench_memory_search.py
+
+Rows are inserted through Memory's store, so the triggers index them as
+they would in use. For each size the old LIKE query and the new search
+paths are timed on the same queries (median of several runs).
+"""
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.memory import Memory
+
+SIZES = (10_000, 100_000, 1_000_000)
+BATCH = 50_000
+RUNS = 5
+
+
+def pseudo_words(n, rng):
+    return [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))) for _ in range(n)]
+
+
+def timed(fn):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    rng = random.Random(0)
+    vocabulary = pseudo_words(20_000, rng)
+    word_queries = [w[1:4] for w in rng.sample(vocabulary, 5)]
+    chat_queries = [' '.join(rng.sample(vocabulary[:2000], 2)) for _ in range(5)]
+    print(f"{'rows':>9}{'insert s':>10}{'words LIKE':>12}{'words FTS':>11}"
+          f"{'chat LIKE':>11}{'chat rank':>11}{'chat recent':>13}  (ms per query)")
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = Memory(os.path.join(tmp, 'memory.db'))
+        rows = 0
+        for size in SIZES:
+            start = time.perf_counter()
+            while rows < size:
+                n = min(BATCH, size - rows)
+                memory.store.write_many('INSERT INTO word_memory (word, context) VALUES (?, ?)',
+                                        [(rng.choice(vocabulary), ' '.join(rng.choices(vocabulary, k=6)))
+                                         for _ in range(n)])
+                # Zipf-ish word choice so some chat words are common and some rare
+                memory.store.write_many('INSERT INTO chat_history (role, content) VALUES (?, ?)',
+                                        [('user', ' '.join(vocabulary[int(rng.paretovariate(1.2)) % 20_000]
+                                                           for _ in range(10))) for _ in range(n)])
+                rows += n
+            insert = time.perf_counter() - start
+            conn = memory.conn
+
+            def words_like():
+                for q in word_queries:
+                    conn.execute('SELECT word, context, timestamp, frequency FROM word_memory WHERE word LIKE ? '
+                                 'ORDER BY timestamp DESC LIMIT 10', (f'%{q}%',)).fetchall()
+
+            def chat_like():
+                for q in chat_queries:
+                    a, b = q.split()
+                    conn.execute('SELECT id, content FROM chat_history WHERE content LIKE ? AND content LIKE ? '
+                                 'ORDER BY id DESC LIMIT 10', (f'%{a}%', f'%{b}%')).fetchall()
+
+            results = [
+                timed(words_like),
+                timed(lambda: [memory.search_words(q) for q in word_queries]),
+                timed(chat_like),
+                timed(lambda: [memory.search(q) for q in chat_queries]),
+                timed(lambda: [memory.search(q, order='recent') for q in chat_queries]),
+            ]
+            per_query = [r / len(word_queries) for r in results]
+            print(f"{size:>9}{insert:>10.1f}" + ''.join(f"{v:>{w}.2f}" for v, w in zip(per_query, (12, 11, 11, 11, 13))))
+        memory.close()
+
+
+if __name__ == '__main__':
+    main()
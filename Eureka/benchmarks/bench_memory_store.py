@@ -0,0 +1,105 @@
+"""Shared rollback-journal connection vs SqliteStore (WAL, writer thread, per-thread readers).
+
+Run from the Eureka directory:  python benchmarks/bench_memory_store.py
+
+WRITERS threads log chat messages as fast as they can while one thread
+calls recall() in a loop. Reported: chat messages committed per second
+and recall latency percentiles while the writes are going on.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.memory import Memory
+
+WRITERS = 4
+SECONDS = 2.0
+FACTS = {f"fact {i}": f"value {i}" for i in range(200)}
+
+
+class LegacyMemory:
+    """The storage Memory used before: one connection shared by all threads, commit per write"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        Memory._create_schema(self.conn)
+        self.conn.commit()
+
+    def remember(self, key, value):
+        self.conn.execute('REPLACE INTO facts VALUES (?,?)', (key.strip().lower(), value))
+        self.conn.commit()
+
+    def recall(self, key):
+        row = self.conn.execute('SELECT value FROM facts WHERE key=?', (key.strip().lower(),)).fetchone()
+        return row[0] if row else None
+
+    def remember_chat_message(self, role, content):
+        self.conn.execute('INSERT INTO chat_history (role, content) VALUES (?, ?)', (role, content))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def run(memory):
+    for key, value in FACTS.items():
+        memory.remember(key, value)
+    stop = threading.Event()
+    written = [0] * WRITERS
+    errors = []
+
+    def log_chat(n):
+        while not stop.is_set():
+            try:
+                memory.remember_chat_message('user', f"message {written[n]} from writer {n}")
+                written[n] += 1
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=log_chat, args=(n,)) for n in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    latencies = []
+    keys = list(FACTS)
+    deadline = time.perf_counter() + SECONDS
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        memory.recall(keys[i % len(keys)])
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(written) / SECONDS, latencies, len(errors)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{WRITERS} chat-logging threads + 1 recall thread for {SECONDS:.0f} s")
+        print(f"{'':<26}{'msgs/s':>9}{'recalls':>9}{'p50 us':>9}{'p99 us':>9}{'max ms':>9}{'errors':>8}")
+        for name, memory in (('shared connection', LegacyMemory(os.path.join(tmp, 'legacy.db'))),
+                             ('WAL + writer thread', Memory(os.path.join(tmp, 'memory.db')))):
+            rate, latencies, errors = run(memory)
+            print(f"{name:<26}{rate:>9.0f}{len(latencies):>9}{percentile(latencies, 0.5) * 1e6:>9.0f}"
+                  f"{percentile(latencies, 0.99) * 1e6:>9.0f}{max(latencies) * 1000:>9.1f}{errors:>8}")
+            if isinstance(memory, Memory):
+                store = memory.write_stats()['store']
+                print(f"  store: {store['commits']} commits for {store['writes']} writes "
+                      f"(avg batch {store['avg_batch']:.1f}, max {store['max_batch']}), "
+                      f"journal {store['journal_mode']}")
+            memory.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Per-request f-string attendance prompt vs the compiled PromptTemplate.
+
+Run from the Eureka directory:  python benchmarks/bench_prompt_templates.py
+
+Reports prompt build time, prompt size, and how many leading tokens two
+different requests share, which is the part a server-side prompt cache
+can reuse (caches match on an identical prefix).
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.database import Database
+from modules.prompt_templates import PromptLibrary
+from modules.schema_index import estimate_tokens
+
+ATTENDANCE = {
+    'table_name': 'HumanResources.Attendance',
+    'columns': ['AttendanceID', 'EmployeeName', 'Department'] + [f'Day{d}' for d in range(1, 32)],
+    'name_column': 'EmployeeName',
+    'date_columns': [f'Day{d}' for d in range(1, 32)],
+}
+SYSTEM = "You are a SQL query generator for attendance/leave tracking. Return only valid SQL queries using exact table and column names."
+REQUESTS = ["how many leaves did Ali get", "who was late on 27", "how many employees were present on day 3",
+            "list everyone absent on the 12th"] * 250
+
+
+def legacy_prompt(attendance_info, user_request):
+    """Prompt construction as generate_sql did it before templates: everything rebuilt per request"""
+    table_name = attendance_info['table_name']
+    name_column = attendance_info['name_column']
+    columns_str = ", ".join(attendance_info['columns'])
+    date_cols_str = ", ".join(attendance_info['date_columns']) if attendance_info['date_columns'] else "date columns"
+    return f"""You are generating SQL queries for an ATTENDANCE/LEAVE tracking database.
+
+TABLE: {table_name}
+ALL COLUMNS: {columns_str}
+NAME COLUMN (for filtering by employee name): {name_column or 'first column that looks like a name'}
+DATE/ATTENDANCE COLUMNS (contain values: Present, Leave, Late, WFH, Half Leave, Absent, NULL): {date_cols_str}
+
+USER REQUEST: "{user_request}"
+
+ATTENDANCE QUERY MAPPING:
+- "How many leaves did [Name] get?" = Count how many times 'Leave' appears across ALL date columns for that person
+  Use: SELECT SUM(CASE WHEN [col1] = 'Leave' THEN 1 ELSE 0 END + CASE WHEN [col2] = 'Leave' THEN 1 ELSE 0 END + ...) AS LeaveCount 
+       FROM {table_name} WHERE {name_column} LIKE '%[Name]%'
+
+- "How many days late did [Name]?" = Count how many times 'Late' appears across ALL date columns
+  Use: SELECT SUM(CASE WHEN [col1] = 'Late' THEN 1 ELSE 0 END + CASE WHEN [col2] = 'Late' THEN 1 ELSE 0 END + ...) AS LateDays
+       FROM {table_name} WHERE {name_column} LIKE '%[Name]%'
+
+- "Who was late on [day/column]?" = SELECT {name_column} WHERE the specific date column = 'Late'
+  If user says "on 27", check if there's a column with "27" in the name, or use column position/index
+
+- "How many employees present on [day/column]?" = COUNT(*) WHERE the specific date column = 'Present'
+
+- For counting across multiple columns, you MUST sum up CASE statements for EACH date column
+
+CRITICAL RULES:
+1. Use table name: {table_name}
+2. Use name column: {name_column or 'identify from columns list'}
+3. Use date columns: {date_cols_str or 'all columns except name and ID'}
+4. For name matching, use LIKE '%Name%' for partial matches
+5. For counting leaves/late across multiple date columns, use OR conditions or SUM with CASE
+6. Return ONLY the SQL query, no explanations
+
+SQL Query:"""
+
+
+def shared_prefix_tokens(a, b):
+    n = 0
+    while n < min(len(a), len(b)) and a[n] == b[n]:
+        n += 1
+    return estimate_tokens(a[:n])
+
+
+def main():
+    library = PromptLibrary()
+    build = {
+        'f-string per request': lambda request: (SYSTEM, legacy_prompt(ATTENDANCE, request)),
+        'compiled template': lambda request: library.render(
+            'attendance', ('v1', ATTENDANCE['table_name']),
+            lambda: Database._attendance_template(ATTENDANCE), request=request),
+    }
+    print(f"{len(REQUESTS)} requests against a {len(ATTENDANCE['columns'])}-column attendance table")
+    print(f"{'':<22}{'build us':>10}{'tokens':>8}{'shared prefix':>15}")
+    for name, make in build.items():
+        start = time.perf_counter()
+        prompts = [make(request) for request in REQUESTS]
+        per_request_us = (time.perf_counter() - start) / len(REQUESTS) * 1e6
+        (system, first), (_, second) = prompts[0], prompts[1]
+        tokens = estimate_tokens(system) + estimate_tokens(first)
+        shared = estimate_tokens(system) + shared_prefix_tokens(first, second)
+        print(f"{name:<22}{per_request_us:>10.2f}{tokens:>8}{shared:>9} ({shared / tokens:.0%})")
+    print(f"template stats: {library.stats()['attendance']}")
+
+
+if __name__ == '__main__':
+    main()
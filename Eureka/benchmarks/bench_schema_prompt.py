@@ -0,0 +1,181 @@
+"""Compare the keyword-filter schema prompt with the BM25 schema index.
+
+Run from the Eureka directory:  python benchmarks/bench_schema_prompt.py
+
+Uses an AdventureWorks-shaped catalog (71 tables) and reports, per
+approach: schema section size in estimated tokens, prompt build time,
+whether the table the question needs made it into the prompt, and a
+modelled end-to-end SQL generation latency from FakeLLMBackend, whose
+delay grows with prompt size (PREFILL_MS_PER_TOKEN).
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.llm_client import FakeLLMBackend, LLMClient
+from modules.schema_index import SchemaIndex, build_schema_section, estimate_tokens
+
+BASE_LATENCY_MS = 300
+PREFILL_MS_PER_TOKEN = 0.25
+
+TABLES = {
+    'dbo.AWBuildVersion': 'SystemInformationID DatabaseVersion VersionDate ModifiedDate',
+    'dbo.DatabaseLog': 'DatabaseLogID PostTime DatabaseUser Event Schema Object TSQL XmlEvent',
+    'dbo.ErrorLog': 'ErrorLogID ErrorTime UserName ErrorNumber ErrorSeverity ErrorState ErrorProcedure ErrorLine ErrorMessage',
+    'HumanResources.Department': 'DepartmentID Name GroupName ModifiedDate',
+    'HumanResources.Employee': 'BusinessEntityID NationalIDNumber LoginID OrganizationNode OrganizationLevel JobTitle BirthDate MaritalStatus Gender HireDate SalariedFlag VacationHours SickLeaveHours CurrentFlag rowguid ModifiedDate',
+    'HumanResources.EmployeeDepartmentHistory': 'BusinessEntityID DepartmentID ShiftID StartDate EndDate ModifiedDate',
+    'HumanResources.EmployeePayHistory': 'BusinessEntityID RateChangeDate Rate PayFrequency ModifiedDate',
+    'HumanResources.JobCandidate': 'JobCandidateID BusinessEntityID Resume ModifiedDate',
+    'HumanResources.Shift': 'ShiftID Name StartTime EndTime ModifiedDate',
+    'HumanResources.Attendance': 'AttendanceID EmployeeName Department ' + ' '.join(f'Day{d}' for d in range(1, 32)),
+    'Person.Address': 'AddressID AddressLine1 AddressLine2 City StateProvinceID PostalCode SpatialLocation rowguid ModifiedDate',
+    'Person.AddressType': 'AddressTypeID Name rowguid ModifiedDate',
+    'Person.BusinessEntity': 'BusinessEntityID rowguid ModifiedDate',
+    'Person.BusinessEntityAddress': 'BusinessEntityID AddressID AddressTypeID rowguid ModifiedDate',
+    'Person.BusinessEntityContact': 'BusinessEntityID PersonID ContactTypeID rowguid ModifiedDate',
+    'Person.ContactType': 'ContactTypeID Name ModifiedDate',
+    'Person.CountryRegion': 'CountryRegionCode Name ModifiedDate',
+    'Person.EmailAddress': 'BusinessEntityID EmailAddressID EmailAddress rowguid ModifiedDate',
+    'Person.Password': 'BusinessEntityID PasswordHash PasswordSalt rowguid ModifiedDate',
+    'Person.Person': 'BusinessEntityID PersonType NameStyle Title FirstName MiddleName LastName Suffix EmailPromotion AdditionalContactInfo Demographics rowguid ModifiedDate',
+    'Person.PersonPhone': 'BusinessEntityID PhoneNumber PhoneNumberTypeID ModifiedDate',
+    'Person.PhoneNumberType': 'PhoneNumberTypeID Name ModifiedDate',
+    'Person.StateProvince': 'StateProvinceID StateProvinceCode CountryRegionCode IsOnlyStateProvinceFlag Name TerritoryID rowguid ModifiedDate',
+    'Production.BillOfMaterials': 'BillOfMaterialsID ProductAssemblyID ComponentID StartDate EndDate UnitMeasureCode BOMLevel PerAssemblyQty ModifiedDate',
+    'Production.Culture': 'CultureID Name ModifiedDate',
+    'Production.Document': 'DocumentNode DocumentLevel Title Owner FolderFlag FileName FileExtension Revision ChangeNumber Status DocumentSummary Document rowguid ModifiedDate',
+    'Production.Illustration': 'IllustrationID Diagram ModifiedDate',
+    'Production.Location': 'LocationID Name CostRate Availability ModifiedDate',
+    'Production.Product': 'ProductID Name ProductNumber MakeFlag FinishedGoodsFlag Color SafetyStockLevel ReorderPoint StandardCost ListPrice Size SizeUnitMeasureCode WeightUnitMeasureCode Weight DaysToManufacture ProductLine Class Style ProductSubcategoryID ProductModelID SellStartDate SellEndDate DiscontinuedDate rowguid ModifiedDate',
+    'Production.ProductCategory': 'ProductCategoryID Name rowguid ModifiedDate',
+    'Production.ProductCostHistory': 'ProductID StartDate EndDate StandardCost ModifiedDate',
+    'Production.ProductDescription': 'ProductDescriptionID Description rowguid ModifiedDate',
+    'Production.ProductDocument': 'ProductID DocumentNode ModifiedDate',
+    'Production.ProductInventory': 'ProductID LocationID Shelf Bin Quantity rowguid ModifiedDate',
+    'Production.ProductListPriceHistory': 'ProductID StartDate EndDate ListPrice ModifiedDate',
+    'Production.ProductModel': 'ProductModelID Name CatalogDescription Instructions rowguid ModifiedDate',
+    'Production.ProductModelIllustration': 'ProductModelID IllustrationID ModifiedDate',
+    'Production.ProductModelProductDescriptionCulture': 'ProductModelID ProductDescriptionID CultureID ModifiedDate',
+    'Production.ProductPhoto': 'ProductPhotoID ThumbNailPhoto ThumbnailPhotoFileName LargePhoto LargePhotoFileName ModifiedDate',
+    'Production.ProductProductPhoto': 'ProductID ProductPhotoID Primary ModifiedDate',
+    'Production.ProductReview': 'ProductReviewID ProductID ReviewerName ReviewDate EmailAddress Rating Comments ModifiedDate',
+    'Production.ProductSubcategory': 'ProductSubcategoryID ProductCategoryID Name rowguid ModifiedDate',
+    'Production.ScrapReason': 'ScrapReasonID Name ModifiedDate',
+    'Production.TransactionHistory': 'TransactionID ProductID ReferenceOrderID ReferenceOrderLineID TransactionDate TransactionType Quantity ActualCost ModifiedDate',
+    'Production.TransactionHistoryArchive': 'TransactionID ProductID ReferenceOrderID ReferenceOrderLineID TransactionDate TransactionType Quantity ActualCost ModifiedDate',
+    'Production.UnitMeasure': 'UnitMeasureCode Name ModifiedDate',
+    'Production.WorkOrder': 'WorkOrderID ProductID OrderQty StockedQty ScrappedQty StartDate EndDate DueDate ScrapReasonID ModifiedDate',
+    'Production.WorkOrderRouting': 'WorkOrderID ProductID OperationSequence LocationID ScheduledStartDate ScheduledEndDate ActualStartDate ActualEndDate ActualResourceHrs PlannedCost ActualCost ModifiedDate',
+    'Purchasing.ProductVendor': 'ProductID BusinessEntityID AverageLeadTime StandardPrice LastReceiptCost LastReceiptDate MinOrderQty MaxOrderQty OnOrderQty UnitMeasureCode ModifiedDate',
+    'Purchasing.PurchaseOrderDetail': 'PurchaseOrderID PurchaseOrderDetailID DueDate OrderQty ProductID UnitPrice LineTotal ReceivedQty RejectedQty StockedQty ModifiedDate',
+    'Purchasing.PurchaseOrderHeader': 'PurchaseOrderID RevisionNumber Status EmployeeID VendorID ShipMethodID OrderDate ShipDate SubTotal TaxAmt Freight TotalDue ModifiedDate',
+    'Purchasing.ShipMethod': 'ShipMethodID Name ShipBase ShipRate rowguid ModifiedDate',
+    'Purchasing.Vendor': 'BusinessEntityID AccountNumber Name CreditRating PreferredVendorStatus ActiveFlag PurchasingWebServiceURL ModifiedDate',
+    'Sales.CountryRegionCurrency': 'CountryRegionCode CurrencyCode ModifiedDate',
+    'Sales.CreditCard': 'CreditCardID CardType CardNumber ExpMonth ExpYear ModifiedDate',
+    'Sales.Currency': 'CurrencyCode Name ModifiedDate',
+    'Sales.CurrencyRate': 'CurrencyRateID CurrencyRateDate FromCurrencyCode ToCurrencyCode AverageRate EndOfDayRate ModifiedDate',
+    'Sales.Customer': 'CustomerID PersonID StoreID TerritoryID AccountNumber rowguid ModifiedDate',
+    'Sales.PersonCreditCard': 'BusinessEntityID CreditCardID ModifiedDate',
+    'Sales.SalesOrderDetail': 'SalesOrderID SalesOrderDetailID CarrierTrackingNumber OrderQty ProductID SpecialOfferID UnitPrice UnitPriceDiscount LineTotal rowguid ModifiedDate',
+    'Sales.SalesOrderHeader': 'SalesOrderID RevisionNumber OrderDate DueDate ShipDate Status OnlineOrderFlag SalesOrderNumber PurchaseOrderNumber AccountNumber CustomerID SalesPersonID TerritoryID BillToAddressID ShipToAddressID ShipMethodID CreditCardID CreditCardApprovalCode CurrencyRateID SubTotal TaxAmt Freight TotalDue Comment rowguid ModifiedDate',
+    'Sales.SalesOrderHeaderSalesReason': 'SalesOrderID SalesReasonID ModifiedDate',
+    'Sales.SalesPerson': 'BusinessEntityID TerritoryID SalesQuota Bonus CommissionPct SalesYTD SalesLastYear rowguid ModifiedDate',
+    'Sales.SalesPersonQuotaHistory': 'BusinessEntityID QuotaDate SalesQuota rowguid ModifiedDate',
+    'Sales.SalesReason': 'SalesReasonID Name ReasonType ModifiedDate',
+    'Sales.SalesTaxRate': 'SalesTaxRateID StateProvinceID TaxType TaxRate Name rowguid ModifiedDate',
+    'Sales.SalesTerritory': 'TerritoryID Name CountryRegionCode Group SalesYTD SalesLastYear CostYTD CostLastYear rowguid ModifiedDate',
+    'Sales.SalesTerritoryHistory': 'BusinessEntityID TerritoryID StartDate EndDate rowguid ModifiedDate',
+    'Sales.ShoppingCartItem': 'ShoppingCartItemID ShoppingCartID Quantity ProductID DateCreated ModifiedDate',
+    'Sales.SpecialOffer': 'SpecialOfferID Description DiscountPct Type Category StartDate EndDate MinQty MaxQty rowguid ModifiedDate',
+    'Sales.Store': 'BusinessEntityID Name SalesPersonID Demographics rowguid ModifiedDate',
+}
+
+# (question, a table the SQL needs)
+QUESTIONS = [
+    ("how many employees were hired after 2010", 'HumanResources.Employee'),
+    ("what is the total due of all sales orders in 2013", 'Sales.SalesOrderHeader'),
+    ("list the products with a list price above 1000", 'Production.Product'),
+    ("which vendors have a credit rating of 1", 'Purchasing.Vendor'),
+    ("show the email address of Ken Sanchez", 'Person.EmailAddress'),
+    ("which sales territory has the highest sales year to date", 'Sales.SalesTerritory'),
+    ("what is the current inventory quantity of each product", 'Production.ProductInventory'),
+    ("who was absent on day 5", 'HumanResources.Attendance'),
+    ("what are the reviews and ratings for products", 'Production.ProductReview'),
+    ("how many work orders were scrapped", 'Production.WorkOrder'),
+    ("what currencies do we accept", 'Sales.Currency'),
+    ("show salespeople and their quota", 'Sales.SalesPerson'),
+    ("which departments belong to the manufacturing group", 'HumanResources.Department'),
+    ("average pay rate of employees", 'HumanResources.EmployeePayHistory'),
+    ("list the shipping methods and their rates", 'Purchasing.ShipMethod'),
+    ("which cities have the most adresses", 'Person.Address'),
+]
+
+
+def catalog_schemas():
+    schemas = {}
+    for qualified, columns in TABLES.items():
+        schema, table = qualified.split('.')
+        schemas.setdefault(schema, {})[table] = [{'COLUMN_NAME': c} for c in columns.split()]
+    return schemas
+
+
+def legacy_schema_section(schemas):
+    """The table selection _fallback_prompt used before the schema index"""
+    tables = [f"{s}.{t}" for s in sorted(schemas, key=str.lower) for t in sorted(schemas[s], key=str.lower)]
+    attendance_tables = [t for t in tables if any(k in t.lower() for k in ['attendance', 'employee', 'staff', 'leave', 'present', 'late'])]
+    if not attendance_tables:
+        common_tables = [t for t in tables if any(s in t for s in ['Sales', 'Production', 'HumanResources', 'Person', 'Purchasing'])]
+        tables_to_show = common_tables[:15] if len(common_tables) > 15 else tables[:20]
+    else:
+        tables_to_show = attendance_tables[:10] + [t for t in tables if t not in attendance_tables][:10]
+    parts = []
+    for name in tables_to_show:
+        schema, table = name.split('.')
+        columns = [c['COLUMN_NAME'] for c in schemas[schema][table]]
+        if any(k in name.lower() for k in ['attendance', 'employee', 'staff', 'leave']):
+            columns_str = ", ".join(columns)
+        else:
+            columns_str = ", ".join(columns[:20])
+            if len(columns) > 20:
+                columns_str += f" (and {len(columns) - 20} more columns)"
+        parts.append(f"{name}: columns are [{columns_str}]")
+    return "\n".join(parts), tables_to_show
+
+
+def main():
+    schemas = catalog_schemas()
+    start = time.perf_counter()
+    index = SchemaIndex(schemas)
+    index_ms = (time.perf_counter() - start) * 1000
+
+    llm = LLMClient(FakeLLMBackend(lambda messages: "SELECT 1"))
+    approaches = {
+        'keyword filter': lambda question: legacy_schema_section(schemas),
+        'schema index': lambda question: build_schema_section(index, question),
+    }
+    print(f"{len(TABLES)} tables, {len(QUESTIONS)} questions; index built in {index_ms:.1f} ms")
+    print(f"{'':<16}{'avg tokens':>12}{'max tokens':>12}{'build ms':>10}{'recall':>8}{'e2e ms':>9}")
+    for name, build in approaches.items():
+        tokens, build_ms, hits, e2e_ms = [], [], 0, []
+        for question, needed in QUESTIONS:
+            start = time.perf_counter()
+            section, tables = build(question)
+            build_ms.append((time.perf_counter() - start) * 1000)
+            tokens.append(estimate_tokens(section))
+            hits += needed in tables
+            llm.backend.latency = (BASE_LATENCY_MS + PREFILL_MS_PER_TOKEN * tokens[-1]) / 1000
+            start = time.perf_counter()
+            llm.chat('sql_generation', "You are a SQL query generator.", f"{section}\n\n{question}", 300)
+            e2e_ms.append(build_ms[-1] + (time.perf_counter() - start) * 1000)
+        print(f"{name:<16}{sum(tokens) / len(tokens):>12.0f}{max(tokens):>12}"
+              f"{sum(build_ms) / len(build_ms):>10.2f}{hits / len(QUESTIONS):>8.0%}"
+              f"{sum(e2e_ms) / len(e2e_ms):>9.0f}")
+    print(f"(e2e models the LLM as {BASE_LATENCY_MS} ms + {PREFILL_MS_PER_TOKEN} ms per schema token)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Per-word commits vs the write-behind word buffer in Memory.
+
+Run from the Eureka directory:  python benchmarks/bench_word_memory.py
+
+Both paths write to a fresh memory.db in a temporary directory. The old
+path is reproduced here as it was (SELECT, then UPDATE or INSERT, then
+commit, for every word). Reported: time the caller spends per utterance,
+total time until everything is on disk, and words per second.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.memory import Memory
+
+UTTERANCES = 300
+WORDS_PER_UTTERANCE = 20
+VOCABULARY = [f"word{i}" for i in range(400)] + ["attendance", "leave", "present", "sales", "employee"]
+
+
+def legacy_remember_sentence(conn, sentence, context=None):
+    for word in sentence.lower().split():
+        word = ''.join(c for c in word if c.isalnum())
+        if not word or len(word) < 2:
+            continue
+        row = conn.execute('''
+            SELECT id, frequency FROM word_memory
+            WHERE word = ? AND timestamp > datetime('now', '-5 minutes')
+            ORDER BY timestamp DESC LIMIT 1
+        ''', (word,)).fetchone()
+        if row:
+            conn.execute('UPDATE word_memory SET frequency = frequency + 1 WHERE id = ?', (row[0],))
+        else:
+            conn.execute('INSERT INTO word_memory (word, context) VALUES (?, ?)', (word, context))
+        conn.commit()
+
+
+def totals(conn):
+    return dict(conn.execute('SELECT word, SUM(frequency) FROM word_memory GROUP BY word'))
+
+
+def main():
+    rng = random.Random(0)
+    sentences = [' '.join(rng.choice(VOCABULARY) for _ in range(WORDS_PER_UTTERANCE)) + '.'
+                 for _ in range(UTTERANCES)]
+    words = UTTERANCES * WORDS_PER_UTTERANCE
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # The legacy path: one connection, default rollback journal
+        conn = sqlite3.connect(os.path.join(tmp, 'legacy.db'))
+        Memory._create_schema(conn)
+        conn.commit()
+        start = time.perf_counter()
+        for sentence in sentences:
+            legacy_remember_sentence(conn, sentence, 'bench')
+        elapsed = time.perf_counter() - start
+        results['per-word commit'] = (elapsed, elapsed, totals(conn), UTTERANCES * WORDS_PER_UTTERANCE)
+        conn.close()
+
+        memory = Memory(os.path.join(tmp, 'memory.db'))
+        start = time.perf_counter()
+        for sentence in sentences:
+            memory.remember_sentence(sentence, 'bench')
+        caller = time.perf_counter() - start
+        memory.flush()
+        elapsed = time.perf_counter() - start
+        stats = memory.write_stats()
+        results['write-behind'] = (caller, elapsed, totals(memory.conn), stats['flushes'])
+        memory.close()
+
+    print(f"{UTTERANCES} utterances x {WORDS_PER_UTTERANCE} words")
+    print(f"{'':<18}{'caller us/utt':>14}{'total ms':>10}{'words/s':>10}{'commits':>9}")
+    for name, (caller, elapsed, _, commits) in results.items():
+        print(f"{name:<18}{caller / UTTERANCES * 1e6:>14.0f}{elapsed * 1000:>10.0f}"
+              f"{words / elapsed:>10.0f}{commits:>9}")
+    same = results['per-word commit'][2] == results['write-behind'][2]
+    print(f"per-word totals identical: {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Raw-row aggregation vs the word rollups in Memory, and the effect of compaction.
+
+Run from the Eureka directory:  python benchmarks/bench_word_rollups.py
+
+Builds a word history spread over the last 90 days, opens it with Memory
+(which fills the rollups from the raw rows once), then times the old
+queries against the rollup-backed methods. Finally compact() drops raw
+rows past the 30-day horizon and the live database size is reported.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from modules.memory import Memory
+
+SIZES = (100_000, 1_000_000)
+DAYS = 90
+RUNS = 5
+
+
+def legacy_queries(conn):
+    """The queries Memory ran before the rollups (hours bound as a parameter here)"""
+    return {
+        'frequency 24h': lambda: conn.execute(
+            "SELECT SUM(frequency) FROM word_memory WHERE word = ? AND timestamp > datetime('now', ?)",
+            ('word7', '-24 hours')).fetchone(),
+        'top 10, 24h': lambda: conn.execute(
+            "SELECT word, SUM(frequency) AS total_freq FROM word_memory WHERE timestamp > datetime('now', ?) "
+            "GROUP BY word ORDER BY total_freq DESC LIMIT 10", ('-24 hours',)).fetchall(),
+        'top 10, 30 days': lambda: conn.execute(
+            "SELECT word, SUM(frequency) AS total_freq FROM word_memory WHERE timestamp > datetime('now', ?) "
+            "GROUP BY word ORDER BY total_freq DESC LIMIT 10", ('-720 hours',)).fetchall(),
+        # These counted rows; get_vocabulary_stats() now counts spoken occurrences
+        'vocabulary stats': lambda: (
+            conn.execute('SELECT COUNT(DISTINCT word) FROM word_memory').fetchone(),
+            conn.execute('SELECT COUNT(*) FROM word_memory').fetchone(),
+            conn.execute("SELECT COUNT(*) FROM word_memory WHERE timestamp > datetime('now', '-24 hours')").fetchone()),
+    }
+
+
+def rollup_queries(memory):
+    return {
+        'frequency 24h': lambda: memory.get_word_frequency('word7'),
+        'top 10, 24h': lambda: memory.get_most_common_words(10),
+        'top 10, 30 days': lambda: memory.get_most_common_words(10, hours=720),
+        'vocabulary stats': memory.get_vocabulary_stats,
+    }
+
+
+def timed(fn):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def live_mb(conn):
+    pages = conn.execute('PRAGMA page_count').fetchone()[0] - conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return pages * conn.execute('PRAGMA page_size').fetchone()[0] / 1e6
+
+
+def main():
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    now = time.time()
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'memory.db')
+            conn = sqlite3.connect(path)
+            Memory._create_schema(conn)
+            conn.executemany('INSERT INTO word_memory (word, context, timestamp, frequency) VALUES (?, ?, ?, ?)', (
+                (vocabulary[int(rng.paretovariate(1.1)) % len(vocabulary)], None,
+                 time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now - rng.random() * DAYS * 86400)),
+                 rng.randint(1, 3))
+                for _ in range(size)))
+            conn.commit()
+            legacy = {name: timed(fn) for name, fn in legacy_queries(conn).items()}
+            conn.close()
+
+            start = time.perf_counter()
+            # A long flush interval keeps the background compaction out of the way of the timed one
+            memory = Memory(path, flush_interval=3600)
+            opened = time.perf_counter() - start
+            new = {name: timed(fn) for name, fn in rollup_queries(memory).items()}
+            before = live_mb(memory.conn)
+            start = time.perf_counter()
+            removed = memory.compact()
+            compact_s = time.perf_counter() - start
+            after = live_mb(memory.conn)
+            memory.close()
+
+        print(f"{size} raw rows over {DAYS} days (first open incl. FTS and rollup build: {opened:.1f} s)")
+        print(f"  {'':<18}{'raw rows ms':>12}{'rollups ms':>12}")
+        for name in legacy:
+            print(f"  {name:<18}{legacy[name]:>12.2f}{new[name]:>12.2f}")
+        print(f"  compact(): removed {removed} rows in {compact_s:.1f} s, live data {before:.1f} MB -> {after:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,18 @@
 import customtkinter
+import asyncio
 import queue
 import threading
 import string
-import os
-import glob
-import time
 import dotenv
 import re
 
 from modules.audio import AudioInterface
+from modules.tts import stream_sentences
 from modules.stt import SpeechRecognizer
+from modules.vad import VadFrontEnd, VoiceActivityDetector
 from modules.nlu import NLU
-from modules.database import Database
+from utils.config import Config
+from modules.database import Database, QueryError
 
 EMOJI_PATTERN = re.compile(
     "["
@@ -25,31 +26,209 @@ EMOJI_PATTERN = re.compile(
     flags=re.UNICODE,
 )
 
-def cleanup_temp_files():
-    temp_files = glob.glob("tts_*.wav")
-    for f in temp_files:
-        try:
-            os.remove(f)
-        except OSError:
-            pass
+STOP_PHRASES = ['stop', 'hold on', 'wait', 'shut up']
+FALLBACK_REPLY = "I can only answer questions about the database. Please ask me something about the AdventureWorks database."
 
 dotenv.load_dotenv()
 
+class Turn:
+    """One user utterance on its way through the pipeline"""
+    def __init__(self, text):
+        self.text = text
+        self.cancelled = False
+        self.query = None
+        self.guarded = None
+        self.result = None
+        self.reply = None
+        self.reply_stream = None
+
+class TurnPipeline:
+    """Runs each turn through NLU, SQL generation, query execution, summarization and speech.
+
+    Every stage is an asyncio task reading from its own queue, so a new
+    utterance can be parsed while the previous one is still being queried.
+    Blocking calls run in worker threads, and "stop" cancels all in-flight
+    turns.
+    """
+
+    def __init__(self, nlu, database, audio, stt, update_ui):
+        self.nlu = nlu
+        self.database = database
+        self.audio = audio
+        self.stt = stt
+        self.update_ui = update_ui
+        self.loop = None
+        self.in_flight = set()
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.to_nlu = asyncio.Queue()
+        self.to_sql = asyncio.Queue()
+        self.to_exec = asyncio.Queue()
+        self.to_summary = asyncio.Queue()
+        self.to_speech = asyncio.Queue()
+        await asyncio.gather(
+            self._stage(self.to_nlu, self._parse, "understanding your request"),
+            self._stage(self.to_sql, self._generate_sql, "writing the database query"),
+            self._stage(self.to_exec, self._execute, "querying the database"),
+            self._stage(self.to_summary, self._summarize, "summarizing the results"),
+            self._stage(self.to_speech, self._speak, None),
+        )
+
+    def submit(self, text):
+        """Queue an utterance; safe to call from the recognizer thread"""
+        self.loop.call_soon_threadsafe(self._enqueue, Turn(text))
+
+    def cancel(self):
+        """Drop every in-flight turn and stop speaking; safe to call from any thread"""
+        self.loop.call_soon_threadsafe(self._cancel_all)
+
+    def _enqueue(self, turn):
+        self.in_flight.add(turn)
+        self.to_nlu.put_nowait(turn)
+
+    def _cancel_all(self):
+        for turn in self.in_flight:
+            turn.cancelled = True
+        self.in_flight.clear()
+        self.audio.stop_speaking()
+        self.update_ui(status_msg="Listening resumed after interruption...")
+
+    async def _stage(self, inbox, work, activity):
+        """Feed turns from inbox through work; errors are spoken, except from speech itself (activity None)"""
+        while True:
+            turn = await inbox.get()
+            if turn.cancelled:
+                continue
+            try:
+                next_queue = await work(turn)
+            except Exception as e:
+                if activity is None:
+                    # Speaking the error would fail the same way, so the turn is dropped
+                    print(f"[Pipeline] Speech error, dropping turn: {e}")
+                    self.update_ui(status_msg="Listening...")
+                    next_queue = None
+                elif isinstance(e, QueryError):
+                    turn.reply = e.message
+                    next_queue = self.to_speech
+                else:
+                    print(f"[Pipeline] Stage error: {e}")
+                    turn.reply = f"Sorry, I encountered an error while {activity}: {e}"
+                    next_queue = self.to_speech
+            if turn.cancelled:
+                continue
+            if next_queue is not None:
+                next_queue.put_nowait(turn)
+            else:
+                self.in_flight.discard(turn)
+
+    async def _parse(self, turn):
+        intent = await asyncio.to_thread(self.nlu.parse, turn.text)
+        # Only handle database queries
+        if intent.name == 'query_database':
+            turn.query = intent.entities.get('query', turn.text)
+            self.update_ui(status_msg="Querying database...")
+            return self.to_sql
+        # If not a database query, inform the user
+        self.update_ui(status_msg="Waiting for database query...")
+        turn.reply = FALLBACK_REPLY
+        return self.to_speech
+
+    async def _generate_sql(self, turn):
+        if not self.database.pool:
+            turn.reply = "Sorry, database functionality is not available. Please install pyodbc: pip install pyodbc"
+            return self.to_speech
+        turn.guarded = await asyncio.to_thread(self.database.generate_sql, turn.query)
+        cached = self.database.cached_summary(turn.guarded)
+        if cached is not None:
+            turn.reply = cached
+            return self.to_speech
+        return self.to_exec
+
+    async def _execute(self, turn):
+        turn.guarded, turn.result = await asyncio.to_thread(self.database.run_sql, turn.guarded, turn.query)
+        return self.to_summary
+
+    async def _summarize(self, turn):
+        # Speech starts on the first sentence; the rest is generated while it plays
+        turn.reply_stream = self.database.summarize_stream(turn.guarded.sql, turn.result)
+        return self.to_speech
+
+    async def _speak(self, turn):
+        # Recognition keeps running; the gate drops Eureka's own voice but still hears "stop"
+        self.stt.close_gate()
+        try:
+            done = self.loop.create_future()
+
+            def on_done():
+                self.loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+
+            if turn.reply_stream is not None:
+                chunks, turn.reply_stream = turn.reply_stream, None
+                self.update_ui(status_msg="Speaking...")
+                self.audio.stop_speaking()
+                utterance = self.audio.begin_speech(on_done=on_done)
+                turn.reply = await asyncio.to_thread(self._speak_stream, utterance, chunks)
+                self.update_ui(log_msg=f"Eureka: {turn.reply}")
+            else:
+                # Line breaks are kept for speech: each line becomes its own spoken chunk
+                reply_for_speech = EMOJI_PATTERN.sub(r'', turn.reply).strip()
+                reply = ' '.join(turn.reply.splitlines()).strip()
+                self.update_ui(log_msg=f"Eureka: {reply}", status_msg="Speaking...")
+                self.audio.speak(reply_for_speech, on_done=on_done)
+            await done
+        finally:
+            self.stt.open_gate()
+        self.update_ui(status_msg="Listening...")
+        return None
+
+    @staticmethod
+    def _speak_stream(utterance, chunks):
+        """Queue each sentence for speech as soon as it is complete; returns the whole reply"""
+        spoken = []
+        try:
+            for sentence in stream_sentences(chunks):
+                if utterance.cancelled:
+                    break
+                spoken.append(sentence)
+                utterance.add(EMOJI_PATTERN.sub(r'', sentence).strip())
+        finally:
+            chunks.close()  # stops generation if the user interrupted
+            utterance.close()
+        return ' '.join(spoken)
+
 class VoiceAssistantThread(threading.Thread):
     def __init__(self, ui_queue):
         super().__init__()
         self.ui_queue = ui_queue
         self.daemon = True
-        self.ignore_recognition = False
 
     def run(self):
         try:
             # --- Initialization ---
             audio = AudioInterface()
-            stt = SpeechRecognizer()
+            threading.Thread(target=audio.tts.prerender, args=(Config.TTS_PRERENDER_PHRASES,), daemon=True).start()
+            if Config.VAD_ENABLED:
+                # Only speech segments found by the local VAD reach Azure
+                end_padding_ms = Config.STT_SEGMENTATION_SILENCE_MS + 100
+                stt = SpeechRecognizer(use_push_stream=True,
+                                       segmentation_silence_ms=Config.STT_SEGMENTATION_SILENCE_MS,
+                                       front_end_delay_ms=Config.VAD_HANGOVER_MS + end_padding_ms)
+                audio.start_recording()
+                vad_front_end = VadFrontEnd(
+                    audio.capture,
+                    stt.push_stream.write,
+                    VoiceActivityDetector(sample_rate=audio.rate,
+                                          min_energy_db=Config.VAD_MIN_ENERGY_DB,
+                                          hangover_ms=Config.VAD_HANGOVER_MS,
+                                          service_end_silence_ms=Config.STT_SEGMENTATION_SILENCE_MS),
+                    end_padding_ms=end_padding_ms
+                )
+                vad_front_end.start()
+            else:
+                stt = SpeechRecognizer()
             nlu = NLU()
             database = Database()
-            text_queue = queue.Queue()
 
             def update_ui(log_msg=None, status_msg=None):
                 if log_msg: 
@@ -57,68 +236,31 @@ class VoiceAssistantThread(threading.Thread):
                 if status_msg: 
                     self.ui_queue.put(("status", status_msg))
 
+            pipeline = TurnPipeline(nlu, database, audio, stt, update_ui)
+
             def stt_callback(text):
-                if self.ignore_recognition:
-                    print("[DEBUG] Ignoring audio during speech period")
-                    return
-                if audio.is_speaking():
-                    print("[DEBUG] Eureka is speaking, ignoring input")
-                    return
                 cleaned_text = text.lower().strip().translate(str.maketrans('', '', string.punctuation))
-                if cleaned_text in ['stop', 'hold on', 'wait', 'shut up']:
-                    if audio.is_speaking():
-                        print("[DEBUG] Interruption detected, stopping speech")
-                        audio.stop_speaking()
-                        time.sleep(0.5)
-                        update_ui(status_msg="Listening resumed after interruption...")
-                else:
-                    if cleaned_text:
-                        update_ui(log_msg=f"You: {text}")
-                        text_queue.put(text)
-            
-            cleanup_temp_files()
-            stt.start_continuous(stt_callback)
-            update_ui(status_msg="Listening...")
-
-            # --- Main Loop ---
-            while True:
-                text = text_queue.get()
-                intent = nlu.parse(text)
-                reply = "I can only answer questions about the database. Please ask me something about the AdventureWorks database."
-                
-                # Only handle database queries
-                if intent.name == 'query_database':
-                    user_query = intent.entities.get('query', text)
-                    update_ui(status_msg="Querying database...")
-                    reply = database.auto_query(user_query)
-                else:
-                    # If not a database query, inform the user
-                    update_ui(status_msg="Waiting for database query...")
-
-                # --- Final Reply Handling ---
-                # Ensure reply is a single line
-                reply_for_speech = EMOJI_PATTERN.sub(r'', reply)
-                reply_for_speech = ' '.join(reply_for_speech.splitlines()).strip()
-                reply = ' '.join(reply.splitlines()).strip()
-                update_ui(log_msg=f"Eureka: {reply}", status_msg="Speaking...")
-                
-                # --- Start of Critical Section ---
-                stt.pause_recognition()
-                audio.speak(reply_for_speech)
-
-                while audio.is_speaking():
-                    time.sleep(0.1)
-
-                # Extended grace period
-                time.sleep(1.2)
-
-                with text_queue.mutex:
-                    text_queue.queue.clear()
+                if cleaned_text in STOP_PHRASES:
+                    print("[DEBUG] Interruption detected, cancelling current turn")
+                    pipeline.cancel()
+                    return
+                if cleaned_text:
+                    update_ui(log_msg=f"You: {text}")
+                    pipeline.submit(text)
 
-                stt.resume_recognition()
-                # --- End of Critical Section ---
+            def barge_in(text):
+                print(f"[DEBUG] Barge-in detected ({text!r}), stopping speech")
+                pipeline.cancel()
 
+            async def main():
+                pipeline_task = asyncio.ensure_future(pipeline.run())
+                # Wait until the pipeline's event loop is bound before audio can arrive
+                await asyncio.sleep(0)
+                stt.start_continuous(stt_callback, on_barge_in=barge_in, barge_in_phrases=STOP_PHRASES)
                 update_ui(status_msg="Listening...")
+                await pipeline_task
+
+            asyncio.run(main())
 
         except Exception as e:
             self.ui_queue.put(("log", f"An error occurred in the assistant thread: {e}"))
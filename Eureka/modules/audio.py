@@ -1,22 +1,28 @@
-import queue, pyaudio, wave, threading
-from modules.tts import TTS
-import os
+import queue, pyaudio, threading
+from modules.ring_buffer import CaptureBuffer
+from modules.tts import TTS, split_for_speech
 
 class AudioInterface:
-    def __init__(self, rate=16000, chunk=1024):
+    def __init__(self, rate=16000, chunk=1024, tts_backend=None, capture_seconds=10.0):
         self.rate    = rate
         self.chunk   = chunk
         self.format  = pyaudio.paInt16
         self.audio   = pyaudio.PyAudio()
         self.stream  = None
-        self.frames  = queue.Queue()
+        self.capture = CaptureBuffer(capture_seconds, sample_rate=rate)
         self.speaking_stream = None
-        self.tts = TTS()
+        self.tts = TTS(tts_backend)
         self.speaking_flag = False  # Add a flag to track speaking state
+        # One long-lived playback worker fed by a queue of utterances
+        self._utterances = queue.Queue()
+        self._current = None
+        self._closed = False
+        self._player = threading.Thread(target=self._playback_loop, daemon=True)
+        self._player.start()
 
     def start_recording(self):
         def cb(in_data, frame_count, t, status):
-            self.frames.put(in_data)
+            self.capture.write(in_data)
             return (None, pyaudio.paContinue)
         self.stream = self.audio.open(format=self.format,
                                        channels=1,
@@ -30,67 +36,172 @@ class AudioInterface:
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
+            self.stream = None
 
     def read_audio(self):
-        data = b''
-        while not self.frames.empty():
-            data += self.frames.get()
-        return data
+        """Everything recorded since the last call"""
+        return bytes(self.capture.read())
+
+    def recent_audio(self, ms):
+        """The last ms of microphone audio as a memoryview, for VAD or keyword spotting"""
+        return self.capture.last(ms)
 
     def stop_speaking(self):
-        self.speaking_flag = False  # Clear speaking flag
-        if self.speaking_stream:
-            self.speaking_stream.stop_stream()
-            self.speaking_stream.close()
-            self.speaking_stream = None
+        """Interrupt the current utterance and drop any queued ones"""
+        while True:
+            try:
+                pending = self._utterances.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not None:
+                pending.cancel()
+                pending.finish()
+        current = self._current
+        if current:
+            current.cancel()
+        if not self._current:
+            self.speaking_flag = False
 
     def is_speaking(self):
         # Use the speaking flag for more reliable state tracking
         return self.speaking_flag
 
-    def _speak_thread(self, text, lang):
-        tts_file = None
-        try:
-            self.speaking_flag = True  # Set speaking flag
-            tts_file = self.tts.synthesize(text, lang)
-            if not tts_file or not os.path.exists(tts_file):
+    def begin_speech(self, lang='en', on_done=None):
+        """Queue an utterance whose text is supplied later with add(); call close() when done"""
+        utterance = Utterance(lang, on_done)
+        self.speaking_flag = True
+        self._utterances.put(utterance)
+        return utterance
+
+    def speak(self, text, lang='en', on_done=None):
+        """Speak text in the background; on_done is called once playback ends or is stopped"""
+        self.stop_speaking() # Stop any previous speech
+        utterance = self.begin_speech(lang, on_done)
+        utterance.add(text)
+        utterance.close()
+        return utterance
+
+    def _playback_loop(self):
+        while True:
+            utterance = self._utterances.get()
+            if utterance is None:
                 return
+            self._current = utterance
+            self.speaking_flag = True
+            try:
+                self._play_utterance(utterance)
+            except Exception as e:
+                print(f"[Audio] Speech error: {e}")
+            finally:
+                self._current = None
+                if self._utterances.empty():
+                    self.speaking_flag = False  # Clear speaking flag
+                utterance.finish()
 
-            with wave.open(tts_file, 'rb') as wf:
-                self.speaking_stream = self.audio.open(
-                    format=self.audio.get_format_from_width(wf.getsampwidth()),
-                    channels=wf.getnchannels(),
-                    rate=wf.getframerate(),
-                    output=True
-                )
-
-                data = wf.readframes(self.chunk)
-                while data and self.speaking_stream:
-                    try:
-                        self.speaking_stream.write(data)
-                        data = wf.readframes(self.chunk)
-                    except OSError:
-                        # This can happen if the stream is closed by another thread.
-                        # It's safe to just break the loop.
-                        break
+    def _start_piece(self, utterance, block):
+        """Begin synthesizing the utterance's next piece; None if there is none (yet)"""
+        text = utterance.next_piece(block)
+        if text is None or utterance.cancelled:
+            return None
+        buffer = self.tts.stream(text, utterance.lang)
+        utterance.buffers.append(buffer)
+        return buffer
 
+    def _play_utterance(self, utterance):
+        buffer = self._start_piece(utterance, block=True)
+        try:
+            while buffer is not None and not utterance.cancelled:
+                if self.speaking_stream is None:
+                    self.speaking_stream = self.audio.open(
+                        format=self.audio.get_format_from_width(buffer.sample_width),
+                        channels=buffer.channels,
+                        rate=buffer.sample_rate,
+                        output=True
+                    )
+                chunk_bytes = self.chunk * buffer.sample_width * buffer.channels
+                upcoming = None
+                while not utterance.cancelled:
+                    # Synthesize piece N+1 while piece N is playing
+                    if upcoming is None and not utterance.ended:
+                        upcoming = self._start_piece(utterance, block=False)
+                    data = buffer.read(chunk_bytes)
+                    if not data:
+                        break
+                    self.speaking_stream.write(data)
+                if buffer.error:
+                    print(f"[Audio] {buffer.error}")
+                buffer.cancel()
+                utterance.buffers.remove(buffer)
+                if upcoming is None and not utterance.ended:
+                    upcoming = self._start_piece(utterance, block=True)
+                buffer = upcoming
         finally:
-            self.speaking_flag = False  # Clear speaking flag
+            for pending in list(utterance.buffers):
+                pending.cancel()
             if self.speaking_stream:
                 self.speaking_stream.stop_stream()
                 self.speaking_stream.close()
-            if tts_file and os.path.exists(tts_file):
-                try:
-                    os.remove(tts_file)
-                except OSError as e:
-                    print(f"Error removing TTS file: {e}")
-
-    def speak(self, text, lang='en'):
-        self.stop_speaking() # Stop any previous speech
-        thread = threading.Thread(target=self._speak_thread, args=(text, lang))
-        thread.daemon = True
-        thread.start()
+                self.speaking_stream = None
 
-    def __del__(self):
+    def close(self):
+        """Stop speaking and recording, end the playback worker and release PyAudio"""
+        if self._closed:
+            return
+        self._closed = True
         self.stop_speaking()
+        self._utterances.put(None)
+        if self._player is not threading.current_thread():
+            self._player.join(timeout=2)
+        self.stop_recording()
         self.audio.terminate()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class Utterance:
+    """Text queued for speaking, split into pieces that are synthesized one ahead of playback"""
+
+    def __init__(self, lang='en', on_done=None):
+        self.lang = lang
+        self.on_done = on_done
+        self.cancelled = False
+        self.ended = False
+        self.buffers = []
+        self._pieces = queue.Queue()
+        self._finished = False
+
+    def add(self, text):
+        for piece in split_for_speech(text):
+            self._pieces.put(piece)
+
+    def close(self):
+        """No more text will be added"""
+        self._pieces.put(None)
+
+    def cancel(self):
+        self.cancelled = True
+        self._pieces.put(None)  # wake a playback loop waiting for text
+        for buffer in list(self.buffers):
+            buffer.cancel()
+
+    def next_piece(self, block=True):
+        if self.ended:
+            return None
+        try:
+            piece = self._pieces.get(block=block)
+        except queue.Empty:
+            return None
+        if piece is None:
+            self.ended = True
+        return piece
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self.on_done:
+            self.on_done()
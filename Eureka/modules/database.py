@@ -5,157 +5,371 @@ except ImportError:
     PYODBC_AVAILABLE = False
     print("[Database] Warning: pyodbc not installed. Database functionality will be limited.")
 
-import openai
 from utils.config import Config
-from typing import Optional, List, Dict, Any
+from modules.llm_client import get_client
+from modules.schema_catalog import AttendanceCatalog, SchemaCatalog
+from modules.db_pool import ConnectionPool
+from modules.query_cache import QueryCache
+from modules.sql_guard import SqlGuard, GuardedQuery, UnsafeQueryError, main_select_start
+from modules.result_summarizer import ResultSummarizer
+from modules.schema_index import SchemaIndex, build_schema_section, estimate_tokens
+from modules.prompt_templates import PromptLibrary, PromptTemplate
+import re
+import time
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
+SUMMARY_SYSTEM_PROMPT = "You are a concise database query summarizer. Always respond in 1-2 short sentences."
+ATTENDANCE_VALUES = ['present', 'leave', 'late', 'wfh', 'half leave', 'absent']
+ORDER_BY = re.compile(r'\bORDER\s+BY\b', re.IGNORECASE)
+
+def strip_order_by(sql: str) -> str:
+    """Remove a trailing top-level ORDER BY clause (one not nested inside parentheses)"""
+    for match in reversed(list(ORDER_BY.finditer(sql))):
+        prefix = sql[:match.start()]
+        if prefix.count('(') == prefix.count(')'):
+            return prefix.rstrip()
+    return sql
+
+def count_sql(query: str, columns: Tuple[str, ...]) -> Optional[str]:
+    """A statement counting the rows query returns, or None if it can't be wrapped safely.
+
+    The query goes into a derived table after any WITH clause; if its
+    columns are unnamed or repeated (expressions, joins) the derived table
+    gets column names of its own, which a bare SELECT * would not allow.
+    """
+    query = query.strip().rstrip(';')
+    start = main_select_start(query)
+    if start is None:
+        return None
+    # SQL Server rejects ORDER BY inside a derived table, and it does not change the count
+    query = strip_order_by(query)
+    alias = 'counted'
+    names = [column.lower() for column in columns]
+    if not all(names) or len(set(names)) != len(names):
+        alias += f"({', '.join(f'c{i}' for i in range(len(columns)))})"
+    return f"{query[:start]}SELECT COUNT(*) AS ROW_COUNT FROM ({query[start:]}) AS {alias}"
+
+
+class QueryError(Exception):
+    """A query failure with a message that can be spoken to the user"""
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class QueryResult:
+    """Rows as plain tuples sharing one column header.
+
+    row_count is the true number of rows the query produces, even when only
+    the first few were fetched (truncated). It is None if it could not be
+    determined, and only a lower bound when count_is_minimum is set (the
+    count ran against a row-capped query and hit the cap).
+    """
+    __slots__ = ('columns', 'rows', 'row_count', 'truncated', 'elapsed', 'count_is_minimum')
+
+    def __init__(self, columns: Tuple[str, ...], rows: List[tuple], row_count: Optional[int],
+                 truncated: bool, elapsed: float = 0.0, count_is_minimum: bool = False):
+        self.columns = columns
+        self.rows = rows
+        self.row_count = row_count
+        self.truncated = truncated
+        self.elapsed = elapsed
+        self.count_is_minimum = count_is_minimum
+
+    @property
+    def exact_count(self) -> Optional[int]:
+        """row_count when it is exact, otherwise None"""
+        return None if self.count_is_minimum else self.row_count
+
+    def total_text(self) -> str:
+        """How many rows there are, for a spoken summary"""
+        if self.row_count is None:
+            return f"more than {len(self.rows)}"
+        if self.count_is_minimum:
+            return f"at least {self.row_count}"
+        return str(self.row_count)
+
+    def as_dicts(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = self.rows if limit is None else self.rows[:limit]
+        return [dict(zip(self.columns, row)) for row in rows]
+
 
 class Database:
-    def __init__(self):
-        """Initialize connection to SQL Server database"""
-        if not PYODBC_AVAILABLE:
-            self.conn = None
+    def __init__(self, connect_fn=None, llm=None):
+        """Initialize a connection pool for the SQL Server database.
+
+        connect_fn overrides how connections are opened, e.g. sqlite3.connect
+        with check_same_thread=False for a local stand-in backend; llm
+        overrides the shared LLM client.
+        """
+        self.pool = None
+        if connect_fn is None and not PYODBC_AVAILABLE:
             print("[Database] pyodbc is not available. Please install it with: pip install pyodbc")
             return
             
-        self.connection_string = (
-            "Driver={ODBC Driver 17 for SQL Server};"
-            "Server=ITCS-AWAIS\\SQLEXPRESS;"
-            "Database=ITCS;"
-            "Trusted_Connection=yes;"
+        self.connection_string = Config.DB_CONNECTION_STRING
+        self.attendance_catalog = AttendanceCatalog()
+        self.schema_catalog = SchemaCatalog(self._load_all_columns, self.get_schema_version)
+        self.query_cache = QueryCache(
+            max_sql_entries=Config.QUERY_CACHE_SIZE,
+            summary_ttl=Config.SUMMARY_CACHE_TTL,
+            path=Config.QUERY_CACHE_PATH
         )
-        self.conn = None
-        self.client = openai.AzureOpenAI(
-            api_key=Config.OPENAI_API_KEY,
-            api_version="2024-02-15-preview",
-            azure_endpoint=Config.OPENAI_ENDPOINT
+        self.sql_guard = SqlGuard(max_rows=Config.SQL_MAX_ROWS, timeout=Config.SQL_QUERY_TIMEOUT or None)
+        self.llm = llm or get_client()
+        self.result_summarizer = ResultSummarizer()
+        self._schema_index = None
+        self._schema_index_fingerprint = None
+        self.prompts = PromptLibrary()
+        self.pool = ConnectionPool(
+            connect_fn or self._connect,
+            min_size=Config.DB_POOL_MIN_SIZE,
+            max_size=Config.DB_POOL_MAX_SIZE,
+            acquire_timeout=Config.DB_POOL_TIMEOUT,
+            health_check_interval=Config.DB_HEALTH_CHECK_INTERVAL
         )
-        self._connect()
 
     def _connect(self):
-        """Establish connection to the database"""
-        if not PYODBC_AVAILABLE:
-            self.conn = None
-            return
+        """Open a new connection to the database"""
         try:
-            self.conn = pyodbc.connect(self.connection_string)
-            self.conn.setdecoding(pyodbc.SQL_CHAR, encoding='utf-8')
-            self.conn.setdecoding(pyodbc.SQL_WCHAR, encoding='utf-8')
-            self.conn.setencoding(encoding='utf-8')
+            conn = pyodbc.connect(self.connection_string, autocommit=True)
+            conn.setdecoding(pyodbc.SQL_CHAR, encoding='utf-8')
+            conn.setdecoding(pyodbc.SQL_WCHAR, encoding='utf-8')
+            conn.setencoding(encoding='utf-8')
+            return conn
         except Exception as e:
             print(f"[Database] Connection error: {e}")
-            self.conn = None
+            raise
 
-    def _ensure_connection(self):
-        """Ensure database connection is active, reconnect if needed"""
-        if self.conn is None:
-            self._connect()
+    @staticmethod
+    @contextmanager
+    def _statement_timeout(conn, timeout: Optional[int]):
+        """Apply a per-statement query timeout on drivers that support it (pyodbc does)"""
+        if not timeout or not hasattr(conn, 'timeout'):
+            yield
+            return
+        previous = conn.timeout
+        conn.timeout = timeout
         try:
-            # Test connection
-            self.conn.execute("SELECT 1")
-        except Exception:
-            self._connect()
+            yield
+        finally:
+            conn.timeout = previous
 
-    def execute_query(self, query: str) -> Optional[List[Dict[str, Any]]]:
+    def execute_query(self, query: str, params: Optional[tuple] = None,
+                      timeout: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
         """Execute a SQL query and return results as a list of dictionaries"""
-        if not self.conn:
+        if not self.pool:
             raise Exception("Database connection not available")
-        
+
+        def run(conn):
+            cursor = conn.cursor()
+            try:
+                with self._statement_timeout(conn, timeout):
+                    if params:
+                        cursor.execute(query, params)
+                    else:
+                        cursor.execute(query)
+                
+                # Get column names
+                columns = [column[0] for column in cursor.description]
+                
+                # Fetch all rows and convert to dictionaries
+                rows = cursor.fetchall()
+                return [dict(zip(columns, row)) for row in rows]
+            finally:
+                cursor.close()
+
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            cursor.execute(query)
-            
-            # Get column names
-            columns = [column[0] for column in cursor.description]
-            
-            # Fetch all rows and convert to dictionaries
-            rows = cursor.fetchall()
-            results = []
-            for row in rows:
-                results.append(dict(zip(columns, row)))
-            
-            cursor.close()
-            return results
+            return self.pool.run(run)
         except Exception as e:
             print(f"[Database] Query error: {e}")
             # Re-raise the exception so callers can handle it
             raise
 
-    def get_table_names(self) -> List[str]:
-        """Get list of all table names in the database with schema prefixes"""
+    def stream_query(self, query: str, params: Optional[tuple] = None,
+                     batch_size: int = 256) -> Iterator[Tuple[Tuple[str, ...], List[tuple]]]:
+        """Yield (columns, rows) batches straight from the cursor with fetchmany.
+
+        The same columns tuple is shared by every batch. The pooled connection
+        is held until the generator is exhausted or closed.
+        """
+        if not self.pool:
+            raise Exception("Database connection not available")
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                columns = tuple(column[0] for column in cursor.description)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield columns, [tuple(row) for row in rows]
+            finally:
+                self._discard_cursor(cursor)
+
+    def fetch_bounded(self, query: str, max_rows: Optional[int] = None, params: Optional[tuple] = None,
+                      batch_size: int = 256, timeout: Optional[int] = None,
+                      count_query: Optional[str] = None, row_cap: Optional[int] = None) -> QueryResult:
+        """Fetch at most max_rows rows, then stop reading and count the rest server-side.
+
+        max_rows defaults to Config.SQL_MAX_ROWS, the same limit SqlGuard
+        caps generated SQL at. count_query is counted instead of query when
+        given, e.g. the SQL before SqlGuard added its TOP; a query capped at
+        row_cap rows that returns that many may have more. If only query
+        could be counted, a count equal to the cap is a lower bound.
+        """
+        if not self.pool:
+            raise Exception("Database connection not available")
+        if max_rows is None:
+            max_rows = self.sql_guard.max_rows
+
+        def run(conn):
+            cursor = conn.cursor()
+            try:
+                with self._statement_timeout(conn, timeout):
+                    if params:
+                        cursor.execute(query, params)
+                    else:
+                        cursor.execute(query)
+                columns = tuple(column[0] for column in cursor.description)
+                rows = []
+                # Read one row past the limit to learn whether there is more
+                while len(rows) <= max_rows:
+                    batch = cursor.fetchmany(min(batch_size, max_rows + 1 - len(rows)))
+                    if not batch:
+                        break
+                    rows.extend(tuple(row) for row in batch)
+                return columns, rows
+            finally:
+                self._discard_cursor(cursor)
+
+        start = time.perf_counter()
+        try:
+            columns, rows = self.pool.run(run)
+        except Exception as e:
+            print(f"[Database] Query error: {e}")
+            raise
+
+        hit_cap = row_cap is not None and len(rows) >= row_cap
+        if len(rows) <= max_rows and not hit_cap:
+            return QueryResult(columns, rows, len(rows), False, time.perf_counter() - start)
+        row_count = self._count_rows(count_query, columns, params, timeout) if count_query else None
+        at_least = False
+        if row_count is None:
+            row_count = self._count_rows(query, columns, params, timeout)
+            at_least = row_cap is not None and row_count == row_cap
+        rows = rows[:max_rows]
+        truncated = row_count is None or at_least or row_count > len(rows)
+        return QueryResult(columns, rows, row_count, truncated, time.perf_counter() - start, at_least)
+
+    def _count_rows(self, query: str, columns: Tuple[str, ...], params: Optional[tuple] = None,
+                    timeout: Optional[int] = None) -> Optional[int]:
+        """Count the rows a SELECT would return without transferring them"""
+        counting = count_sql(query, columns)
+        if counting is None:
+            print("[Database] Row count skipped for a compound or paged query")
+            return None
+        try:
+            results = self.execute_query(counting, params, timeout)
+            return results[0]['ROW_COUNT'] if results else None
+        except Exception as e:
+            print(f"[Database] Row count error: {e}")
+            return None
+
+    @staticmethod
+    def _discard_cursor(cursor):
+        """Close a cursor, cancelling any rows still pending on the server"""
+        cancel = getattr(cursor, 'cancel', None)
+        if cancel:
+            try:
+                cancel()
+            except Exception:
+                pass
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Checkout, wait-time and reconnect counters of the connection pool"""
+        return self.pool.stats() if self.pool else {}
+
+    def _load_all_columns(self) -> List[Dict[str, Any]]:
+        """Fetch the columns of every base table in one query (loader for the schema catalog)"""
         query = """
-            SELECT TABLE_SCHEMA + '.' + TABLE_NAME AS FULL_TABLE_NAME
-            FROM INFORMATION_SCHEMA.TABLES 
-            WHERE TABLE_TYPE = 'BASE TABLE'
-            ORDER BY TABLE_SCHEMA, TABLE_NAME
+            SELECT
+                c.TABLE_SCHEMA,
+                c.TABLE_NAME,
+                c.COLUMN_NAME,
+                c.DATA_TYPE,
+                c.IS_NULLABLE,
+                c.CHARACTER_MAXIMUM_LENGTH
+            FROM INFORMATION_SCHEMA.COLUMNS c
+            JOIN INFORMATION_SCHEMA.TABLES t
+                ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+            WHERE t.TABLE_TYPE = 'BASE TABLE'
+            ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
         """
-        results = self.execute_query(query)
-        if results:
-            return [row['FULL_TABLE_NAME'] for row in results]
-        return []
+        return self.execute_query(query) or []
+
+    def get_table_names(self) -> List[str]:
+        """Get list of all table names in the database with schema prefixes"""
+        return self.schema_catalog.table_names()
 
     def get_table_schema(self, table_name: str) -> Optional[List[Dict[str, Any]]]:
         """Get schema information for a specific table (can be schema.table or just table)"""
-        # Handle both schema.table and just table name
-        if '.' in table_name:
-            schema, table = table_name.split('.', 1)
-            query = """
-                SELECT 
-                    COLUMN_NAME,
-                    DATA_TYPE,
-                    IS_NULLABLE,
-                    CHARACTER_MAXIMUM_LENGTH
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
-                ORDER BY ORDINAL_POSITION
-            """
-            try:
-                self._ensure_connection()
-                cursor = self.conn.cursor()
-                cursor.execute(query, (schema, table))
-                columns = [column[0] for column in cursor.description]
-                rows = cursor.fetchall()
-                results = [dict(zip(columns, row)) for row in rows]
-                cursor.close()
-                return results
-            except Exception as e:
-                print(f"[Database] Schema error: {e}")
-                return None
-        else:
-            query = """
-                SELECT 
-                    COLUMN_NAME,
-                    DATA_TYPE,
-                    IS_NULLABLE,
-                    CHARACTER_MAXIMUM_LENGTH
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_NAME = ?
-                ORDER BY ORDINAL_POSITION
-            """
-            try:
-                self._ensure_connection()
-                cursor = self.conn.cursor()
-                cursor.execute(query, (table_name,))
-                columns = [column[0] for column in cursor.description]
-                rows = cursor.fetchall()
-                results = [dict(zip(columns, row)) for row in rows]
-                cursor.close()
-                return results
-            except Exception as e:
-                print(f"[Database] Schema error: {e}")
-                return None
+        try:
+            return self.schema_catalog.columns(table_name)
+        except Exception as e:
+            print(f"[Database] Schema error: {e}")
+            return None
 
     def get_tables_with_schemas(self, table_names: List[str], limit: int = 10) -> Dict[str, List[str]]:
         """Get column names for multiple tables"""
         tables_schemas = {}
         for table_name in table_names[:limit]:
-            schema_info = self.get_table_schema(table_name)
-            if schema_info:
-                columns = [col['COLUMN_NAME'] for col in schema_info]
+            columns = self.schema_catalog.column_names(table_name)
+            if columns:
                 tables_schemas[table_name] = columns
         return tables_schemas
 
-    def find_attendance_table(self) -> Optional[Dict[str, Any]]:
+    def get_schema_version(self) -> Optional[str]:
+        """Return a cheap fingerprint that changes whenever a table is created, dropped or altered"""
+        query = """
+            SELECT CAST(COUNT(*) AS varchar(10)) + '@' + CONVERT(varchar(33), MAX(modify_date), 126) AS SCHEMA_VERSION
+            FROM sys.tables
+        """
+        try:
+            results = self.execute_query(query)
+            if results:
+                return results[0]['SCHEMA_VERSION']
+        except Exception as e:
+            print(f"[Database] Schema version error: {e}")
+        return None
+
+    def find_attendance_table(self, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Return the attendance table, its name column and date columns.
+
+        The result of the table scan is kept in the attendance catalog and
+        reused until the schema version changes.
+        """
+        if not refresh:
+            cached = self.attendance_catalog.get(self.get_schema_version)
+            if cached is not None:
+                return cached['table']
+        schema_version = self.get_schema_version()
+        table_info = self._scan_for_attendance_table()
+        if schema_version is not None:
+            # Only persist results from a scan that could actually reach the database
+            self.attendance_catalog.put(schema_version, table_info)
+        return table_info
+
+    def _scan_for_attendance_table(self) -> Optional[Dict[str, Any]]:
         """Find the attendance table by looking for tables with attendance-related data"""
         try:
             tables = self.get_table_names()
@@ -173,10 +387,12 @@ class Database:
                             schema_info = self.get_table_schema(table)
                             if schema_info:
                                 columns = [col['COLUMN_NAME'] for col in schema_info]
+                                name_column, date_columns = self._classify_attendance_columns(columns, row)
                                 return {
                                     'table_name': table,
                                     'columns': columns,
-                                    'sample_row': row
+                                    'name_column': name_column,
+                                    'date_columns': date_columns
                                 }
                 except:
                     continue
@@ -184,135 +400,90 @@ class Database:
             print(f"[Database] Error finding attendance table: {e}")
         return None
 
-    def query_with_summary(self, query: str, max_rows: int = 100) -> str:
-        """Execute a query and generate a short summary using OpenAI"""
-        try:
-            results = self.execute_query(query)
-        except Exception as e:
-            error_msg = str(e)
-            if "Invalid object name" in error_msg:
-                # Extract table name from error for better user feedback
-                import re
-                match = re.search(r"Invalid object name '([^']+)'", error_msg)
-                if match:
-                    table_name = match.group(1)
-                    return f"Sorry, the table '{table_name}' was not found. Please check if the table name is correct and includes the schema prefix (e.g., Person.Person)."
-            return f"Sorry, I encountered an error executing the query: {error_msg}"
-        
-        if results is None:
-            return "Sorry, I couldn't connect to the database."
-        
-        if not results:
-            return "The query returned no results."
-        
-        # Limit results for summary generation
-        limited_results = results[:max_rows]
-        
-        # Convert results to a readable format
-        if len(limited_results) == 0:
-            return "No data found."
-        
-        # Create a summary string from the results
-        result_summary = f"Query returned {len(results)} row(s). "
-        
-        # If only one row, provide detailed summary
-        if len(limited_results) == 1:
-            row = limited_results[0]
-            summary_parts = [f"{key}: {value}" for key, value in row.items()]
-            result_summary += "Result: " + ", ".join(summary_parts) + "."
+    @staticmethod
+    def _classify_attendance_columns(columns: List[str], sample_row: Dict[str, Any]):
+        """Identify the name column and the date columns of an attendance table"""
+        name_column = None
+        date_columns = []
+        for col in columns:
+            col_lower = col.lower()
+            if any(name_word in col_lower for name_word in ['name', 'employee', 'staff', 'person']):
+                name_column = col
+            # Date columns are those that contain attendance values
+            if col in sample_row:
+                val = str(sample_row[col]).lower() if sample_row[col] else ''
+                if val in ATTENDANCE_VALUES:
+                    date_columns.append(col)
+        return name_column, date_columns
+
+    def _log_guard_cap(self, guarded: GuardedQuery, result: QueryResult):
+        """Log how many rows the row cap kept from being fetched"""
+        if not guarded.capped:
+            return
+        if not result.truncated:
+            print(f"[SqlGuard] {guarded.rewrite}: cap not reached")
+        elif result.exact_count is None:
+            print(f"[SqlGuard] {guarded.rewrite}: cap reached, total rows unknown")
         else:
-            # For multiple rows, use OpenAI to generate a concise summary
-            try:
-                # Prepare data for summarization
-                data_preview = str(limited_results[:10])  # First 10 rows for context
-                
-                prompt = f"""You are a database query assistant. Summarize the following query results in a very short, concise way (1-2 sentences max). 
-Focus on key insights, patterns, or important numbers.
+            print(f"[SqlGuard] {guarded.rewrite}: skipped {result.exact_count - len(result.rows)} rows")
 
-Query Results (showing first {min(10, len(limited_results))} of {len(results)} rows):
-{data_preview}
+    def _chat(self, purpose: str, system: str, prompt: str, max_tokens: int) -> str:
+        return self.llm.chat(purpose, system, prompt, max_tokens)
 
-Provide a brief summary:"""
-                
-                response = self.client.chat.completions.create(
-                    model=Config.OPENAI_DEPLOYMENT_NAME,
-                    messages=[
-                        {"role": "system", "content": "You are a concise database query summarizer. Always respond in 1-2 short sentences."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_completion_tokens=100
-                )
-                
-                ai_summary = response.choices[0].message.content.strip()
-                result_summary += ai_summary
-                
-                if len(results) > max_rows:
-                    result_summary += f" (Showing summary of first {max_rows} rows, {len(results)} total rows found.)"
-                    
-            except Exception as e:
-                print(f"[Database] Summary generation error: {e}")
-                # Fallback to simple summary
-                result_summary += f"Found {len(results)} record(s) with {len(limited_results[0])} columns each."
-        
-        return result_summary
+    @staticmethod
+    def _clean_sql(sql_query: str) -> str:
+        """Strip markdown code fences and trailing semicolons from model output"""
+        if sql_query.startswith("```"):
+            sql_query = sql_query.split("```")[1]
+            if sql_query.startswith("sql"):
+                sql_query = sql_query[3:]
+            sql_query = sql_query.strip()
+        return sql_query.rstrip(';').strip()
 
-    def auto_query(self, user_request: str) -> str:
-        """Automatically generate and execute a query based on user request, then return summary"""
-        if not PYODBC_AVAILABLE:
-            return "Sorry, database functionality is not available. Please install pyodbc: pip install pyodbc"
-        if not self.conn:
-            return "Sorry, I couldn't connect to the database. Please check your connection settings."
+    def _guard(self, sql: str) -> GuardedQuery:
+        """Run generated SQL through the guard before it may be executed"""
         try:
-            # First, try to find the attendance table automatically
-            attendance_info = self.find_attendance_table()
-            
-            if attendance_info:
-                # We found the attendance table - use it directly
-                table_name = attendance_info['table_name']
-                columns = attendance_info['columns']
-                sample_row = attendance_info['sample_row']
-                
-                # Identify name column and date columns
-                name_column = None
-                date_columns = []
-                
-                for col in columns:
-                    col_lower = col.lower()
-                    if any(name_word in col_lower for name_word in ['name', 'employee', 'staff', 'person']):
-                        name_column = col
-                    # Date columns are those that contain attendance values
-                    if col in sample_row:
-                        val = str(sample_row[col]).lower() if sample_row[col] else ''
-                        if val in ['present', 'leave', 'late', 'wfh', 'half leave', 'absent']:
-                            date_columns.append(col)
-                
-                # Build a specialized prompt for attendance queries
-                columns_str = ", ".join(columns)
-                date_cols_str = ", ".join(date_columns) if date_columns else "date columns"
-                
-                prompt = f"""You are generating SQL queries for an ATTENDANCE/LEAVE tracking database.
+            guarded = self.sql_guard.check(sql)
+        except UnsafeQueryError as e:
+            print(f"[SqlGuard] Rejected query: {e}")
+            raise QueryError("Sorry, I can only run read-only questions against the database.")
+        if guarded.rewrite:
+            print(f"[SqlGuard] {guarded.rewrite} ({guarded.analysis_ms:.2f} ms): {guarded.sql}")
+        return guarded
+
+    @staticmethod
+    def _attendance_template(attendance_info: Dict[str, Any]) -> PromptTemplate:
+        """Attendance SQL prompt; everything but the request depends only on the attendance table"""
+        table_name = attendance_info['table_name']
+        columns = attendance_info['columns']
+        name_column = attendance_info['name_column']
+        date_columns = attendance_info['date_columns']
+        
+        # Build a specialized prompt for attendance queries
+        columns_str = ", ".join(columns)
+        date_cols_str = ", ".join(date_columns) if date_columns else "date columns"
+        
+        prefix = f"""You are generating SQL queries for an ATTENDANCE/LEAVE tracking database.
 
 TABLE: {table_name}
 ALL COLUMNS: {columns_str}
 NAME COLUMN (for filtering by employee name): {name_column or 'first column that looks like a name'}
 DATE/ATTENDANCE COLUMNS (contain values: Present, Leave, Late, WFH, Half Leave, Absent, NULL): {date_cols_str}
 
-USER REQUEST: "{user_request}"
-
 ATTENDANCE QUERY MAPPING:
 - "How many leaves did [Name] get?" = Count how many times 'Leave' appears across ALL date columns for that person
   Use: SELECT SUM(CASE WHEN [col1] = 'Leave' THEN 1 ELSE 0 END + CASE WHEN [col2] = 'Leave' THEN 1 ELSE 0 END + ...) AS LeaveCount 
        FROM {table_name} WHERE {name_column} LIKE '%[Name]%'
-  
+
 - "How many days late did [Name]?" = Count how many times 'Late' appears across ALL date columns
   Use: SELECT SUM(CASE WHEN [col1] = 'Late' THEN 1 ELSE 0 END + CASE WHEN [col2] = 'Late' THEN 1 ELSE 0 END + ...) AS LateDays
        FROM {table_name} WHERE {name_column} LIKE '%[Name]%'
-  
+
 - "Who was late on [day/column]?" = SELECT {name_column} WHERE the specific date column = 'Late'
   If user says "on 27", check if there's a column with "27" in the name, or use column position/index
-  
+
 - "How many employees present on [day/column]?" = COUNT(*) WHERE the specific date column = 'Present'
-  
+
 - For counting across multiple columns, you MUST sum up CASE statements for EACH date column
 
 CRITICAL RULES:
@@ -323,90 +494,25 @@ CRITICAL RULES:
 5. For counting leaves/late across multiple date columns, use OR conditions or SUM with CASE
 6. Return ONLY the SQL query, no explanations
 
-SQL Query:"""
-                
-                response = self.client.chat.completions.create(
-                    model=Config.OPENAI_DEPLOYMENT_NAME,
-                    messages=[
-                        {"role": "system", "content": "You are a SQL query generator for attendance/leave tracking. Return only valid SQL queries using exact table and column names."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_completion_tokens=400
-                )
-                
-                sql_query = response.choices[0].message.content.strip()
-                
-                # Clean up
-                if sql_query.startswith("```"):
-                    sql_query = sql_query.split("```")[1]
-                    if sql_query.startswith("sql"):
-                        sql_query = sql_query[3:]
-                sql_query = sql_query.rstrip(';').strip()
-                
-                print(f"[Database] Generated SQL (attendance table): {sql_query}")
-                
-                try:
-                    summary = self.query_with_summary(sql_query)
-                    return summary
-                except Exception as query_error:
-                    error_str = str(query_error)
-                    print(f"[Database] Query error: {error_str}")
-                    return f"Sorry, I encountered an error: {error_str}. Please try rephrasing your question."
-            
-            # Fallback to original method if no attendance table found
-            tables = self.get_table_names()
-            if not tables:
-                return "No tables found in the database."
-            
-            # Find attendance/employee related tables (might be in any schema)
-            attendance_tables = []
-            for table in tables:
-                table_lower = table.lower()
-                if any(keyword in table_lower for keyword in ['attendance', 'employee', 'staff', 'leave', 'present', 'late']):
-                    attendance_tables.append(table)
-            
-            # If no specific attendance tables found, get all tables
-            if not attendance_tables:
-                common_tables = [t for t in tables if any(schema in t for schema in ['Sales', 'Production', 'HumanResources', 'Person', 'Purchasing'])]
-                if len(common_tables) > 15:
-                    tables_to_show = common_tables[:15]
-                else:
-                    tables_to_show = tables[:20] if len(tables) > 20 else tables
-            else:
-                tables_to_show = attendance_tables[:10] + [t for t in tables if t not in attendance_tables][:10]
-            
-            # Get actual column information for ALL relevant tables (not limited)
-            tables_schemas = self.get_tables_with_schemas(tables_to_show, limit=len(tables_to_show))
-            
-            # Build schema information string - include ALL columns for attendance-related tables
-            schema_info_parts = []
-            for table_name, columns in tables_schemas.items():
-                # For attendance tables, show ALL columns; for others, limit to 20
-                is_attendance = any(keyword in table_name.lower() for keyword in ['attendance', 'employee', 'staff', 'leave'])
-                if is_attendance:
-                    columns_str = ", ".join(columns)  # ALL columns for attendance tables
-                else:
-                    columns_str = ", ".join(columns[:20])
-                    if len(columns) > 20:
-                        columns_str += f" (and {len(columns) - 20} more columns)"
-                schema_info_parts.append(f"{table_name}: columns are [{columns_str}]")
-            
-            schema_info = "\n".join(schema_info_parts)
-            tables_list = ", ".join(tables_to_show)
-            
-            # Log the generated query for debugging
-            print(f"[Database] User request: {user_request}")
-            print(f"[Database] Found {len(tables_schemas)} tables with schemas")
-            
-            # Build a more intelligent prompt that helps map user intent to tables
-            prompt = f"""You are an expert SQL Server query generator. Your task is to understand the user's request and generate an accurate SQL query using ONLY the actual table and column names provided below.
-
-AVAILABLE TABLES: {tables_list}
+"""
+        return PromptTemplate(
+            "You are a SQL query generator for attendance/leave tracking. Return only valid SQL queries using exact table and column names.",
+            prefix,
+            'USER REQUEST: "{request}"\n\nSQL Query:'
+        )
 
-TABLE SCHEMAS (ACTUAL COLUMN NAMES - YOU MUST USE ONLY THESE EXACT NAMES):
-{schema_info}
+    def get_schema_index(self) -> SchemaIndex:
+        """Lexical index over the catalog's table and column names, rebuilt when the schema changes"""
+        fingerprint = self.schema_catalog.current_fingerprint()
+        if self._schema_index is None or fingerprint != self._schema_index_fingerprint:
+            self._schema_index = SchemaIndex(self.schema_catalog.schemas)
+            self._schema_index_fingerprint = fingerprint
+        return self._schema_index
 
-USER REQUEST: "{user_request}"
+    @staticmethod
+    def _fallback_template() -> PromptTemplate:
+        """General SQL prompt; the instructions are fixed, the schema section and request vary"""
+        prefix = """You are an expert SQL Server query generator. Your task is to understand the user's request and generate an accurate SQL query using ONLY the actual table and column names provided below.
 
 CRITICAL INSTRUCTIONS FOR ATTENDANCE/LEAVE QUERIES:
 - "How many leaves did [Name] get?" = COUNT rows WHERE name column contains [Name] AND any date column = 'Leave'
@@ -421,7 +527,7 @@ CRITICAL INSTRUCTIONS FOR ATTENDANCE/LEAVE QUERIES:
 
 GENERAL QUERY GENERATION RULES:
 1. ALWAYS use schema-qualified table names if schema exists (e.g., Schema.TableName)
-2. USE ONLY the exact column names listed above - NEVER invent, guess, or abbreviate column names
+2. USE ONLY the exact column names listed below - NEVER invent, guess, or abbreviate column names
 3. For counting: Use COUNT(*) or COUNT(column) with appropriate WHERE clauses
 4. For filtering by name: Use WHERE column_name LIKE '%Name%' or = 'Name' depending on exact match needed
 5. For counting values across columns: You may need to count each column separately and sum, or use CASE statements
@@ -429,81 +535,135 @@ GENERAL QUERY GENERATION RULES:
 7. Only SELECT queries (no INSERT, UPDATE, DELETE)
 8. Return ONLY the SQL query, no explanations, no markdown, no code blocks, no backticks
 
-SQL Query:"""
-            
-            response = self.client.chat.completions.create(
-                model=Config.OPENAI_DEPLOYMENT_NAME,
-                messages=[
-                    {"role": "system", "content": "You are a SQL query generator. Return only valid SQL queries."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_completion_tokens=300
-            )
-            
-            sql_query = response.choices[0].message.content.strip()
-            
-            # Clean up the query (remove markdown code blocks if present)
-            if sql_query.startswith("```"):
-                sql_query = sql_query.split("```")[1]
-                if sql_query.startswith("sql"):
-                    sql_query = sql_query[3:]
-                sql_query = sql_query.strip()
-            
-            # Remove trailing semicolons and clean up
-            sql_query = sql_query.rstrip(';').strip()
-            
-            # Log the generated query for debugging
+"""
+        return PromptTemplate(
+            "You are a SQL query generator. Return only valid SQL queries.",
+            prefix,
+            'AVAILABLE TABLES: {tables}\n\n'
+            'TABLE SCHEMAS (ACTUAL COLUMN NAMES - YOU MUST USE ONLY THESE EXACT NAMES):\n{schema_info}\n\n'
+            'USER REQUEST: "{request}"\n\nSQL Query:'
+        )
+
+    def _attendance_prompt(self, attendance_info: Dict[str, Any], user_request: str,
+                           fingerprint: Optional[str] = None) -> Tuple[str, str]:
+        """(system, prompt) for an attendance question, compiled once per schema version"""
+        version = (fingerprint, attendance_info['table_name'])
+        return self.prompts.render('attendance', version, lambda: self._attendance_template(attendance_info),
+                                   request=user_request)
+
+    def _fallback_prompt(self, user_request: str) -> Tuple[str, str]:
+        index = self.get_schema_index()
+        if not index.tables:
+            raise QueryError("No tables found in the database.")
+        
+        # Only the tables most relevant to the request, within a token budget
+        schema_info, tables_to_show = build_schema_section(index, user_request, Config.SCHEMA_PROMPT_TOKENS)
+        tables_list = ", ".join(tables_to_show)
+        
+        # Log the generated query for debugging
+        print(f"[Database] User request: {user_request}")
+        print(f"[Database] Selected {len(tables_to_show)} of {len(index.tables)} tables "
+              f"(~{estimate_tokens(schema_info)} schema tokens): {tables_list}")
+        
+        return self.prompts.render('fallback', None, self._fallback_template,
+                                   tables=tables_list, schema_info=schema_info, request=user_request)
+
+    def generate_sql(self, user_request: str) -> GuardedQuery:
+        """Turn a user request into guarded SQL, reusing earlier SQL for the same request"""
+        # Reuse SQL generated earlier for the same request under the same schema
+        fingerprint = self.schema_catalog.current_fingerprint()
+        cached_sql = self.query_cache.get_sql(user_request, fingerprint)
+        if cached_sql:
+            print(f"[Database] SQL cache hit: {cached_sql}")
+            return self._guard(cached_sql)
+
+        # First, try to find the attendance table automatically
+        attendance_info = self.find_attendance_table()
+        if attendance_info:
+            system, prompt = self._attendance_prompt(attendance_info, user_request, fingerprint)
+            sql_query = self._clean_sql(self._chat('sql_generation', system, prompt, 400))
+            print(f"[Database] Generated SQL (attendance table): {sql_query}")
+        else:
+            system, prompt = self._fallback_prompt(user_request)
+            sql_query = self._clean_sql(self._chat('sql_generation', system, prompt, 300))
             print(f"[Database] Generated SQL: {sql_query}")
-            
-            # Try to fix common schema issues - if query fails, try adding schema prefixes
-            try:
-                # Execute the query and get summary
-                summary = self.query_with_summary(sql_query)
-                return summary
-            except Exception as query_error:
-                error_str = str(query_error)
-                import re
-                
-                # If it's a column name error, try to fix it
-                if "Invalid column name" in error_str:
-                    match = re.search(r"Invalid column name '([^']+)'", error_str)
-                    if match:
-                        invalid_column = match.group(1)
-                        # Try to find the correct column by querying the table schema
-                        # Extract table name from the query
-                        table_match = re.search(r'FROM\s+([\w\.]+)', sql_query, re.IGNORECASE)
-                        if table_match:
-                            table_name = table_match.group(1)
-                            # Get actual columns for this table
-                            schema_info = self.get_table_schema(table_name)
-                            if schema_info:
-                                actual_columns = [col['COLUMN_NAME'] for col in schema_info]
-                                # Try to find a similar column name
-                                similar_col = None
-                                invalid_lower = invalid_column.lower()
-                                for col in actual_columns:
-                                    if invalid_lower in col.lower() or col.lower() in invalid_lower:
-                                        similar_col = col
-                                        break
-                                
-                                if similar_col:
-                                    # Replace the invalid column with the correct one
-                                    sql_query = re.sub(
-                                        r'\b' + re.escape(invalid_column) + r'\b',
-                                        similar_col,
-                                        sql_query,
-                                        flags=re.IGNORECASE
-                                    )
-                                    print(f"[Database] Fixed column name: {invalid_column} -> {similar_col}")
-                                    try:
-                                        summary = self.query_with_summary(sql_query)
-                                        return summary
-                                    except Exception as retry_error:
-                                        print(f"[Database] Retry query error: {retry_error}")
-                                
-                                # If no similar column, try regenerating the query with correct schema
-                                columns_str = ", ".join(actual_columns[:20])
-                                retry_prompt = f"""The previous query failed because column '{invalid_column}' doesn't exist in {table_name}.
+        return self._guard(sql_query)
+
+    def cached_summary(self, guarded: GuardedQuery) -> Optional[str]:
+        """Spoken summary of a recent identical query, if there is one"""
+        return self.query_cache.get_summary(guarded.sql)
+
+    def run_sql(self, guarded: GuardedQuery, user_request: str,
+                max_rows: Optional[int] = None) -> Tuple[GuardedQuery, QueryResult]:
+        """Execute guarded SQL, repairing invalid column or table names once.
+
+        Returns the SQL that finally ran with its result, or raises QueryError
+        with a message that can be spoken to the user.
+        """
+        try:
+            result = self._fetch_guarded(guarded, max_rows)
+        except Exception as query_error:
+            guarded, result = self._repair_and_retry(guarded, user_request, str(query_error), max_rows)
+        self._log_guard_cap(guarded, result)
+        # Cache the SQL before the guard's TOP so a cache hit is capped and counted the same way
+        self.query_cache.put_sql(user_request, guarded.original)
+        return guarded, result
+
+    def _fetch_guarded(self, guarded: GuardedQuery, max_rows: Optional[int]) -> QueryResult:
+        """fetch_bounded() for guarded SQL, counting rows against the query before its TOP cap"""
+        if not guarded.capped:
+            return self.fetch_bounded(guarded.sql, max_rows, timeout=self.sql_guard.timeout)
+        return self.fetch_bounded(guarded.sql, max_rows, timeout=self.sql_guard.timeout,
+                                  count_query=guarded.original, row_cap=self.sql_guard.max_rows)
+
+    def _repair_and_retry(self, guarded: GuardedQuery, user_request: str, error_str: str,
+                          max_rows: Optional[int]) -> Tuple[GuardedQuery, QueryResult]:
+        sql_query = guarded.sql
+
+        def retry(sql):
+            retried = self._guard(sql)
+            return retried, self._fetch_guarded(retried, max_rows)
+
+        # If it's a column name error, try to fix it
+        if "Invalid column name" in error_str:
+            match = re.search(r"Invalid column name '([^']+)'", error_str)
+            if match:
+                invalid_column = match.group(1)
+                # Try to find the correct column by querying the table schema
+                # Extract table name from the query
+                table_match = re.search(r'FROM\s+([\w\.]+)', sql_query, re.IGNORECASE)
+                if table_match:
+                    table_name = table_match.group(1)
+                    # Get actual columns for this table
+                    actual_columns = self.schema_catalog.column_names(table_name)
+                    if actual_columns:
+                        # Try to find a similar column name
+                        similar_col = None
+                        invalid_lower = invalid_column.lower()
+                        for col in actual_columns:
+                            if invalid_lower in col.lower() or col.lower() in invalid_lower:
+                                similar_col = col
+                                break
+                        
+                        if similar_col:
+                            # Replace the invalid column with the correct one
+                            fixed_sql = re.sub(
+                                r'\b' + re.escape(invalid_column) + r'\b',
+                                similar_col,
+                                sql_query,
+                                flags=re.IGNORECASE
+                            )
+                            print(f"[Database] Fixed column name: {invalid_column} -> {similar_col}")
+                            try:
+                                return retry(fixed_sql)
+                            except QueryError:
+                                raise
+                            except Exception as retry_error:
+                                print(f"[Database] Retry query error: {retry_error}")
+                        
+                        # If no similar column, try regenerating the query with correct schema
+                        columns_str = ", ".join(actual_columns[:20])
+                        retry_prompt = f"""The previous query failed because column '{invalid_column}' doesn't exist in {table_name}.
 
 Actual columns in {table_name}: {columns_str}
 
@@ -512,77 +672,198 @@ User request: {user_request}
 Generate a NEW SQL query using ONLY the columns listed above. Use schema-qualified table name {table_name}. Return ONLY the SQL query.
 
 SQL Query:"""
-                                
-                                try:
-                                    retry_response = self.client.chat.completions.create(
-                                        model=Config.OPENAI_DEPLOYMENT_NAME,
-                                        messages=[
-                                            {"role": "system", "content": "You are a SQL query generator. Return only valid SQL queries using the exact column names provided."},
-                                            {"role": "user", "content": retry_prompt}
-                                        ],
-                                        max_completion_tokens=300
-                                    )
-                                    new_sql = retry_response.choices[0].message.content.strip()
-                                    # Clean up
-                                    if new_sql.startswith("```"):
-                                        new_sql = new_sql.split("```")[1]
-                                        if new_sql.startswith("sql"):
-                                            new_sql = new_sql[3:]
-                                    new_sql = new_sql.rstrip(';').strip()
-                                    
-                                    summary = self.query_with_summary(new_sql)
-                                    return summary
-                                except Exception as retry_gen_error:
-                                    print(f"[Database] Retry generation error: {retry_gen_error}")
-                                
-                                # Final fallback
-                                return f"Sorry, the column '{invalid_column}' doesn't exist in {table_name}. Available columns: {', '.join(actual_columns[:15])}{'...' if len(actual_columns) > 15 else ''}"
-                    
-                    return f"Sorry, I encountered a column name error. Please try rephrasing your question more specifically."
-                
-                # If it's a table name error, try to fix it
-                elif "Invalid object name" in error_str:
-                    match = re.search(r"Invalid object name '([^']+)'", error_str)
-                    if match:
-                        table_name = match.group(1)
-                        # Try to find the correct schema-qualified name
-                        for full_table_name in tables:
-                            if full_table_name.split('.')[-1].lower() == table_name.lower():
-                                # Replace unqualified name with qualified name
-                                sql_query = re.sub(
-                                    r'\b' + re.escape(table_name) + r'\b',
-                                    full_table_name,
-                                    sql_query,
-                                    flags=re.IGNORECASE
-                                )
-                                print(f"[Database] Fixed table name: {table_name} -> {full_table_name}")
-                                # Retry the query
-                                try:
-                                    summary = self.query_with_summary(sql_query)
-                                    return summary
-                                except Exception as retry_error:
-                                    print(f"[Database] Retry query error: {retry_error}")
-                                    return f"Sorry, I couldn't execute the query. The table '{table_name}' might not exist or the query syntax is incorrect."
-                    return f"Sorry, I couldn't find the table in the database. Please try rephrasing your question."
-                else:
-                    # For other errors, try to regenerate with better context
-                    print(f"[Database] Query error: {error_str}")
-                    return f"Sorry, I encountered an error: {error_str}. Please try rephrasing your question more specifically."
+                        
+                        try:
+                            new_sql = self._clean_sql(self._chat(
+                                'sql_repair',
+                                "You are a SQL query generator. Return only valid SQL queries using the exact column names provided.",
+                                retry_prompt, 300
+                            ))
+                            return retry(new_sql)
+                        except QueryError:
+                            raise
+                        except Exception as retry_gen_error:
+                            print(f"[Database] Retry generation error: {retry_gen_error}")
+                        
+                        # Final fallback
+                        raise QueryError(f"Sorry, the column '{invalid_column}' doesn't exist in {table_name}. Available columns: {', '.join(actual_columns[:15])}{'...' if len(actual_columns) > 15 else ''}")
+            
+            raise QueryError("Sorry, I encountered a column name error. Please try rephrasing your question more specifically.")
+        
+        # If it's a table name error, try to fix it
+        elif "Invalid object name" in error_str:
+            match = re.search(r"Invalid object name '([^']+)'", error_str)
+            if match:
+                table_name = match.group(1)
+                # Try to find the correct schema-qualified name
+                for full_table_name in self.schema_catalog.resolve(table_name):
+                    if full_table_name.lower() != table_name.lower():
+                        # Replace unqualified name with qualified name
+                        fixed_sql = re.sub(
+                            r'\b' + re.escape(table_name) + r'\b',
+                            full_table_name,
+                            sql_query,
+                            flags=re.IGNORECASE
+                        )
+                        print(f"[Database] Fixed table name: {table_name} -> {full_table_name}")
+                        # Retry the query
+                        try:
+                            return retry(fixed_sql)
+                        except QueryError:
+                            raise
+                        except Exception as retry_error:
+                            print(f"[Database] Retry query error: {retry_error}")
+                            raise QueryError(f"Sorry, I couldn't execute the query. The table '{table_name}' might not exist or the query syntax is incorrect.")
+            raise QueryError("Sorry, I couldn't find the table in the database. Please try rephrasing your question.")
+        else:
+            print(f"[Database] Query error: {error_str}")
+            raise QueryError(f"Sorry, I encountered an error: {error_str}. Please try rephrasing your question more specifically.")
+
+    @staticmethod
+    def _summary_prompt(limited_results: List[Dict[str, Any]], total: str) -> str:
+        return f"""You are a database query assistant. Summarize the following query results in a very short, concise way (1-2 sentences max). 
+Focus on key insights, patterns, or important numbers.
+
+Query Results (showing first {len(limited_results)} of {total} rows):
+{limited_results}
+
+Provide a brief summary:"""
+
+    def _local_summary(self, query: str, result: QueryResult, total: str) -> Optional[str]:
+        """Template summary for result shapes that don't need the LLM"""
+        body = self.result_summarizer.summarize(result.columns, result.rows, result.exact_count)
+        if body is None:
+            return None
+        summary = f"Query returned {total} row(s). {body}"
+        if result.truncated:
+            summary += f" (Showing summary of first {len(result.rows)} rows, {total} total rows found.)"
+        self.query_cache.put_summary(query, summary)
+        return summary
+
+    def summarize(self, query: str, result: QueryResult) -> str:
+        """Turn a query result into a short spoken summary (uses OpenAI for shapes without a template)"""
+        if not result.rows:
+            return "The query returned no results."
+        
+        total = result.total_text()
+        local = self._local_summary(query, result, total)
+        if local is not None:
+            return local
+
+        # Create a summary string from the results
+        result_summary = f"Query returned {total} row(s). "
+        
+        # For other results, use OpenAI to generate a concise summary
+        try:
+            ai_summary = self._chat(
+                'summarization',
+                SUMMARY_SYSTEM_PROMPT,
+                self._summary_prompt(result.as_dicts(10), total), 100
+            )
+            result_summary += ai_summary
             
+            if result.truncated:
+                result_summary += f" (Showing summary of first {len(result.rows)} rows, {total} total rows found.)"
+                
+        except Exception as e:
+            print(f"[Database] Summary generation error: {e}")
+            # Fallback to simple summary
+            result_summary += f"Found {total} record(s) with {len(result.columns)} columns each."
+            return result_summary
+        
+        self.query_cache.put_summary(query, result_summary)
+        return result_summary
+
+    def summarize_stream(self, query: str, result: QueryResult) -> Iterator[str]:
+        """Like summarize(), but yields the summary in pieces while the LLM is still writing it"""
+        if not result.rows:
+            yield "The query returned no results."
+            return
+
+        total = result.total_text()
+        local = self._local_summary(query, result, total)
+        if local is not None:
+            yield local
+            return
+
+        parts = [f"Query returned {total} row(s). "]
+        yield parts[0]
+        try:
+            for delta in self.llm.stream_chat('summarization', SUMMARY_SYSTEM_PROMPT,
+                                              self._summary_prompt(result.as_dicts(10), total), 100):
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            print(f"[Database] Summary generation error: {e}")
+            if len(parts) == 1:
+                yield f"Found {total} record(s) with {len(result.columns)} columns each."
+            return  # a fallback or partial summary is not cached
+        if result.truncated:
+            parts.append(f" (Showing summary of first {len(result.rows)} rows, {total} total rows found.)")
+            yield parts[-1]
+        self.query_cache.put_summary(query, ''.join(parts))
+
+    def query_with_summary(self, query: str, max_rows: Optional[int] = None) -> str:
+        """Execute a query and generate a short summary using OpenAI.
+
+        Summaries are cached per SQL for a short time.
+        """
+        cached_summary = self.query_cache.get_summary(query)
+        if cached_summary is not None:
+            print("[Database] Summary cache hit")
+            return cached_summary
+
+        try:
+            result = self.fetch_bounded(query, max_rows, timeout=self.sql_guard.timeout)
+        except Exception as e:
+            error_msg = str(e)
+            if "Invalid object name" in error_msg:
+                # Extract table name from error for better user feedback
+                match = re.search(r"Invalid object name '([^']+)'", error_msg)
+                if match:
+                    table_name = match.group(1)
+                    return f"Sorry, the table '{table_name}' was not found. Please check if the table name is correct and includes the schema prefix (e.g., Person.Person)."
+            return f"Sorry, I encountered an error executing the query: {error_msg}"
+        
+        return self.summarize(query, result)
+
+    def auto_query(self, user_request: str) -> str:
+        """Automatically generate and execute a query based on user request, then return summary"""
+        if not self.pool:
+            return "Sorry, database functionality is not available. Please install pyodbc: pip install pyodbc"
+        try:
+            guarded = self.generate_sql(user_request)
+            cached = self.cached_summary(guarded)
+            if cached is not None:
+                print("[Database] Summary cache hit")
+                return cached
+            guarded, result = self.run_sql(guarded, user_request)
+            return self.summarize(guarded.sql, result)
+        except QueryError as e:
+            return e.message
         except Exception as e:
             print(f"[Database] Auto query error: {e}")
             return f"Sorry, I encountered an error while querying the database: {str(e)}"
 
+    def prompt_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Compile and render counts, build times and prompt sizes per SQL prompt template"""
+        return self.prompts.stats()
+
+    def summary_stats(self) -> Dict[str, Any]:
+        """How many summaries were produced locally per result shape, and how many needed the LLM"""
+        return self.result_summarizer.stats()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the SQL and summary caches"""
+        return self.query_cache.stats() if self.pool else {}
+
     def close(self):
-        """Close the database connection"""
-        if self.conn:
-            try:
-                self.conn.close()
-            except Exception:
-                pass
-            self.conn = None
+        """Close all pooled database connections"""
+        if self.pool:
+            self.query_cache.close()
+            self.pool.close()
+            self.pool = None
 
     def __del__(self):
         """Cleanup on deletion"""
         self.close()
-
@@ -0,0 +1,235 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the acquire timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections.
+
+    Connections are not pinged before use. When an operation fails, the
+    connection is checked with ping_query; if it is dead it is replaced and the
+    operation retried once, otherwise the original error is raised. An optional
+    background thread pings connections that have sat idle for longer than
+    health_check_interval. connect_fn can be anything that returns a DB-API
+    connection, e.g. pyodbc.connect or sqlite3.connect. Connections move
+    between the threads that check them out and the health check thread, so
+    they must not be bound to the thread that opened them: use
+    sqlite3.connect(..., check_same_thread=False), or pass
+    health_check_interval=None and call check_idle() yourself.
+    """
+
+    def __init__(self, connect_fn: Callable[[], Any], min_size: int = 1, max_size: int = 4,
+                 acquire_timeout: float = 10, health_check_interval: Optional[float] = 60,
+                 ping_query: str = "SELECT 1"):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.connect_fn = connect_fn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.ping_query = ping_query
+
+        self._idle: List[Tuple[Any, float]] = []  # (connection, time it was returned)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'connects': 0,
+            'connect_errors': 0,
+            'reconnects': 0,
+            'retries': 0,
+            'health_checks': 0,
+            'discarded': 0,
+        }
+
+        for _ in range(min_size):
+            with self._cond:
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception as e:
+                print(f"[Pool] Could not open initial connection: {e}")
+                break
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+
+        self._checker = None
+        if health_check_interval:
+            self._checker = threading.Thread(target=self._health_check_loop, daemon=True)
+            self._checker.start()
+
+    def _open(self):
+        """Connect into a slot the caller already reserved; the slot is given back on failure"""
+        try:
+            conn = self.connect_fn()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._stats['connect_errors'] += 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['connects'] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _ping(self, conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.ping_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Check out a connection, opening a new one if the pool has room"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot now so concurrent callers can't overshoot max_size
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No database connection available after {timeout:.1f}s")
+                waited = True
+                self._cond.wait(remaining)
+            wait_time = time.monotonic() - start
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_time_total'] += wait_time
+                self._stats['wait_time_max'] = max(self._stats['wait_time_max'], wait_time)
+        if conn is None:
+            conn = self._open()
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool, or close it if discard is set"""
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                self._stats['discarded'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+        if conn is not None:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except Exception:
+            discard = not self._ping(conn)
+            raise
+        finally:
+            # Also runs on GeneratorExit, when a generator holding the connection is closed early
+            self.release(conn, discard=discard)
+
+    def run(self, operation: Callable[[Any], Any]):
+        """Call operation(connection), retrying once on a fresh connection if the first one was dead"""
+        conn = self.acquire()
+        try:
+            result = operation(conn)
+        except Exception:
+            if self._ping(conn):
+                self.release(conn)
+                raise
+            self.release(conn, discard=True)
+            with self._cond:
+                self._stats['reconnects'] += 1
+                self._stats['retries'] += 1
+            print("[Pool] Connection lost, retrying on a new connection")
+            conn = self.acquire()
+            try:
+                result = operation(conn)
+            except Exception:
+                self.release(conn, discard=not self._ping(conn))
+                raise
+        self.release(conn)
+        return result
+
+    def _health_check_loop(self):
+        while True:
+            time.sleep(self.health_check_interval)
+            if self._closed:
+                return
+            self.check_idle()
+
+    def check_idle(self):
+        """Ping connections idle longer than the health check interval and top the pool back up"""
+        now = time.monotonic()
+        interval = self.health_check_interval or 0
+        with self._cond:
+            stale = [item for item in self._idle if now - item[1] >= interval]
+            self._idle = [item for item in self._idle if now - item[1] < interval]
+        for conn, _ in stale:
+            with self._cond:
+                self._stats['health_checks'] += 1
+            if self._ping(conn):
+                self.release(conn)
+            else:
+                with self._cond:
+                    self._stats['reconnects'] += 1
+                self.release(conn, discard=True)
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    break
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception as e:
+                print(f"[Pool] Could not replenish pool: {e}")
+                break
+            self.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
@@ -0,0 +1,161 @@
+"""Offline stand-in for the parts of azure.cognitiveservices.speech that TTS uses.
+
+Pass it as AzureSynthesisBackend(sdk=fake_speechsdk) to test or benchmark the
+synthesizer pool without the Azure service. Latencies are module-level
+settings so a benchmark can tune them.
+"""
+import math
+import threading
+import time
+import uuid
+from array import array
+
+CONNECT_LATENCY = 0.15      # seconds to open a service connection
+FIRST_CHUNK_LATENCY = 0.05  # seconds from request to first audio chunk
+CHARS_PER_SECOND = 15       # speaking rate used to size the audio
+SPEED = 8.0                 # synthesis speed relative to real time
+CHUNK_MS = 50
+SAMPLE_RATE = 24000
+
+
+class ResultReason:
+    SynthesizingAudioStarted = 'SynthesizingAudioStarted'
+    SynthesizingAudio = 'SynthesizingAudio'
+    SynthesizingAudioCompleted = 'SynthesizingAudioCompleted'
+    Canceled = 'Canceled'
+
+
+class SpeechSynthesisOutputFormat:
+    Raw24Khz16BitMonoPcm = 'raw-24khz-16bit-mono-pcm'
+
+
+class SpeechConfig:
+    def __init__(self, subscription=None, region=None):
+        self.subscription = subscription
+        self.region = region
+        self.speech_synthesis_voice_name = None
+        self.output_format = None
+
+    def set_speech_synthesis_output_format(self, fmt):
+        self.output_format = fmt
+
+
+class EventSignal:
+    def __init__(self):
+        self._callbacks = []
+
+    def connect(self, callback):
+        self._callbacks.append(callback)
+
+    def fire(self, evt):
+        for callback in self._callbacks:
+            callback(evt)
+
+
+class SpeechSynthesisResult:
+    def __init__(self, reason, audio_data=b'', error_details=None, result_id=None):
+        self.result_id = result_id
+        self.reason = reason
+        self.audio_data = audio_data
+        self.error_details = error_details
+
+
+class SpeechSynthesisEventArgs:
+    def __init__(self, result):
+        self.result = result
+
+
+class CancellationDetails:
+    def __init__(self, error_details):
+        self.error_details = error_details
+
+    @classmethod
+    def from_result(cls, result):
+        return cls(result.error_details)
+
+
+class ResultFuture:
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+
+    def _set(self, result):
+        self._result = result
+        self._done.set()
+
+    def get(self):
+        self._done.wait()
+        return self._result
+
+
+class SpeechSynthesizer:
+    def __init__(self, speech_config=None, audio_config=None):
+        self.voice = speech_config.speech_synthesis_voice_name if speech_config else None
+        self.synthesis_started = EventSignal()
+        self.synthesizing = EventSignal()
+        self.synthesis_completed = EventSignal()
+        self.synthesis_canceled = EventSignal()
+        self.connected = False
+        self.requests = 0
+        self._stop = threading.Event()
+
+    def _connect(self):
+        if not self.connected:
+            time.sleep(CONNECT_LATENCY)
+            self.connected = True
+
+    def speak_text_async(self, text):
+        future = ResultFuture()
+        self._stop.clear()
+        self.requests += 1
+        result_id = uuid.uuid4().hex
+
+        def make_result(reason, audio_data=b'', error_details=None):
+            return SpeechSynthesisResult(reason, audio_data, error_details, result_id)
+
+        def run():
+            self._connect()
+            time.sleep(FIRST_CHUNK_LATENCY)
+            self.synthesis_started.fire(SpeechSynthesisEventArgs(make_result(ResultReason.SynthesizingAudioStarted)))
+            total = int(len(text) / CHARS_PER_SECOND * SAMPLE_RATE)
+            per_chunk = SAMPLE_RATE * CHUNK_MS // 1000
+            step = 2 * math.pi * 220 / SAMPLE_RATE
+            produced = 0
+            while produced < total:
+                if self._stop.is_set():
+                    result = make_result(ResultReason.Canceled, error_details="Stopped by client")
+                    self.synthesis_canceled.fire(SpeechSynthesisEventArgs(result))
+                    future._set(result)
+                    return
+                n = min(per_chunk, total - produced)
+                chunk = array('h', (int(2000 * math.sin(step * (produced + i))) for i in range(n))).tobytes()
+                self.synthesizing.fire(SpeechSynthesisEventArgs(make_result(ResultReason.SynthesizingAudio, chunk)))
+                produced += n
+                time.sleep(CHUNK_MS / 1000 / SPEED)
+            result = make_result(ResultReason.SynthesizingAudioCompleted)
+            self.synthesis_completed.fire(SpeechSynthesisEventArgs(result))
+            future._set(result)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def stop_speaking_async(self):
+        self._stop.set()
+        future = ResultFuture()
+        future._set(None)
+        return future
+
+
+class Connection:
+    def __init__(self, synthesizer):
+        self.synthesizer = synthesizer
+
+    @classmethod
+    def from_speech_synthesizer(cls, synthesizer):
+        return cls(synthesizer)
+
+    def open(self, for_continuous_recognition):
+        self.synthesizer._connect()
+
+    def close(self):
+        self.synthesizer.connected = False
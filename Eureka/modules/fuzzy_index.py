@@ -0,0 +1,91 @@
+import difflib
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyKeyIndex:
+    """Key -> value map with difflib-style closest-key lookup through a trigram index.
+
+    closest() returns the key difflib.get_close_matches(key, keys, n=1,
+    cutoff) would pick, with its value. Below exact_below keys it simply
+    runs difflib over all of them. Above that, candidates come from the
+    trigram inverted index (keys sharing the most trigrams with the query,
+    within the length range the cutoff allows) and only those are scored
+    with SequenceMatcher, so a match that shares no trigram with the query
+    can be missed; bench_fuzzy_recall measures how often that happens.
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, str]] = (), cutoff: float = 0.6,
+                 max_candidates: int = 64, exact_below: int = 500):
+        self.cutoff = cutoff
+        self.max_candidates = max_candidates
+        self.exact_below = exact_below
+        self._values: Dict[str, str] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        for key, value in items:
+            self.add(key, value)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def get(self, key: str) -> Optional[str]:
+        return self._values.get(key)
+
+    def add(self, key: str, value: str):
+        with self._lock:
+            if key not in self._values:
+                for gram in trigrams(key):
+                    self._postings.setdefault(gram, set()).add(key)
+            self._values[key] = value
+
+    def remove(self, key: str):
+        with self._lock:
+            if key not in self._values:
+                return
+            del self._values[key]
+            for gram in trigrams(key):
+                keys = self._postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[gram]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._postings.clear()
+
+    def _candidates(self, key: str):
+        """Keys sharing the most trigrams with key, restricted to lengths that can reach the cutoff"""
+        # ratio <= 2 * min(len) / (sum of lens), so lengths outside this range can never match
+        low = len(key) * self.cutoff / (2 - self.cutoff)
+        high = len(key) * (2 - self.cutoff) / self.cutoff
+        shared: Dict[str, int] = {}
+        for gram in trigrams(key):
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        in_range = [c for c in shared if low <= len(c) <= high]
+        if len(in_range) > self.max_candidates:
+            in_range.sort(key=lambda c: -shared[c])
+            in_range = in_range[:self.max_candidates]
+        return in_range
+
+    def closest(self, key: str) -> Optional[Tuple[str, str]]:
+        """(matched key, value) of the best match scoring at least cutoff, or None"""
+        with self._lock:
+            if len(self._values) < self.exact_below:
+                candidates = list(self._values)
+            else:
+                candidates = self._candidates(key)
+            matches = difflib.get_close_matches(key, candidates, n=1, cutoff=self.cutoff)
+            if not matches:
+                return None
+            return matches[0], self._values[matches[0]]
@@ -0,0 +1,290 @@
+import math
+import random
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Phrases that make an utterance a database question on their own
+DATABASE_PHRASES = [
+    'query database', 'database query', 'query the database', 'show database', 'database info',
+    'adventureworks', 'adventure works', 'sql', 'how many', 'attendance', 'table', 'tables',
+    'records', 'rows', 'sales', 'customers', 'orders', 'employees', 'products',
+    'absent', 'revenue', 'inventory', 'department', 'salary',
+    # Attendance questions often name only a person and a day
+    'absence', 'absences', 'absentees', 'late arrival', 'late arrivals', 'came late', 'arrived late',
+    'late on', 'on leave', 'take leave', 'took leave', 'taken leave', 'leave requests',
+    'present today', 'present yesterday', 'present on', 'wfh', 'work from home',
+    'worked from home', 'working from home',
+]
+
+# Subject-less follow-ups ("what about sara") that only make sense after the previous turn
+FOLLOW_UP = re.compile(
+    r"^\s*(?:and\s+)?(?:(?:what|how)\s+about|same\s+for|also\s+for|and)\b(?!\s+(?:you|yourself|me|us)\b)",
+    re.IGNORECASE
+)
+
+# Labelled utterances the linear model is trained on (1 = database question)
+TRAINING_EXAMPLES = [
+    ("how many employees are there", 1),
+    ("show me the top five customers by sales", 1),
+    ("list all products in the bikes category", 1),
+    ("what was the total sales last year", 1),
+    ("who is the manager of the sales department", 1),
+    ("which employees were absent today", 1),
+    ("give me the attendance for yesterday", 1),
+    ("who came late this week", 1),
+    ("what is the average order value", 1),
+    ("count the orders shipped in march", 1),
+    ("show the latest ten orders", 1),
+    ("which product sold the most", 1),
+    ("find customers from canada", 1),
+    ("what are the columns in the person table", 1),
+    ("list the tables in the database", 1),
+    ("how much revenue did we make in 2014", 1),
+    ("tell me the employee with the highest salary", 1),
+    ("get the details of order 43659", 1),
+    ("which vendors supply helmets", 1),
+    ("what is the phone number of ken sanchez", 1),
+    ("show employees hired after 2010", 1),
+    ("how many people were present on monday", 1),
+    ("list departments and their headcount", 1),
+    ("what is the most expensive product", 1),
+    ("which territory has the best sales", 1),
+    ("show me all red products", 1),
+    ("who was absent last friday", 1),
+    ("what time did john check in today", 1),
+    ("give me the number of orders per month", 1),
+    ("show the sales by region", 1),
+    ("find products that are out of stock", 1),
+    ("what is the email address of the customer", 1),
+    ("list the job titles in the company", 1),
+    ("how many customers placed more than five orders", 1),
+    ("which salesperson met their quota", 1),
+    ("show the inventory for mountain bikes", 1),
+    ("what were yesterday's check in times", 1),
+    ("display attendance records for january", 1),
+    ("sum of freight for all orders", 1),
+    ("which store has the most customers", 1),
+    ("what's the name of the ceo", 1),
+    ("who works in the engineering department", 1),
+    ("average list price of road bikes", 1),
+    ("show me shipping methods", 1),
+    ("when was the last order placed", 1),
+    ("where do most of our customers live", 1),
+    ("fetch the employee pay history", 1),
+    ("what currencies are in the system", 1),
+    ("did bilal take leave last week", 1),
+    ("who is on leave today", 1),
+    ("was ahmed late yesterday", 1),
+    ("how many people came late on friday", 1),
+    ("is sara present", 1),
+    ("was john absent on monday", 1),
+    ("who worked from home yesterday", 1),
+    ("list wfh employees this month", 1),
+    ("show late arrivals for january", 1),
+    ("how many absentees do we have today", 1),
+    ("who took leave in march", 1),
+    ("was ali in the office on tuesday", 1),
+    ("hello", 0),
+    ("hi there", 0),
+    ("good morning eureka", 0),
+    ("thank you", 0),
+    ("thanks a lot", 0),
+    ("how are you doing", 0),
+    ("what's your name", 0),
+    ("who made you", 0),
+    ("tell me a joke", 0),
+    ("sing a song", 0),
+    ("play some music", 0),
+    ("open notepad", 0),
+    ("open the browser", 0),
+    ("what's the weather like today", 0),
+    ("what is the temperature outside", 0),
+    ("set an alarm for seven", 0),
+    ("send an email to my boss", 0),
+    ("create a folder named reports", 0),
+    ("turn up the volume", 0),
+    ("shut down the computer", 0),
+    ("what time is it", 0),
+    ("what day is today", 0),
+    ("goodbye", 0),
+    ("see you later", 0),
+    ("never mind", 0),
+    ("that's all for now", 0),
+    ("you are awesome", 0),
+    ("can you hear me", 0),
+    ("testing one two three", 0),
+    ("play a youtube video about cats", 0),
+    ("what's the capital of france", 0),
+    ("who won the world cup", 0),
+    ("translate hello into urdu", 0),
+    ("tell me something interesting", 0),
+    ("what can you do", 0),
+    ("whatever", 0),
+    ("update yourself", 0),
+    ("i am tired", 0),
+    ("let's chat", 0),
+    ("how old are you", 0),
+    ("remind me to call mom", 0),
+    ("open my documents", 0),
+    ("take a screenshot", 0),
+    ("lock the screen", 0),
+    ("search google for recipes", 0),
+    ("what is the meaning of life", 0),
+    ("where are you from", 0),
+    ("do you like music", 0),
+    ("leave me alone", 0),
+    ("i'm running late", 0),
+    ("it's getting late", 0),
+    ("i have to leave now", 0),
+    ("present the slides", 0),
+]
+
+_TOKEN = re.compile(r"[a-z0-9']+|\?")
+
+def compile_phrases(phrases: Iterable[str]):
+    """One regex matching any phrase as whole words ("data" won't match inside "update")"""
+    alternatives = sorted({p.lower() for p in phrases}, key=len, reverse=True)
+    body = '|'.join(r'\s+'.join(map(re.escape, p.split())) for p in alternatives)
+    return re.compile(rf"(?<!\w)(?:{body})(?!\w)", re.IGNORECASE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def hashed_features(text: str, dims: int) -> Dict[int, float]:
+    """Word unigrams, bigrams and character trigrams hashed into dims buckets, L2-normalised"""
+    words = tokenize(text)
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    features: Dict[int, float] = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode('utf-8')) % dims
+        features[index] = features.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {k: v / norm for k, v in features.items()}
+
+
+def _sigmoid(z: float) -> float:
+    if z < -35:
+        return 0.0
+    if z > 35:
+        return 1.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+class HashedLogisticModel:
+    """Binary logistic regression over hashed n-gram features, trained with SGD"""
+
+    def __init__(self, dims: int = 1 << 14, epochs: int = 20, learning_rate: float = 0.5,
+                 l2: float = 1e-4, seed: int = 0):
+        self.dims = dims
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.weights: Dict[int, float] = {}
+        self.bias = 0.0
+
+    def score(self, features: Dict[int, float]) -> float:
+        return self.bias + sum(self.weights.get(k, 0.0) * v for k, v in features.items())
+
+    def fit(self, samples: Sequence[Tuple[Dict[int, float], int]]):
+        rng = random.Random(self.seed)
+        order = list(samples)
+        for epoch in range(self.epochs):
+            rng.shuffle(order)
+            rate = self.learning_rate / (1 + epoch * 0.1)
+            for features, label in order:
+                error = _sigmoid(self.score(features)) - label
+                self.bias -= rate * error
+                for k, v in features.items():
+                    w = self.weights.get(k, 0.0)
+                    self.weights[k] = w - rate * (error * v + self.l2 * w)
+        return self
+
+
+class IntentEngine:
+    """Offline intent classifier: whole-word phrase rules, then a calibrated linear model.
+
+    classify() returns (intent, confidence, source). source is 'rule' or
+    'model' when the engine is sure, or 'uncertain' when the model's
+    calibrated probability falls between the thresholds, in which case the
+    caller should ask the LLM. Given the previous turn's intent, a
+    subject-less follow-up like "what about sara" keeps that intent, with
+    source 'context'.
+    """
+
+    def __init__(self, examples=TRAINING_EXAMPLES, phrases=DATABASE_PHRASES, dims: int = 1 << 14,
+                 accept_threshold: float = 0.75, reject_threshold: float = 0.25, folds: int = 5):
+        self.dims = dims
+        self.accept_threshold = accept_threshold
+        self.reject_threshold = reject_threshold
+        self.matcher = compile_phrases(phrases)
+        samples = [(hashed_features(text, dims), label) for text, label in examples]
+        self.model = HashedLogisticModel(dims).fit(samples)
+        self.platt_a, self.platt_b = self._calibrate(samples, folds)
+        self.counts = {'rule': 0, 'model': 0, 'context': 0, 'uncertain': 0}
+
+    def _calibrate(self, samples, folds):
+        """Platt scaling fitted on out-of-fold scores, so confidences aren't overfit to training data"""
+        scored = []
+        for fold in range(folds):
+            train = [s for i, s in enumerate(samples) if i % folds != fold]
+            held_out = [s for i, s in enumerate(samples) if i % folds == fold]
+            model = HashedLogisticModel(self.dims).fit(train)
+            scored += [(model.score(features), label) for features, label in held_out]
+        a, b = 1.0, 0.0
+        positives = sum(label for _, label in scored)
+        negatives = len(scored) - positives
+        # Platt's smoothed targets keep a and b finite on separable data
+        high = (positives + 1) / (positives + 2)
+        low = 1 / (negatives + 2)
+        for _ in range(500):
+            grad_a = grad_b = 0.0
+            for score, label in scored:
+                error = _sigmoid(a * score + b) - (high if label else low)
+                grad_a += error * score
+                grad_b += error
+            a -= 0.1 * grad_a / len(scored)
+            b -= 0.1 * grad_b / len(scored)
+        return a, b
+
+    def probability(self, text: str) -> float:
+        """Calibrated probability that text is a database question"""
+        return _sigmoid(self.platt_a * self.model.score(hashed_features(text, self.dims)) + self.platt_b)
+
+    def classify(self, text: str, previous: Optional[str] = None) -> Tuple[str, float, str]:
+        if self.matcher.search(text):
+            self.counts['rule'] += 1
+            return 'query_database', 1.0, 'rule'
+        if previous == 'query_database' and FOLLOW_UP.match(text):
+            self.counts['context'] += 1
+            return previous, 1.0, 'context'
+        p = self.probability(text)
+        if p >= self.accept_threshold:
+            self.counts['model'] += 1
+            return 'query_database', p, 'model'
+        if p <= self.reject_threshold:
+            self.counts['model'] += 1
+            return 'unknown', 1 - p, 'model'
+        self.counts['uncertain'] += 1
+        return 'unknown', 1 - p, 'uncertain'
+
+    def stats(self) -> Dict[str, float]:
+        total = sum(self.counts.values())
+        return dict(self.counts, llm_rate=self.counts['uncertain'] / total if total else 0.0)
+
+
+_engine: Optional[IntentEngine] = None
+
+def default_engine() -> IntentEngine:
+    """Shared engine, trained on first use"""
+    global _engine
+    if _engine is None:
+        _engine = IntentEngine()
+    return _engine
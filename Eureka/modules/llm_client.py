@@ -0,0 +1,304 @@
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.config import Config
+
+PURPOSES = ('intent', 'sql_generation', 'sql_repair', 'summarization')
+
+class LLMError(Exception):
+    """Raised when a completion fails after every allowed attempt"""
+
+
+class PurposeStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.streams = 0
+        self.first_token_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'avg_ms': self.total_seconds / self.calls * 1000 if self.calls else 0.0,
+            'max_ms': self.max_seconds * 1000,
+            'avg_first_token_ms': self.first_token_seconds / self.streams * 1000 if self.streams else None,
+        }
+
+
+class AzureOpenAIBackend:
+    """Azure OpenAI chat completions over one keep-alive HTTP connection pool.
+
+    The SDK client is built on first use, so importing modules that talk to
+    the LLM needs neither credentials nor network. SDK retries are turned
+    off; LLMClient owns the retry budget.
+    """
+
+    def __init__(self, max_connections: int = 8, keepalive_expiry: float = 60, connect_timeout: float = 5):
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                import openai
+                http_client = None
+                if HTTPX_AVAILABLE:
+                    http_client = httpx.Client(
+                        limits=httpx.Limits(max_connections=self.max_connections,
+                                            max_keepalive_connections=self.max_connections,
+                                            keepalive_expiry=self.keepalive_expiry),
+                        timeout=httpx.Timeout(Config.LLM_TIMEOUT, connect=self.connect_timeout)
+                    )
+                self._client = openai.AzureOpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    api_version="2024-02-15-preview",
+                    azure_endpoint=Config.OPENAI_ENDPOINT,
+                    http_client=http_client,
+                    max_retries=0
+                )
+            return self._client
+
+    def complete(self, messages: List[Dict[str, str]], max_tokens: Optional[int],
+                 timeout: float) -> Tuple[str, int, int]:
+        """Returns (text, prompt_tokens, completion_tokens)"""
+        options = {'max_completion_tokens': max_tokens} if max_tokens else {}
+        response = self._get_client().chat.completions.create(
+            model=Config.OPENAI_DEPLOYMENT_NAME,
+            messages=messages,
+            timeout=timeout,
+            **options
+        )
+        usage = getattr(response, 'usage', None)
+        return (response.choices[0].message.content.strip(),
+                getattr(usage, 'prompt_tokens', 0) or 0,
+                getattr(usage, 'completion_tokens', 0) or 0)
+
+    def stream(self, messages: List[Dict[str, str]], max_tokens: Optional[int],
+               timeout: float) -> Iterator[str]:
+        """Yield content deltas as the service produces them"""
+        options = {'max_completion_tokens': max_tokens} if max_tokens else {}
+        response = self._get_client().chat.completions.create(
+            model=Config.OPENAI_DEPLOYMENT_NAME,
+            messages=messages,
+            timeout=timeout,
+            stream=True,
+            **options
+        )
+        try:
+            for chunk in response:
+                # Azure sends content-filter chunks without choices
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            response.close()
+
+    def is_retryable(self, error: Exception) -> bool:
+        import openai
+        return isinstance(error, (openai.APITimeoutError, openai.APIConnectionError,
+                                  openai.RateLimitError, openai.InternalServerError))
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class FakeLLMBackend:
+    """Local stand-in for tests and benchmarks.
+
+    respond(messages) produces the reply text (default: a fixed string);
+    the first `failures` calls raise TimeoutError to exercise retries.
+    stream() yields the reply word by word, token_latency apart; pass
+    streaming=False to test the non-streaming fallback.
+    """
+
+    def __init__(self, respond: Optional[Callable[[List[Dict[str, str]]], str]] = None,
+                 latency: float = 0.0, failures: int = 0, token_latency: float = 0.0,
+                 streaming: bool = True):
+        self.respond = respond or (lambda messages: "SELECT 1")
+        self.latency = latency
+        self.failures = failures
+        self.token_latency = token_latency
+        self.calls: List[List[Dict[str, str]]] = []
+        if not streaming:
+            self.stream = None
+
+    def complete(self, messages, max_tokens, timeout):
+        self.calls.append(messages)
+        time.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise TimeoutError("fake timeout")
+        text = self.respond(messages)
+        prompt_tokens = sum(len(m['content'].split()) for m in messages)
+        return text, prompt_tokens, len(text.split())
+
+    def stream(self, messages, max_tokens, timeout):
+        self.calls.append(messages)
+        time.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise TimeoutError("fake timeout")
+        for i, word in enumerate(self.respond(messages).split(' ')):
+            time.sleep(self.token_latency)
+            yield word if i == 0 else ' ' + word
+
+    def is_retryable(self, error):
+        return isinstance(error, (TimeoutError, ConnectionError))
+
+    def close(self):
+        pass
+
+
+class LLMClient:
+    """Shared entry point for every LLM call, with timeouts, retries and per-purpose counters"""
+
+    def __init__(self, backend=None, timeout: float = 20, max_retries: int = 2,
+                 backoff: float = 0.5, max_backoff: float = 4.0):
+        self.backend = backend or AzureOpenAIBackend()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._stats: Dict[str, PurposeStats] = {purpose: PurposeStats() for purpose in PURPOSES}
+        self._lock = threading.Lock()
+
+    def chat(self, purpose: str, system: str, prompt: str, max_tokens: Optional[int] = None,
+             timeout: Optional[float] = None) -> str:
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ]
+        timeout = timeout or self.timeout
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            try:
+                text, prompt_tokens, completion_tokens = self.backend.complete(messages, max_tokens, timeout)
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not self.backend.is_retryable(e):
+                    self._record(purpose, start, error=True)
+                    raise LLMError(f"{purpose} call failed after {attempt + 1} attempt(s): {e}") from e
+                # Full jitter keeps retries from several threads from lining up
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                print(f"[LLM] {purpose} attempt {attempt + 1} failed ({e}), retrying in {delay:.2f}s")
+                attempt += 1
+                with self._lock:
+                    self._stats.setdefault(purpose, PurposeStats()).retries += 1
+                time.sleep(delay)
+        self._record(purpose, start, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return text
+
+    def stream_chat(self, purpose: str, system: str, prompt: str, max_tokens: Optional[int] = None,
+                    timeout: Optional[float] = None) -> Iterator[str]:
+        """Yield the reply in pieces as they arrive.
+
+        Backends without streaming yield the whole reply once. Retries only
+        happen before the first piece, so nothing is ever yielded twice.
+        """
+        stream = getattr(self.backend, 'stream', None)
+        if stream is None:
+            yield self.chat(purpose, system, prompt, max_tokens, timeout)
+            return
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ]
+        timeout = timeout or self.timeout
+        attempt = 0
+        pieces = 0
+        first_token = None
+        start = time.perf_counter()
+        while True:
+            deltas = stream(messages, max_tokens, timeout)
+            try:
+                for delta in deltas:
+                    if not delta:
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    pieces += 1
+                    yield delta
+                break
+            except GeneratorExit:
+                # The consumer stopped listening, e.g. the user interrupted
+                deltas.close()
+                self._record(purpose, start, completion_tokens=pieces, first_token=first_token)
+                raise
+            except Exception as e:
+                if pieces or attempt >= self.max_retries or not self.backend.is_retryable(e):
+                    self._record(purpose, start, error=True, first_token=first_token)
+                    raise LLMError(f"{purpose} stream failed after {attempt + 1} attempt(s): {e}") from e
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                print(f"[LLM] {purpose} attempt {attempt + 1} failed ({e}), retrying in {delay:.2f}s")
+                attempt += 1
+                with self._lock:
+                    self._stats.setdefault(purpose, PurposeStats()).retries += 1
+                time.sleep(delay)
+        # Each streamed delta is roughly one token
+        self._record(purpose, start, completion_tokens=pieces, first_token=first_token)
+
+    def _record(self, purpose, start, error=False, prompt_tokens=0, completion_tokens=0, first_token=None):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats = self._stats.setdefault(purpose, PurposeStats())
+            if first_token is not None:
+                stats.streams += 1
+                stats.first_token_seconds += first_token
+            stats.calls += 1
+            stats.errors += error
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {purpose: stats.as_dict() for purpose, stats in self._stats.items()}
+
+    def close(self):
+        self.backend.close()
+
+
+_shared_client: Optional[LLMClient] = None
+_shared_lock = threading.Lock()
+
+def get_client() -> LLMClient:
+    """The process-wide client, created on first use"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient(
+                timeout=Config.LLM_TIMEOUT,
+                max_retries=Config.LLM_MAX_RETRIES
+            )
+        return _shared_client
+
+
+def set_backend(backend) -> LLMClient:
+    """Swap the shared client's backend, e.g. for FakeLLMBackend in tests"""
+    client = get_client()
+    client.backend = backend
+    return client
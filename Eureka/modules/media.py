@@ -5,8 +5,17 @@ from modules.audio import AudioInterface
 import re, json
 
 class Media:
+    def __init__(self, audio=None):
+        # One interface for every call; pass the assistant's own to share its speaker
+        self.audio = audio
+
+    def _speaker(self):
+        if self.audio is None:
+            self.audio = AudioInterface()
+        return self.audio
+
     def play_youtube(self, query):
-        audio = AudioInterface()
+        audio = self._speaker()
         search_query = query.replace(' ', '+')
         url = f"https://www.youtube.com/results?search_query={search_query}"
         response = requests.get(url)
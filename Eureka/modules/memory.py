@@ -1,15 +1,106 @@
+import atexit
 import sqlite3
-import os
-from datetime import datetime
-import difflib
+import threading
+import time
+
+from modules.fuzzy_index import FuzzyKeyIndex
+from modules.sqlite_store import SqliteStore
 
 DB = 'memory.db'
+FLUSH_INTERVAL = 2.0   # seconds between write-behind flushes of spoken words
+FLUSH_WORDS = 500      # flush early once this many words are waiting
+SQL_VARIABLE_LIMIT = 500
+RAW_RETENTION_DAYS = 30       # raw word_memory rows older than this are compacted away (None keeps them)
+HOURLY_RETENTION_HOURS = 7 * 24
+DAILY_RETENTION_DAYS = 400
+COMPACT_INTERVAL = 3600       # seconds between compaction passes
+COMPACT_BATCH = 5000          # raw rows deleted per write, so compaction never holds the writer for long
+
+# Word counts pre-aggregated per hour, per day and over all time, updated
+# by every flush. Frequency and top-word queries read these instead of
+# summing raw rows, so their cost depends on the window, not the history.
+ROLLUP_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS word_hourly (
+        hour TEXT NOT NULL, word TEXT NOT NULL, count INTEGER NOT NULL,
+        PRIMARY KEY (hour, word)) WITHOUT ROWID""",
+    'CREATE INDEX IF NOT EXISTS idx_word_hourly_word ON word_hourly(word, hour)',
+    """CREATE TABLE IF NOT EXISTS word_daily (
+        day TEXT NOT NULL, word TEXT NOT NULL, count INTEGER NOT NULL,
+        PRIMARY KEY (day, word)) WITHOUT ROWID""",
+    'CREATE INDEX IF NOT EXISTS idx_word_daily_word ON word_daily(word, day)',
+    """CREATE TABLE IF NOT EXISTS word_totals (
+        word TEXT PRIMARY KEY, count INTEGER NOT NULL, last_seen TEXT) WITHOUT ROWID""",
+]
+
+# Full-text indexes kept in step with their tables by triggers. Words and
+# contexts use the trigram tokenizer so any substring of 3+ characters can
+# be found; chat messages use word tokens with stemming for ranked search.
+# Frequency updates don't touch the index.
+SEARCH_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS word_fts USING fts5(
+        word, context, content='word_memory', content_rowid='id', tokenize='trigram')""",
+    """CREATE TRIGGER IF NOT EXISTS word_memory_fts_insert AFTER INSERT ON word_memory BEGIN
+        INSERT INTO word_fts(rowid, word, context) VALUES (new.id, new.word, new.context);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS word_memory_fts_delete AFTER DELETE ON word_memory BEGIN
+        INSERT INTO word_fts(word_fts, rowid, word, context) VALUES ('delete', old.id, old.word, old.context);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS word_memory_fts_update AFTER UPDATE OF word, context ON word_memory BEGIN
+        INSERT INTO word_fts(word_fts, rowid, word, context) VALUES ('delete', old.id, old.word, old.context);
+        INSERT INTO word_fts(rowid, word, context) VALUES (new.id, new.word, new.context);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chat_fts USING fts5(
+        content, content='chat_history', content_rowid='id', tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS chat_history_fts_insert AFTER INSERT ON chat_history BEGIN
+        INSERT INTO chat_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_history_fts_delete AFTER DELETE ON chat_history BEGIN
+        INSERT INTO chat_fts(chat_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_history_fts_update AFTER UPDATE OF content ON chat_history BEGIN
+        INSERT INTO chat_fts(chat_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO chat_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+def fts_phrase(text):
+    """Quote text as a single FTS5 phrase so user input is never parsed as query syntax"""
+    return '"' + text.replace('"', '""') + '"'
 
 class Memory:
-    def __init__(self):
-        self.conn = sqlite3.connect(DB, check_same_thread=False)
-        self.conn.execute('CREATE TABLE IF NOT EXISTS facts(key TEXT PRIMARY KEY, value TEXT)')
-        self.conn.execute('''
+    def __init__(self, path=DB, flush_interval=FLUSH_INTERVAL, flush_words=FLUSH_WORDS,
+                 raw_retention_days=RAW_RETENTION_DAYS):
+        # WAL database: writes go through one writer thread, reads use per-thread connections
+        self.store = SqliteStore(path)
+        self.store.run(self._create_schema)
+        self.search_available = self.store.run(self._create_search_index)
+        self.store.run(self._create_rollups)
+        # Fact keys for fuzzy recall, kept in step with every facts write below
+        self.fact_index = FuzzyKeyIndex(self.conn.execute('SELECT key, value FROM facts'))
+
+        # Write-behind buffer for spoken words: word -> [count, first context, first seen]
+        self.flush_interval = flush_interval
+        self.flush_words = flush_words
+        self._pending = {}
+        self._pending_words = 0
+        self._buffer_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self.flushes = 0
+        self.words_flushed = 0
+        self.rows_written = 0
+        self.flush_seconds = 0.0
+        self.raw_retention_days = raw_retention_days
+        self.rows_compacted = 0
+        self._next_compaction = time.monotonic()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _create_schema(conn):
+        conn.execute('CREATE TABLE IF NOT EXISTS facts(key TEXT PRIMARY KEY, value TEXT)')
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS chat_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 role TEXT NOT NULL,
@@ -18,7 +109,7 @@ class Memory:
             )
         ''')
         # New table for storing every word spoken
-        self.conn.execute('''
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS word_memory (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 word TEXT NOT NULL,
@@ -28,14 +119,56 @@ class Memory:
             )
         ''')
         # Index for faster word lookups
-        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_word_memory_word ON word_memory(word)')
-        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_word_memory_timestamp ON word_memory(timestamp)')
-        self.conn.commit()
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_word_memory_word ON word_memory(word)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_word_memory_timestamp ON word_memory(timestamp)')
+
+    @staticmethod
+    def _create_search_index(conn):
+        """Create the FTS5 tables and triggers, indexing existing rows once; False if FTS5 is missing"""
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE name IN ('word_fts', 'chat_fts')")}
+        try:
+            for statement in SEARCH_SCHEMA:
+                conn.execute(statement)
+        except sqlite3.OperationalError as e:
+            print(f"[Memory] Full-text search not available ({e}), using LIKE scans")
+            return False
+        if 'word_fts' not in existing:
+            conn.execute("INSERT INTO word_fts(word_fts) VALUES ('rebuild')")
+        if 'chat_fts' not in existing:
+            conn.execute("INSERT INTO chat_fts(chat_fts) VALUES ('rebuild')")
+        return True
+
+    @staticmethod
+    def _create_rollups(conn):
+        """Create the rollup tables, filling them from existing word rows the first time"""
+        existing = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'word_totals'").fetchone()
+        for statement in ROLLUP_SCHEMA:
+            conn.execute(statement)
+        if existing:
+            return
+        conn.execute('''
+            INSERT INTO word_hourly (hour, word, count)
+            SELECT strftime('%Y-%m-%d %H:00:00', timestamp), word, SUM(frequency) FROM word_memory
+            WHERE timestamp > datetime('now', ?) GROUP BY 1, 2
+        ''', (f'-{HOURLY_RETENTION_HOURS} hours',))
+        conn.execute('''
+            INSERT INTO word_daily (day, word, count)
+            SELECT date(timestamp), word, SUM(frequency) FROM word_memory GROUP BY 1, 2
+        ''')
+        conn.execute('''
+            INSERT INTO word_totals (word, count, last_seen)
+            SELECT word, SUM(frequency), MAX(timestamp) FROM word_memory GROUP BY word
+        ''')
+
+    @property
+    def conn(self):
+        """The calling thread's read connection; writes go through self.store"""
+        return self.store.reader()
 
     def remember(self, key, value):
         key = key.strip().lower()
-        self.conn.execute('REPLACE INTO facts VALUES (?,?)', (key, value))
-        self.conn.commit()
+        self.store.write('REPLACE INTO facts VALUES (?,?)', (key, value))
+        self.fact_index.add(key, value)
 
     def recall(self, key):
         key = key.strip().lower()
@@ -44,22 +177,17 @@ class Memory:
         if row:
             return row[0]
         # Fuzzy match fallback
-        all_keys = [row[0] for row in self.conn.execute('SELECT key FROM facts').fetchall()]
-        matches = difflib.get_close_matches(key, all_keys, n=1, cutoff=0.6)
-        if matches:
-            cur = self.conn.execute('SELECT value FROM facts WHERE key=?', (matches[0],))
-            row = cur.fetchone()
-            if row:
-                return row[0]
+        match = self.fact_index.closest(key)
+        if match and match[1]:
+            return match[1]
         return None
 
     def forget(self, key):
-        self.conn.execute('DELETE FROM facts WHERE key=?', (key,))
-        self.conn.commit()
+        self.store.write('DELETE FROM facts WHERE key=?', (key,))
+        self.fact_index.remove(key)
 
     def remember_chat_message(self, role, content):
-        self.conn.execute('INSERT INTO chat_history (role, content) VALUES (?, ?)', (role, content))
-        self.conn.commit()
+        self.store.write('INSERT INTO chat_history (role, content) VALUES (?, ?)', (role, content))
 
     def recall_chat_history(self, limit=10):
         cur = self.conn.execute('SELECT role, content FROM chat_history ORDER BY timestamp DESC LIMIT ?', (limit,))
@@ -68,68 +196,198 @@ class Memory:
         return [{"role": role, "content": content} for role, content in reversed(history)]
 
     def forget_chat_history(self):
-        self.conn.execute('DELETE FROM chat_history')
-        self.conn.commit()
+        self.store.write('DELETE FROM chat_history')
 
     # New methods for word-level memory
     def remember_word(self, word, context=None):
-        """Store a single word with optional context"""
+        """Store a single word with optional context (written on the next flush)"""
         word = word.lower().strip()
         if not word or len(word) < 2:  # Skip very short words
             return
-            
-        # Check if word already exists recently (within last 5 minutes)
-        cur = self.conn.execute('''
-            SELECT id, frequency FROM word_memory 
-            WHERE word = ? AND timestamp > datetime('now', '-5 minutes')
-            ORDER BY timestamp DESC LIMIT 1
-        ''', (word,))
-        row = cur.fetchone()
-        
-        if row:
-            # Update frequency of existing word
-            self.conn.execute('UPDATE word_memory SET frequency = frequency + 1 WHERE id = ?', (row[0],))
-        else:
-            # Insert new word
-            self.conn.execute('INSERT INTO word_memory (word, context) VALUES (?, ?)', (word, context))
-        
-        self.conn.commit()
+        self._buffer_words([word], context)
 
     def remember_sentence(self, sentence, context=None):
-        """Break down a sentence and store each word"""
+        """Break down a sentence and store each word (written on the next flush)"""
         if not sentence:
             return
-            
-        words = sentence.lower().split()
-        for word in words:
-            # Clean the word (remove punctuation)
-            clean_word = ''.join(c for c in word if c.isalnum())
-            if clean_word:
-                self.remember_word(clean_word, context)
+        # Clean each word (remove punctuation), skipping very short ones
+        words = [''.join(c for c in word if c.isalnum()) for word in sentence.lower().split()]
+        self._buffer_words([word for word in words if len(word) >= 2], context)
+
+    def _buffer_words(self, words, context):
+        if not words:
+            return
+        now = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())  # same format as CURRENT_TIMESTAMP
+        with self._buffer_lock:
+            for word in words:
+                entry = self._pending.get(word)
+                if entry:
+                    entry[0] += 1
+                else:
+                    self._pending[word] = [1, context, now]
+            self._pending_words += len(words)
+            full = self._pending_words >= self.flush_words
+        if full:
+            self._wake.set()
+
+    def _flush_loop(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Memory] Word flush failed: {e}")
+            if time.monotonic() >= self._next_compaction and not self._closed.is_set():
+                self._next_compaction = time.monotonic() + COMPACT_INTERVAL
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"[Memory] Compaction failed: {e}")
+
+    def flush(self):
+        """Write buffered words in one transaction; returns how many words were written.
+
+        A word already seen in the last 5 minutes has its latest row's
+        frequency raised by the buffered count, otherwise a new row is
+        inserted with that count, the first context and first-seen time.
+        """
+        with self._buffer_lock:
+            pending, self._pending = self._pending, {}
+            count, self._pending_words = self._pending_words, 0
+        if not pending:
+            return 0
+        start = time.perf_counter()
+        try:
+            self.store.run(lambda conn: self._write_words(conn, pending))
+        except Exception:
+            # Put the words back so the next flush retries them
+            self._requeue(pending, count)
+            raise
+        self.flushes += 1
+        self.words_flushed += count
+        self.rows_written += len(pending)
+        self.flush_seconds += time.perf_counter() - start
+        return count
+
+    @staticmethod
+    def _write_words(conn, pending):
+        words = list(pending)
+        recent = {}
+        for i in range(0, len(words), SQL_VARIABLE_LIMIT):
+            chunk = words[i:i + SQL_VARIABLE_LIMIT]
+            recent.update(conn.execute(f'''
+                SELECT word, MAX(id) FROM word_memory
+                WHERE timestamp > datetime('now', '-5 minutes') AND word IN ({','.join('?' * len(chunk))})
+                GROUP BY word
+            ''', chunk))
+        updates = [(pending[word][0], recent[word]) for word in words if word in recent]
+        inserts = [(word, context, seen, n) for word, (n, context, seen) in pending.items() if word not in recent]
+        conn.executemany('UPDATE word_memory SET frequency = frequency + ? WHERE id = ?', updates)
+        conn.executemany('INSERT INTO word_memory (word, context, timestamp, frequency) VALUES (?, ?, ?, ?)', inserts)
+        # Rollups: each word counts towards the hour and day it was first heard in this window
+        conn.executemany('''
+            INSERT INTO word_hourly (hour, word, count) VALUES (?, ?, ?)
+            ON CONFLICT (hour, word) DO UPDATE SET count = count + excluded.count
+        ''', [(seen[:13] + ':00:00', word, n) for word, (n, _, seen) in pending.items()])
+        conn.executemany('''
+            INSERT INTO word_daily (day, word, count) VALUES (?, ?, ?)
+            ON CONFLICT (day, word) DO UPDATE SET count = count + excluded.count
+        ''', [(seen[:10], word, n) for word, (n, _, seen) in pending.items()])
+        conn.executemany('''
+            INSERT INTO word_totals (word, count, last_seen) VALUES (?, ?, ?)
+            ON CONFLICT (word) DO UPDATE SET count = count + excluded.count, last_seen = excluded.last_seen
+        ''', [(word, n, seen) for word, (n, _, seen) in pending.items()])
+
+    def compact(self):
+        """Drop raw word rows past the retention horizon and rollup buckets past theirs.
+
+        Counts stay available from the coarser rollups: hourly buckets cover
+        the last HOURLY_RETENTION_HOURS, daily ones DAILY_RETENTION_DAYS,
+        and word_totals everything. Returns the number of raw rows removed.
+        """
+        removed = 0
+        if self.raw_retention_days:
+            cutoff = f'-{int(self.raw_retention_days)} days'
+            while True:
+                deleted = self.store.write('''
+                    DELETE FROM word_memory WHERE id IN (
+                        SELECT id FROM word_memory WHERE timestamp < datetime('now', ?) LIMIT ?)
+                ''', (cutoff, COMPACT_BATCH))
+                removed += deleted
+                if deleted < COMPACT_BATCH:
+                    break
+        self.store.write("DELETE FROM word_hourly WHERE hour < strftime('%Y-%m-%d %H:00:00', 'now', ?)",
+                         (f'-{HOURLY_RETENTION_HOURS} hours',))
+        self.store.write("DELETE FROM word_daily WHERE day < date('now', ?)", (f'-{DAILY_RETENTION_DAYS} days',))
+        self.rows_compacted += removed
+        if removed:
+            print(f"[Memory] Compacted {removed} word rows older than {self.raw_retention_days} days")
+        return removed
+
+    @staticmethod
+    def _window(hours):
+        """Rollup table, bucket column and first bucket covering the last `hours` hours.
+
+        Windows are rounded out to whole buckets: hourly ones while they are
+        kept, daily ones beyond that.
+        """
+        start = time.gmtime(time.time() - float(hours) * 3600)
+        if hours <= HOURLY_RETENTION_HOURS:
+            return 'word_hourly', 'hour', time.strftime('%Y-%m-%d %H:00:00', start)
+        return 'word_daily', 'day', time.strftime('%Y-%m-%d', start)
+
+    def _requeue(self, pending, count):
+        with self._buffer_lock:
+            for word, (n, context, seen) in pending.items():
+                entry = self._pending.get(word)
+                if entry:
+                    entry[0] += n
+                    entry[1], entry[2] = context, seen
+                else:
+                    self._pending[word] = [n, context, seen]
+            self._pending_words += count
+
+    def write_stats(self):
+        """Write-behind counters (flushes, words and rows written, flush time, words waiting) and store counters"""
+        return {
+            'flushes': self.flushes,
+            'words_flushed': self.words_flushed,
+            'rows_written': self.rows_written,
+            'avg_flush_ms': self.flush_seconds / self.flushes * 1000 if self.flushes else 0.0,
+            'pending_words': self._pending_words,
+            'rows_compacted': self.rows_compacted,
+            'store': self.store.stats(),
+        }
 
     def get_word_frequency(self, word, hours=24):
         """Get how often a word has been spoken in the last N hours"""
-        cur = self.conn.execute('''
-            SELECT SUM(frequency) FROM word_memory 
-            WHERE word = ? AND timestamp > datetime('now', '-{} hours')
-        '''.format(hours), (word.lower(),))
+        self.flush()
+        table, bucket, since = self._window(hours)
+        cur = self.conn.execute(f'''
+            SELECT SUM(count) FROM {table}
+            WHERE word = ? AND {bucket} >= ?
+        ''', (word.lower(), since))
         row = cur.fetchone()
         return row[0] if row[0] else 0
 
     def get_most_common_words(self, limit=10, hours=24):
         """Get the most frequently spoken words in the last N hours"""
-        cur = self.conn.execute('''
-            SELECT word, SUM(frequency) as total_freq 
-            FROM word_memory 
-            WHERE timestamp > datetime('now', '-{} hours')
+        self.flush()
+        table, bucket, since = self._window(hours)
+        cur = self.conn.execute(f'''
+            SELECT word, SUM(count) as total_freq 
+            FROM {table} 
+            WHERE {bucket} >= ?
             GROUP BY word 
             ORDER BY total_freq DESC 
             LIMIT ?
-        '''.format(hours), (limit,))
+        ''', (since, limit))
         return cur.fetchall()
 
     def get_recent_words(self, limit=20):
         """Get the most recently spoken words"""
+        self.flush()
         cur = self.conn.execute('''
             SELECT word, context, timestamp, frequency 
             FROM word_memory 
@@ -140,17 +398,72 @@ class Memory:
 
     def search_words(self, query, limit=10):
         """Search for words containing the query"""
+        self.flush()
+        query = query.lower()
+        if self.search_available and len(query) >= 3:
+            # Trigram index on the word column; rowid order is the order words were stored
+            cur = self.conn.execute('''
+                SELECT w.word, w.context, w.timestamp, w.frequency
+                FROM word_fts JOIN word_memory w ON w.id = word_fts.rowid
+                WHERE word_fts MATCH ?
+                ORDER BY word_fts.rowid DESC
+                LIMIT ?
+            ''', (f'word : {fts_phrase(query)}', limit))
+            return cur.fetchall()
         cur = self.conn.execute('''
             SELECT word, context, timestamp, frequency 
             FROM word_memory 
             WHERE word LIKE ? 
             ORDER BY timestamp DESC 
             LIMIT ?
-        ''', (f'%{query.lower()}%', limit))
+        ''', (f'%{query}%', limit))
         return cur.fetchall()
 
+    def search(self, query, source='chat', limit=10, offset=0, order='rank'):
+        """Full-text search over chat messages (source='chat') or spoken words and their contexts ('words').
+
+        Returns dicts with id, text, snippet (matches in [brackets]),
+        timestamp and rank (lower is better). order='rank' sorts by
+        relevance (bm25); order='recent' sorts newest first, which stays
+        fast however many rows match. limit and offset page through results.
+        """
+        self.flush()
+        query = query.strip()
+        if not query:
+            return []
+        if source == 'chat':
+            table, rowid_table, text_column = 'chat_fts', 'chat_history', 'content'
+            # Every word must appear (in any order); stemming matches 'meetings' to 'meeting'
+            match = ' '.join(fts_phrase(word) for word in query.split())
+            snippet_column = 0
+        elif source == 'words':
+            table, rowid_table, text_column = 'word_fts', 'word_memory', 'word'
+            match = fts_phrase(query.lower())
+            snippet_column = -1
+        else:
+            raise ValueError(f"Unknown search source: {source}")
+        if not self.search_available or (source == 'words' and len(query) < 3):
+            cur = self.conn.execute(f'''
+                SELECT id, {text_column}, {text_column}, timestamp, 0 FROM {rowid_table}
+                WHERE {text_column} LIKE ?
+                ORDER BY id DESC LIMIT ? OFFSET ?
+            ''', (f'%{query}%', limit, offset))
+        else:
+            order_by = 'rank' if order == 'rank' else f'{table}.rowid DESC'
+            cur = self.conn.execute(f'''
+                SELECT t.id, t.{text_column}, snippet({table}, {snippet_column}, '[', ']', '...', 12),
+                       t.timestamp, {table}.rank
+                FROM {table} JOIN {rowid_table} t ON t.id = {table}.rowid
+                WHERE {table} MATCH ?
+                ORDER BY {order_by}
+                LIMIT ? OFFSET ?
+            ''', (match, limit, offset))
+        return [{'id': row_id, 'text': text, 'snippet': snippet, 'timestamp': timestamp, 'rank': rank}
+                for row_id, text, snippet, timestamp, rank in cur.fetchall()]
+
     def get_word_context(self, word, limit=5):
         """Get recent contexts where a word was used"""
+        self.flush()
         cur = self.conn.execute('''
             SELECT context, timestamp 
             FROM word_memory 
@@ -161,22 +474,30 @@ class Memory:
         return cur.fetchall()
 
     def get_vocabulary_stats(self):
-        """Get statistics about the vocabulary"""
-        cur = self.conn.execute('SELECT COUNT(DISTINCT word) FROM word_memory')
-        unique_words = cur.fetchone()[0]
-        
-        cur = self.conn.execute('SELECT COUNT(*) FROM word_memory')
-        total_words = cur.fetchone()[0]
-        
-        cur = self.conn.execute('SELECT COUNT(*) FROM word_memory WHERE timestamp > datetime("now", "-24 hours")')
-        words_today = cur.fetchone()[0]
+        """Get statistics about the vocabulary.
+
+        unique_words is the number of distinct words ever heard. total_words
+        and words_today count spoken occurrences from the rollups; before the
+        rollups they counted word_memory rows, which merge repeats within
+        five minutes and are compacted away after RAW_RETENTION_DAYS.
+        """
+        self.flush()
+        unique_words, total_words = self.conn.execute('SELECT COUNT(*), SUM(count) FROM word_totals').fetchone()
+        words_today = self.get_word_count(hours=24)
         
         return {
             'unique_words': unique_words,
-            'total_words': total_words,
+            'total_words': total_words or 0,
             'words_today': words_today
         }
 
+    def get_word_count(self, hours=24):
+        """Total words spoken in the last N hours"""
+        self.flush()
+        table, bucket, since = self._window(hours)
+        row = self.conn.execute(f'SELECT SUM(count) FROM {table} WHERE {bucket} >= ?', (since,)).fetchone()
+        return row[0] or 0
+
     def get_conversation_summary(self, limit=5):
         """Get a summary of recent conversations for context"""
         cur = self.conn.execute('''
@@ -227,9 +548,27 @@ class Memory:
 
     def bulk_remember(self, facts_dict):
         """Add multiple key-value facts to memory at once."""
-        for key, value in facts_dict.items():
-            self.remember(key, value)
+        facts = [(key.strip().lower(), value) for key, value in facts_dict.items()]
+        self.store.write_many('REPLACE INTO facts VALUES (?,?)', facts)
+        for key, value in facts:
+            self.fact_index.add(key, value)
 
     def clear_facts(self):
-        self.conn.execute('DELETE FROM facts')
-        self.conn.commit()
+        self.store.write('DELETE FROM facts')
+        self.fact_index.clear()
+
+    def close(self):
+        """Stop the flusher, write any buffered words and close the database"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        self.store.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
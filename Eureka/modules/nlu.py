@@ -1,46 +1,45 @@
 import re
-import openai
 import json
+from modules.intent_engine import default_engine
+from modules.llm_client import get_client
 from utils.config import Config
 
-client = openai.AzureOpenAI(
-    api_key=Config.OPENAI_API_KEY,
-    api_version="2024-02-15-preview",
-    azure_endpoint=Config.OPENAI_ENDPOINT
-)
-
 class Intent:
-    def __init__(self, name, entities=None):
+    def __init__(self, name, entities=None, confidence=1.0, source='llm'):
         self.name = name
         self.entities = entities or {}
+        self.confidence = confidence
+        self.source = source
 
 class NLU:
-    def simple_rules(self, text):
-        txt = text.lower()
-
-        # Database query intents - be very permissive to catch all database-related queries
-        if any(phrase in txt for phrase in [
-            'query database', 'database query', 'query the database', 'show database', 
-            'database info', 'adventureworks', 'adventure works', 'sql', 'query',
-            'how many', 'count', 'total', 'list', 'show me', 'what', 'who', 'when', 'where',
-            'sales', 'products', 'customers', 'orders', 'employees', 'database', 'data',
-            'table', 'tables', 'records', 'rows', 'information', 'details'
-        ]):
-            return Intent('query_database', {'query': text})
+    def __init__(self, engine=None, llm=None):
+        self.engine = engine or default_engine()
+        self.llm = llm or get_client()
+        self.last_intent = None  # previous turn, for follow-ups like "what about sara"
 
-        # If it sounds like a question or data request, treat as database query
-        if any(word in txt for word in ['?', 'how', 'what', 'which', 'tell me', 'show', 'get', 'find']):
-            return Intent('query_database', {'query': text})
-
-        return Intent('unknown', {'text': text})
+    def simple_rules(self, text):
+        """Classify offline; source is 'uncertain' when the LLM should decide"""
+        previous = self.last_intent.name if self.last_intent else None
+        name, confidence, source = self.engine.classify(text, previous)
+        if source == 'context':
+            # Carry the previous question along so the SQL has a subject
+            query = f"{self.last_intent.entities.get('query', '')} Follow-up: {text}".strip()
+            return Intent(name, {'query': query}, confidence, source)
+        entities = {'query': text} if name == 'query_database' else {'text': text}
+        return Intent(name, entities, confidence, source)
 
     def parse(self, text):
-        # Try rule-based first
+        intent = self._parse(text)
+        self.last_intent = intent
+        return intent
+
+    def _parse(self, text):
+        # Try the offline classifier first
         intent = self.simple_rules(text)
-        if intent.name == 'query_database':
+        if intent.source != 'uncertain':
             return intent
 
-        # Fallback to OpenAI for anything else - but still try to identify as database query
+        # Only low-confidence utterances go to OpenAI
         prompt = (
             "You are an intent parser for a database assistant. "
             "Given the user utterance, determine if it's a database query. "
@@ -50,16 +49,11 @@ class NLU:
         )
         
         try:
-            resp = client.chat.completions.create(
-                model=Config.OPENAI_DEPLOYMENT_NAME,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": text}
-                ]
-            )
+            content = self.llm.chat('intent', prompt, text, max_tokens=200,
+                                    timeout=Config.LLM_INTENT_TIMEOUT)
             
             # parse the JSON from GPT
-            data = json.loads(resp.choices[0].message.content)
+            data = json.loads(content)
             intent_name = data.get('intent', 'unknown')
             entities = data.get('entities', {})
             
@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from modules.schema_index import estimate_tokens
+
+class PromptTemplate:
+    """A prompt split into a static prefix, rendered once, and a short per-request suffix.
+
+    The prefix holds everything that only changes with the schema (table
+    and column lists, rules, examples), so requests under the same schema
+    share an identical leading block, which is what server-side prompt
+    caching matches on. suffix is a str.format template filled in per
+    request and always comes last.
+    """
+
+    def __init__(self, system: str, prefix: str, suffix: str):
+        self.system = system
+        self.prefix = prefix
+        self.suffix = suffix
+        self.static_tokens = estimate_tokens(system) + estimate_tokens(prefix)
+
+    def render(self, **values) -> str:
+        return self.prefix + self.suffix.format(**values)
+
+
+class PromptStats:
+    def __init__(self):
+        self.compiles = 0
+        self.compile_seconds = 0.0
+        self.renders = 0
+        self.render_seconds = 0.0
+        self.prompt_tokens = 0
+        self.static_tokens = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'compiles': self.compiles,
+            'avg_compile_ms': self.compile_seconds / self.compiles * 1000 if self.compiles else 0.0,
+            'renders': self.renders,
+            'avg_render_ms': self.render_seconds / self.renders * 1000 if self.renders else 0.0,
+            'avg_prompt_tokens': self.prompt_tokens / self.renders if self.renders else 0.0,
+            'static_fraction': self.static_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+        }
+
+
+class PromptLibrary:
+    """Compiled prompt templates keyed by name and schema version.
+
+    render() compiles a template the first time a (name, version) pair is
+    seen and reuses it until the version changes, then fills in the
+    request. Only the latest version of each template is kept.
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, Tuple[Hashable, PromptTemplate]] = {}
+        self._stats: Dict[str, PromptStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, version: Hashable, compile_fn: Callable[[], PromptTemplate]) -> PromptTemplate:
+        with self._lock:
+            entry = self._templates.get(name)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        start = time.perf_counter()
+        template = compile_fn()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._templates[name] = (version, template)
+            stats = self._stats.setdefault(name, PromptStats())
+            stats.compiles += 1
+            stats.compile_seconds += elapsed
+        return template
+
+    def render(self, name: str, version: Hashable, compile_fn: Callable[[], PromptTemplate],
+               **values) -> Tuple[str, str]:
+        """Returns (system, prompt) for the named template under this schema version"""
+        template = self.get(name, version, compile_fn)
+        start = time.perf_counter()
+        prompt = template.render(**values)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats = self._stats.setdefault(name, PromptStats())
+            stats.renders += 1
+            stats.render_seconds += elapsed
+            stats.prompt_tokens += estimate_tokens(template.system) + estimate_tokens(prompt)
+            stats.static_tokens += template.static_tokens
+        return template.system, prompt
+
+    def invalidate(self, name: Optional[str] = None):
+        with self._lock:
+            if name is None:
+                self._templates.clear()
+            else:
+                self._templates.pop(name, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self._stats.items()}
@@ -0,0 +1,185 @@
+import re
+import sqlite3
+import string
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+FILLER_PREFIXES = ('eureka', 'please', 'can you tell me', 'could you tell me', 'can you', 'could you', 'tell me')
+
+def normalize_request(text: str) -> str:
+    """Canonical form of a user utterance: lowercase, no punctuation, no polite prefixes"""
+    txt = text.lower().translate(str.maketrans('', '', string.punctuation))
+    txt = re.sub(r'\s+', ' ', txt).strip()
+    changed = True
+    while changed:
+        changed = False
+        for prefix in FILLER_PREFIXES:
+            if txt.startswith(prefix + ' '):
+                txt = txt[len(prefix) + 1:]
+                changed = True
+    if txt.endswith(' please'):
+        txt = txt[:-len(' please')]
+    return txt
+
+
+class LRUCache:
+    """Size-bounded LRU mapping with an optional per-entry TTL and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: 'OrderedDict[Any, tuple]' = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, stored_at = item
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class QueryCache:
+    """Two-level cache in front of the LLM.
+
+    Level 1 maps (normalized request, schema fingerprint) to generated SQL and
+    can be persisted to a SQLite file. Level 2 maps SQL to its spoken summary
+    with a short TTL. Both levels are dropped when the schema fingerprint
+    changes.
+    """
+
+    def __init__(self, max_sql_entries: int = 256, max_summary_entries: int = 128,
+                 summary_ttl: float = 120, path: Optional[str] = None):
+        self.sql_cache = LRUCache(max_sql_entries)
+        self.summary_cache = LRUCache(max_summary_entries, ttl=summary_ttl)
+        self.fingerprint: Optional[str] = None
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._open_store(path)
+
+    def _open_store(self, path):
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS sql_cache (
+                    request TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    sql TEXT NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (request, fingerprint)
+                )
+            ''')
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[QueryCache] Could not open {path}: {e}")
+            self._db = None
+
+    def _load_store(self, fingerprint):
+        if self._db is None:
+            return
+        rows = self._db.execute(
+            'SELECT request, sql FROM sql_cache WHERE fingerprint = ? ORDER BY last_used DESC LIMIT ?',
+            (fingerprint, self.sql_cache.max_entries)
+        ).fetchall()
+        for request, sql in reversed(rows):
+            self.sql_cache.put((request, fingerprint), sql)
+        if rows:
+            print(f"[QueryCache] Loaded {len(rows)} cached queries")
+
+    def _set_fingerprint(self, fingerprint):
+        if fingerprint == self.fingerprint:
+            return
+        if self.fingerprint is not None:
+            print("[QueryCache] Schema changed, clearing cached queries")
+        self.fingerprint = fingerprint
+        self.sql_cache.clear()
+        self.summary_cache.clear()
+        if self._db is not None:
+            try:
+                self._db.execute('DELETE FROM sql_cache WHERE fingerprint != ?', (fingerprint,))
+                self._db.commit()
+                self._load_store(fingerprint)
+            except sqlite3.Error as e:
+                print(f"[QueryCache] Store error: {e}")
+
+    def get_sql(self, user_request: str, fingerprint: str) -> Optional[str]:
+        """Look up the SQL previously generated for this request under this schema"""
+        with self._lock:
+            self._set_fingerprint(fingerprint)
+            return self.sql_cache.get((normalize_request(user_request), fingerprint))
+
+    def put_sql(self, user_request: str, sql: str):
+        """Remember SQL that executed successfully for a request under the current schema"""
+        with self._lock:
+            if self.fingerprint is None:
+                return
+            request = normalize_request(user_request)
+            self.sql_cache.put((request, self.fingerprint), sql)
+            if self._db is not None:
+                try:
+                    self._db.execute('REPLACE INTO sql_cache VALUES (?, ?, ?, ?)',
+                                     (request, self.fingerprint, sql, time.time()))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"[QueryCache] Store error: {e}")
+
+    def get_summary(self, sql: str) -> Optional[str]:
+        with self._lock:
+            return self.summary_cache.get(sql)
+
+    def put_summary(self, sql: str, summary: str):
+        with self._lock:
+            self.summary_cache.put(sql, summary)
+
+    def clear(self):
+        with self._lock:
+            self.sql_cache.clear()
+            self.summary_cache.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM sql_cache')
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'sql': self.sql_cache.stats(), 'summary': self.summary_cache.stats()}
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,174 @@
+import datetime
+import decimal
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+NUMERIC_TYPES = (int, float, decimal.Decimal)
+TEMPORAL_TYPES = (datetime.date, datetime.datetime)
+TIME_COLUMN = re.compile(r'(date|day|month|year|week|quarter|period|time)', re.IGNORECASE)
+
+def is_number(value) -> bool:
+    return isinstance(value, NUMERIC_TYPES) and not isinstance(value, bool)
+
+
+def spoken_value(value) -> str:
+    """Render a cell the way it should be read aloud"""
+    if value is None:
+        return "nothing"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, (float, decimal.Decimal)):
+        value = float(value)
+        return f"{value:.0f}" if value == int(value) else f"{value:.2f}"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time():
+            return value.date().isoformat()
+        return value.strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def spoken_column(name: str) -> str:
+    """'TotalDue' -> 'total due', 'order_count' -> 'order count'"""
+    words = re.sub(r'(?<=[a-z0-9])(?=[A-Z])|_', ' ', name or '').split()
+    return ' '.join(words).lower()
+
+
+def spoken_list(items: List[str], remaining: int = 0, at_least: bool = False) -> str:
+    """Join items for speech; remaining items not read out are mentioned by count"""
+    if remaining > 0:
+        return f"{', '.join(items)} and {'at least ' if at_least else ''}{remaining} more"
+    if len(items) == 1:
+        return items[0]
+    return f"{', '.join(items[:-1])} and {items[-1]}"
+
+
+class ResultSummarizer:
+    """Registry of local, template-based summaries keyed by result shape.
+
+    classify() names the shape of a result; summarize() returns a spoken
+    summary for shapes that have a handler and None for the rest, which the
+    caller sends to the LLM instead. Extra shapes can be added with
+    register(shape, handler, predicate); custom predicates are checked
+    before the built-in shapes.
+
+    total is how many rows the query produced, or None if unknown. rows
+    may be only the first few of them, so superlatives and remaining counts
+    are only stated outright when rows is the complete result.
+    """
+
+    def __init__(self, max_items: int = 5, max_table_rows: int = 5, max_table_columns: int = 4):
+        self.max_items = max_items
+        self.max_table_rows = max_table_rows
+        self.max_table_columns = max_table_columns
+        self.handlers: Dict[str, Callable] = {}
+        self.predicates: List[tuple] = []
+        self.counts: Dict[str, int] = {}
+        self.llm_fallbacks = 0
+        self.register('scalar', self._scalar)
+        self.register('single_row', self._single_row)
+        self.register('list', self._list)
+        self.register('key_value', self._key_value)
+        self.register('time_series', self._time_series)
+        self.register('small_table', self._small_table)
+
+    def register(self, shape: str, handler: Callable, predicate: Optional[Callable] = None):
+        """handler(columns, rows, total) -> str; predicate(columns, rows) -> bool claims a result"""
+        self.handlers[shape] = handler
+        if predicate is not None:
+            self.predicates.append((shape, predicate))
+
+    def classify(self, columns: Sequence[str], rows: Sequence[tuple]) -> str:
+        for shape, predicate in self.predicates:
+            if predicate(columns, rows):
+                return shape
+        if not rows:
+            return 'empty'
+        if len(rows) == 1:
+            return 'scalar' if len(columns) == 1 else 'single_row'
+        if len(columns) == 1:
+            return 'list'
+        if len(columns) == 2 and all(is_number(row[1]) or row[1] is None for row in rows):
+            keys = [row[0] for row in rows]
+            if all(isinstance(k, TEMPORAL_TYPES) for k in keys) or (
+                    TIME_COLUMN.search(columns[0] or '') and all(is_number(k) for k in keys)):
+                return 'time_series'
+            return 'key_value'
+        if len(rows) <= self.max_table_rows and len(columns) <= self.max_table_columns:
+            return 'small_table'
+        return 'table'
+
+    def summarize(self, columns: Sequence[str], rows: Sequence[tuple], total: Optional[int] = None) -> Optional[str]:
+        shape = self.classify(columns, rows)
+        handler = self.handlers.get(shape)
+        if handler is None:
+            self.llm_fallbacks += 1
+            return None
+        self.counts[shape] = self.counts.get(shape, 0) + 1
+        return handler(columns, rows, total)
+
+    def stats(self) -> Dict[str, Any]:
+        local = sum(self.counts.values())
+        total = local + self.llm_fallbacks
+        return {
+            'local': dict(self.counts),
+            'llm_fallbacks': self.llm_fallbacks,
+            'avoided_fraction': local / total if total else 0.0,
+        }
+
+    @staticmethod
+    def is_complete(rows, total) -> bool:
+        """True when rows is the whole result rather than its first few rows"""
+        return total is not None and total <= len(rows)
+
+    def _items(self, rows, total, render):
+        """The first max_items rows, spoken, with the rest mentioned by count"""
+        items = [render(row) for row in rows[:self.max_items]]
+        if total is not None:
+            return spoken_list(items, total - len(items))
+        # Only the fetched rows are known to exist
+        return spoken_list(items, len(rows) - len(items), at_least=True)
+
+    # Built-in shapes
+
+    def _scalar(self, columns, rows, total):
+        name = spoken_column(columns[0])
+        value = spoken_value(rows[0][0])
+        return f"The {name} is {value}." if name else f"The result is {value}."
+
+    def _single_row(self, columns, rows, total):
+        parts = [f"{key}: {spoken_value(value)}" for key, value in zip(columns, rows[0])]
+        return "Result: " + ", ".join(parts) + "."
+
+    def _list(self, columns, rows, total):
+        name = spoken_column(columns[0]) or "results"
+        return f"The {name} values are {self._items(rows, total, lambda row: spoken_value(row[0]))}."
+
+    def _key_value(self, columns, rows, total):
+        items = self._items(rows, total, lambda row: f"{spoken_value(row[0])}: {spoken_value(row[1])}")
+        summary = f"By {spoken_column(columns[0]) or 'key'}, {items}."
+        numbered = [row for row in rows if row[1] is not None]
+        if len(rows) > self.max_items and numbered:
+            top = max(numbered, key=lambda row: row[1])
+            scope = "The highest" if self.is_complete(rows, total) else f"Among the first {len(rows)}, the highest"
+            summary += f" {scope} is {spoken_value(top[0])} with {spoken_value(top[1])}."
+        return summary
+
+    def _time_series(self, columns, rows, total):
+        points = sorted((row for row in rows if row[1] is not None), key=lambda row: row[0])
+        if not points:
+            return self._key_value(columns, rows, total)
+        value_name = spoken_column(columns[1]) or "the value"
+        first, last = points[0], points[-1]
+        peak = max(points, key=lambda row: row[1])
+        scope = "From" if self.is_complete(rows, total) else f"In the first {len(rows)} rows, from"
+        summary = (f"{scope} {spoken_value(first[0])} to {spoken_value(last[0])}, {value_name} went from "
+                   f"{spoken_value(first[1])} to {spoken_value(last[1])}")
+        return summary + f", peaking at {spoken_value(peak[1])} in {spoken_value(peak[0])}."
+
+    def _small_table(self, columns, rows, total):
+        lines = [", ".join(f"{key}: {spoken_value(value)}" for key, value in zip(columns, row)) for row in rows]
+        return "; ".join(lines) + "."
@@ -0,0 +1,196 @@
+import threading
+from typing import Callable, Optional
+
+class StreamBuffer:
+    """Blocking FIFO of PCM bytes over a fixed-size bytearray ring.
+
+    One producer (the synthesizer) writes chunks as they arrive and calls
+    finish() when done; one consumer (the output stream) reads until read()
+    returns b''. cancel() aborts both sides and runs on_cancel so the
+    producer can stop synthesizing.
+    """
+
+    def __init__(self, capacity: int = 1 << 20, sample_rate: int = 16000,
+                 sample_width: int = 2, channels: int = 1):
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.error: Optional[BaseException] = None
+        self.on_cancel: Optional[Callable[[], None]] = None
+        self.handle = None  # keeps the producer's synthesizer alive
+        self._buf = bytearray(capacity)
+        self._start = 0
+        self._size = 0
+        self._finished = False
+        self._cancelled = False
+        self._cond = threading.Condition()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.sample_width * self.channels
+
+    def write(self, data: bytes, timeout: Optional[float] = 5.0) -> bool:
+        """Append data, waiting for room if the ring is full. Returns False once cancelled."""
+        view = memoryview(data)
+        while len(view):
+            with self._cond:
+                if not self._cond.wait_for(lambda: self._cancelled or self._size < self.capacity, timeout):
+                    raise TimeoutError("Audio buffer is full and nobody is reading it")
+                if self._cancelled:
+                    return False
+                end = (self._start + self._size) % self.capacity
+                n = min(len(view), self.capacity - self._size, self.capacity - end)
+                self._buf[end:end + n] = view[:n]
+                self._size += n
+                self._cond.notify_all()
+            view = view[n:]
+        return True
+
+    def try_write(self, data: bytes) -> bool:
+        """Append all of data without waiting; False (nothing written) if cancelled or there isn't room.
+
+        For producers that must not block, such as SDK event callbacks.
+        """
+        view = memoryview(data).cast('B')
+        with self._cond:
+            if self._cancelled or len(view) > self.capacity - self._size:
+                return False
+            end = (self._start + self._size) % self.capacity
+            first = min(len(view), self.capacity - end)
+            self._buf[end:end + first] = view[:first]
+            self._buf[:len(view) - first] = view[first:]
+            self._size += len(view)
+            self._cond.notify_all()
+        return True
+
+    def read(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+        """Return up to max_bytes, blocking until data arrives.
+
+        b'' means the stream has ended, was cancelled, or the timeout expired.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._size or self._finished or self._cancelled, timeout)
+            if self._cancelled or not self._size:
+                return b''
+            n = min(max_bytes, self._size, self.capacity - self._start)
+            data = bytes(self._buf[self._start:self._start + n])
+            self._start = (self._start + n) % self.capacity
+            self._size -= n
+            self._cond.notify_all()
+            return data
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Mark the end of the stream (called by the producer)"""
+        with self._cond:
+            self.error = error
+            self._finished = True
+            self._cond.notify_all()
+
+    def cancel(self):
+        """Abort the stream (called by the consumer)"""
+        with self._cond:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            self._cond.notify_all()
+        if self.on_cancel:
+            try:
+                self.on_cancel()
+            except Exception as e:
+                print(f"[Audio] Error cancelling synthesis: {e}")
+
+
+class CaptureBuffer:
+    """Fixed-size ring of microphone PCM that never blocks the audio callback.
+
+    The backing bytearray is twice the capacity and every write lands in
+    both halves, so any window of up to capacity bytes is one contiguous
+    slice and reads hand out memoryviews instead of copies. A view stays
+    valid until the writer laps it; copy it with bytes() to keep it longer.
+    When the reader falls behind, the oldest unread audio is overwritten and
+    counted in overflow_bytes.
+    """
+
+    def __init__(self, seconds: float = 10.0, sample_rate: int = 16000,
+                 sample_width: int = 2, channels: int = 1):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.frame_bytes = sample_width * channels
+        self.capacity = max(1, int(seconds * sample_rate)) * self.frame_bytes
+        self._buf = bytearray(2 * self.capacity)
+        self._view = memoryview(self._buf)
+        self._written = 0  # total bytes ever written
+        self._consumed = 0  # total bytes handed to read()
+        self.overflows = 0
+        self.overflow_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.frame_bytes
+
+    def write(self, data: bytes):
+        view = memoryview(data).cast('B')
+        total = len(view)
+        if total > self.capacity:
+            view = view[total - self.capacity:]
+        with self._lock:
+            pos = (self._written + total - len(view)) % self.capacity
+            first = min(len(view), self.capacity - pos)
+            for start, part in ((pos, view[:first]), (0, view[first:])):
+                if len(part):
+                    self._buf[start:start + len(part)] = part
+                    self._buf[start + self.capacity:start + self.capacity + len(part)] = part
+            self._written += total
+            unread = self._written - self._consumed
+            if unread > self.capacity:
+                self.overflows += 1
+                self.overflow_bytes += unread - self.capacity
+                self._consumed = self._written - self.capacity
+
+    def _window(self, start: int, n: int) -> memoryview:
+        pos = start % self.capacity
+        return self._view[pos:pos + n]
+
+    def available(self) -> int:
+        """Unread bytes"""
+        with self._lock:
+            return self._written - self._consumed
+
+    def read(self, max_bytes: Optional[int] = None) -> memoryview:
+        """Consume and return unread audio, oldest first, whole frames only"""
+        with self._lock:
+            n = self._written - self._consumed
+            if max_bytes is not None:
+                n = min(n, max_bytes)
+            n -= n % self.frame_bytes
+            view = self._window(self._consumed, n)
+            self._consumed += n
+            return view
+
+    def last(self, ms: float) -> memoryview:
+        """The most recent ms of audio, whether read or not, without consuming anything"""
+        n = int(ms * self.sample_rate / 1000) * self.frame_bytes
+        with self._lock:
+            n = min(n, self._written, self.capacity)
+            return self._window(self._written - n, n)
+
+    def clear(self):
+        with self._lock:
+            self._consumed = self._written
+
+    def stats(self):
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'unread': self._written - self._consumed,
+                'written': self._written,
+                'overflows': self.overflows,
+                'overflow_bytes': self.overflow_bytes,
+            }
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+CATALOG_FILE = 'attendance_catalog.json'
+
+class AttendanceCatalog:
+    """Persistent record of which table holds attendance data.
+
+    The entry is tagged with the schema version it was discovered under and
+    is dropped as soon as the database reports a different version.
+    """
+
+    def __init__(self, path: str = CATALOG_FILE, check_interval: float = 300):
+        self.path = path
+        self.check_interval = check_interval
+        self.entry: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entry = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Catalog] Could not read {self.path}: {e}")
+            self.entry = None
+
+    def _save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entry, f, indent=2)
+        except OSError as e:
+            print(f"[Catalog] Could not write {self.path}: {e}")
+
+    def get(self, version_fn: Callable[[], Optional[str]]) -> Optional[Dict[str, Any]]:
+        """Return the cached entry, or None if there is none or it is stale.
+
+        version_fn is only called once per check_interval, so most lookups
+        cost no database round trip at all.
+        """
+        if self.entry is None:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            version = version_fn()
+            self._checked_at = now
+            if version is not None and version != self.entry.get('schema_version'):
+                print("[Catalog] Schema changed, discarding cached attendance table")
+                self.invalidate()
+                return None
+        return self.entry
+
+    def put(self, schema_version: Optional[str], table_info: Optional[Dict[str, Any]]):
+        """Store the discovery result (table_info None means no table was found)"""
+        self.entry = {
+            'schema_version': schema_version,
+            'table': table_info,
+        }
+        self._checked_at = time.monotonic()
+        self._save()
+
+    def invalidate(self):
+        self.entry = None
+        self._checked_at = 0.0
+        if os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class SchemaCatalog:
+    """In-memory index of every column of every base table, keyed by schema, table and column.
+
+    All columns are fetched with one set-based query through loader(), which
+    must return rows carrying TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME,
+    DATA_TYPE, IS_NULLABLE and CHARACTER_MAXIMUM_LENGTH in ordinal order.
+    After ttl seconds the catalog asks version_fn() whether the schema
+    changed and only reloads if it did.
+    """
+
+    COLUMN_FIELDS = ('COLUMN_NAME', 'DATA_TYPE', 'IS_NULLABLE', 'CHARACTER_MAXIMUM_LENGTH')
+
+    def __init__(self, loader: Callable[[], List[Dict[str, Any]]],
+                 version_fn: Optional[Callable[[], Optional[str]]] = None, ttl: float = 300):
+        self.loader = loader
+        self.version_fn = version_fn
+        self.ttl = ttl
+        self.schemas: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self.fingerprint: Optional[str] = None
+        self._tables_by_name: Dict[str, List[Tuple[str, str]]] = {}
+        self._columns_by_table: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self._schema_version: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Reload the whole catalog with a single query"""
+        with self._lock:
+            self._load()
+
+    def invalidate(self):
+        """Drop the catalog so the next lookup reloads it"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _load(self):
+        version = self.version_fn() if self.version_fn else None
+        rows = self.loader()
+        schemas: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for row in rows:
+            columns = schemas.setdefault(row['TABLE_SCHEMA'], {}).setdefault(row['TABLE_NAME'], [])
+            columns.append({field: row.get(field) for field in self.COLUMN_FIELDS})
+
+        tables_by_name: Dict[str, List[Tuple[str, str]]] = {}
+        columns_by_table: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        digest = hashlib.sha1()
+        for schema in sorted(schemas):
+            for table in sorted(schemas[schema]):
+                tables_by_name.setdefault(table.lower(), []).append((schema, table))
+                columns = schemas[schema][table]
+                columns_by_table[(schema.lower(), table.lower())] = {
+                    col['COLUMN_NAME'].lower(): col for col in columns
+                }
+                for col in columns:
+                    digest.update(f"{schema}.{table}.{col['COLUMN_NAME']}:{col['DATA_TYPE']};".encode('utf-8'))
+
+        self.schemas = schemas
+        self._tables_by_name = tables_by_name
+        self._columns_by_table = columns_by_table
+        self.fingerprint = digest.hexdigest()
+        self._schema_version = version
+        self._loaded_at = time.monotonic()
+        print(f"[Catalog] Loaded {len(columns_by_table)} tables, {len(rows)} columns")
+
+    def _ensure_fresh(self):
+        with self._lock:
+            if self._loaded_at is None:
+                self._load()
+                return
+            if time.monotonic() - self._loaded_at < self.ttl:
+                return
+            version = self.version_fn() if self.version_fn else None
+            if version is not None and version == self._schema_version:
+                self._loaded_at = time.monotonic()
+            else:
+                self._load()
+
+    def current_fingerprint(self) -> Optional[str]:
+        """Hash of all table and column definitions; changes whenever the catalog content does"""
+        self._ensure_fresh()
+        return self.fingerprint
+
+    @staticmethod
+    def _split_name(table_name: str) -> Tuple[Optional[str], str]:
+        parts = [part.strip('[]') for part in table_name.split('.')]
+        if len(parts) >= 2:
+            return parts[-2], parts[-1]
+        return None, parts[0]
+
+    def table_names(self) -> List[str]:
+        """All base tables as schema.table, ordered by schema then table"""
+        self._ensure_fresh()
+        return [f"{schema}.{table}"
+                for schema in sorted(self.schemas, key=str.lower)
+                for table in sorted(self.schemas[schema], key=str.lower)]
+
+    def resolve(self, table_name: str) -> List[str]:
+        """Schema-qualified names of every table matching a (possibly unqualified) name"""
+        self._ensure_fresh()
+        schema, table = self._split_name(table_name)
+        matches = self._tables_by_name.get(table.lower(), [])
+        if schema is not None:
+            matches = [m for m in matches if m[0].lower() == schema.lower()]
+        return [f"{s}.{t}" for s, t in matches]
+
+    def columns(self, table_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Column metadata for a table, or None if the table is unknown.
+
+        An unqualified name returns the columns of every table with that name,
+        which matches what the old per-table INFORMATION_SCHEMA query did.
+        """
+        self._ensure_fresh()
+        schema, table = self._split_name(table_name)
+        result = []
+        for s, t in self._tables_by_name.get(table.lower(), []):
+            if schema is None or s.lower() == schema.lower():
+                result.extend(self.schemas[s][t])
+        return result or None
+
+    def column_names(self, table_name: str) -> List[str]:
+        columns = self.columns(table_name)
+        return [col['COLUMN_NAME'] for col in columns] if columns else []
+
+    def find_column(self, table_name: str, column_name: str) -> Optional[Dict[str, Any]]:
+        """Case-insensitive lookup of a single column"""
+        self._ensure_fresh()
+        for qualified in self.resolve(table_name):
+            schema, table = self._split_name(qualified)
+            col = self._columns_by_table[(schema.lower(), table.lower())].get(column_name.lower())
+            if col:
+                return col
+        return None
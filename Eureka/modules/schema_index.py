@@ -0,0 +1,171 @@
+import math
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+STOPWORDS = {
+    'a', 'all', 'an', 'and', 'are', 'by', 'did', 'do', 'does', 'for', 'from', 'get', 'give', 'has', 'have',
+    'how', 'i', 'in', 'is', 'it', 'list', 'many', 'me', 'much', 'my', 'of', 'on', 'or', 'our', 'please',
+    'show', 'tell', 'the', 'their', 'there', 'to', 'was', 'we', 'were', 'what', 'when', 'where', 'which',
+    'who', 'with', 'eureka',
+}
+
+_WORD = re.compile(r'[A-Za-z]+|\d+')
+_CAMEL = re.compile(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+
+def stem(word: str) -> str:
+    """Crude plural folding so 'employees' finds Employee and 'addresses' finds Address"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('sses', 'xes', 'ches', 'shes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def identifier_terms(name: str) -> List[str]:
+    """'SalesOrderHeader' -> ['sale', 'order', 'header'], 'order_date' -> ['order', 'date']"""
+    words = _CAMEL.sub(' ', name.replace('_', ' '))
+    return [stem(w.lower()) for w in _WORD.findall(words)]
+
+
+def query_terms(text: str) -> List[str]:
+    return [stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English and identifiers)"""
+    return (len(text) + 3) // 4
+
+
+class SchemaIndex:
+    """BM25 index over table and column names, for picking the tables a request is about.
+
+    Each table is one document: its schema and table name terms (weighted
+    up by table_boost) plus every column name term. Query words missing from
+    the vocabulary are mapped to the closest indexed term by character
+    trigram overlap, which absorbs spelling and speech-recognition slips.
+    """
+
+    def __init__(self, schemas: Dict[str, Dict[str, List[Dict]]], table_boost: int = 3,
+                 k1: float = 1.2, b: float = 0.75, min_similarity: float = 0.5):
+        self.k1 = k1
+        self.b = b
+        self.min_similarity = min_similarity
+        self.tables: List[str] = []
+        self.columns: List[List[str]] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        lengths = []
+        for schema in sorted(schemas, key=str.lower):
+            for table in sorted(schemas[schema], key=str.lower):
+                doc = len(self.tables)
+                column_names = [col['COLUMN_NAME'] for col in schemas[schema][table]]
+                self.tables.append(f"{schema}.{table}")
+                self.columns.append(column_names)
+                terms = (identifier_terms(schema) + identifier_terms(table)) * table_boost
+                for column in column_names:
+                    terms += identifier_terms(column)
+                for term in terms:
+                    counts = self.postings.setdefault(term, {})
+                    counts[doc] = counts.get(doc, 0) + 1
+                lengths.append(len(terms))
+        self.lengths = lengths
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        self.idf = {
+            term: math.log(1 + (len(lengths) - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        self._trigram_terms: Dict[str, Set[str]] = {}
+        for term in self.postings:
+            for gram in _trigrams(term):
+                self._trigram_terms.setdefault(gram, set()).add(term)
+
+    def _closest_term(self, word: str) -> Optional[str]:
+        grams = _trigrams(word)
+        overlap: Dict[str, int] = {}
+        for gram in grams:
+            for term in self._trigram_terms.get(gram, ()):
+                overlap[term] = overlap.get(term, 0) + 1
+        best, best_score = None, self.min_similarity
+        for term, shared in overlap.items():
+            score = shared / (len(grams) + len(_trigrams(term)) - shared)
+            if score >= best_score:
+                best, best_score = term, score
+        return best
+
+    def expand(self, text: str) -> List[str]:
+        terms = []
+        for word in query_terms(text):
+            if word in self.postings:
+                terms.append(word)
+            else:
+                closest = self._closest_term(word)
+                if closest:
+                    terms.append(closest)
+        return terms
+
+    def search(self, text: str, k: int = 8) -> List[Tuple[str, float, Set[str]]]:
+        """Top k tables as (schema.table, score, matched query terms), best first"""
+        scores: Dict[int, float] = {}
+        matched: Dict[int, Set[str]] = {}
+        for term in set(self.expand(text)):
+            idf = self.idf[term]
+            for doc, tf in self.postings[term].items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / self.avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched.setdefault(doc, set()).add(term)
+        ranked = sorted(scores, key=lambda doc: (-scores[doc], self.tables[doc]))[:k]
+        return [(self.tables[doc], scores[doc], matched[doc]) for doc in ranked]
+
+    def table_columns(self, table: str) -> List[str]:
+        return self.columns[self.tables.index(table)]
+
+
+def order_columns(columns: List[str], terms: Set[str]) -> List[str]:
+    """Columns that match the request first, then keys, names and dates, then the rest"""
+    def rank(column):
+        column_terms = set(identifier_terms(column))
+        if column_terms & terms:
+            return -len(column_terms & terms)
+        if column_terms & {'id', 'name', 'date', 'title'}:
+            return 1
+        return 2
+    return sorted(columns, key=rank)
+
+
+def build_schema_section(index: SchemaIndex, user_request: str, budget_tokens: int = 600,
+                         max_tables: int = 8, max_columns: int = 25) -> Tuple[str, List[str]]:
+    """Schema lines for the tables most relevant to the request, within budget_tokens.
+
+    Returns (text, tables included). Each table is one line,
+    "Schema.Table: [col, col, ...]", with the most useful columns first;
+    the column list is cut short rather than leaving out a relevant table.
+    """
+    ranked = index.search(user_request, k=max_tables)
+    if not ranked:
+        # Nothing matched: offer the first tables so the model can still answer
+        ranked = [(table, 0.0, set()) for table in index.tables[:max_tables]]
+    lines: List[str] = []
+    tables: List[str] = []
+    used = 0
+    for table, _, terms in ranked:
+        columns = order_columns(index.table_columns(table), terms)
+        shown = columns[:max_columns]
+        while True:
+            more = len(columns) - len(shown)
+            line = f"{table}: [{', '.join(shown)}{f', ... {more} more' if more else ''}]"
+            cost = estimate_tokens(line) + 1
+            if used + cost <= budget_tokens or len(shown) <= 3:
+                break
+            shown = shown[:max(3, len(shown) * 2 // 3)]
+        if used + cost > budget_tokens and lines:
+            break
+        lines.append(line)
+        tables.append(table)
+        used += cost
+    return "\n".join(lines), tables
@@ -0,0 +1,199 @@
+import re
+import time
+from typing import List, Optional
+
+FORBIDDEN = re.compile(
+    r'\b(INSERT|UPDATE|DELETE|MERGE|DROP|ALTER|CREATE|TRUNCATE|EXEC|EXECUTE|GRANT|REVOKE|DENY|'
+    r'BACKUP|RESTORE|SHUTDOWN|DBCC|INTO|OPENROWSET|OPENQUERY|OPENDATASOURCE|WAITFOR)\b|\bxp_\w+',
+    re.IGNORECASE
+)
+AGGREGATE = re.compile(r'\b(COUNT|COUNT_BIG|SUM|AVG|MIN|MAX|STDEV|STDEVP|VAR|VARP|STRING_AGG)\s*\(', re.IGNORECASE)
+SELECT_HEAD = re.compile(r'SELECT(\s+(?:ALL|DISTINCT))?', re.IGNORECASE)
+EXISTING_TOP = re.compile(r'\s+TOP\s*(\(\s*(\d+)\s*\)|(\d+))(\s+PERCENT)?', re.IGNORECASE)
+LIST_HEAD = re.compile(r'\s*(?:ALL|DISTINCT)?\s*(?:TOP\s*(?:\(\s*\d+\s*\)|\d+)(?:\s+PERCENT)?(?:\s+WITH\s+TIES)?)?',
+                       re.IGNORECASE)
+# What may surround the aggregate calls of a single-row select item: arithmetic, numbers and an alias
+AGGREGATE_REST = re.compile(r'[\s\d.+\-*/%]*(?:(?:\bAS\s+)?(?:\w+|\[\s*\]|"\s*"|\'\s*\'))?\s*', re.IGNORECASE)
+
+class UnsafeQueryError(Exception):
+    """Raised when generated SQL is not a single read-only SELECT"""
+
+
+class GuardedQuery:
+    """Outcome of running a statement through SqlGuard"""
+    __slots__ = ('sql', 'original', 'rewrite', 'capped', 'table', 'analysis_ms')
+
+    def __init__(self, sql: str, original: str, rewrite: Optional[str], capped: bool,
+                 table: Optional[str], analysis_ms: float):
+        self.sql = sql
+        self.original = original
+        self.rewrite = rewrite
+        self.capped = capped
+        self.table = table
+        self.analysis_ms = analysis_ms
+
+
+def mask_literals(sql: str) -> str:
+    """Blank out string literals, quoted identifiers and comments, keeping every offset intact"""
+    out = list(sql)
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch == '-' and sql.startswith('--', i):
+            end = sql.find('\n', i)
+            end = n if end == -1 else end
+        elif ch == '/' and sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+        elif ch in ("'", '"', '['):
+            close = ']' if ch == '[' else ch
+            end = i + 1
+            while end < n:
+                if sql[end] == close:
+                    # A doubled quote is an escaped quote, not the end of the literal
+                    if end + 1 < n and sql[end + 1] == close:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            end = min(end + 1, n)
+            # Keep the delimiters so the literal still separates tokens
+            for j in range(i + 1, end - 1):
+                out[j] = ' '
+            i = end
+            continue
+        else:
+            i += 1
+            continue
+        for j in range(i, end):
+            out[j] = ' '
+        i = end
+    return ''.join(out)
+
+
+def _depths(masked: str) -> List[int]:
+    depths = []
+    depth = 0
+    for ch in masked:
+        if ch == '(':
+            depth += 1
+        depths.append(depth)
+        if ch == ')':
+            depth -= 1
+    return depths
+
+
+def _aggregate_item(item: str) -> bool:
+    """True if a masked select item is built only from aggregate calls, e.g. COUNT(*) or SUM(a) / COUNT(*) AS avg"""
+    depths = _depths(item)
+    rest, end = [], 0
+    calls = [m for m in AGGREGATE.finditer(item) if depths[m.start()] == 0]
+    for call in calls:
+        rest.append(item[end:call.start()])
+        end = call.end()
+        # The call ends at the parenthesis that brings the depth back to zero
+        while end < len(item) and not (item[end] == ')' and depths[end] == 1):
+            end += 1
+        end += 1
+    rest.append(item[end:])
+    rest = ''.join(rest)
+    # Any other parentheses are a window (OVER), another function or a subquery
+    return bool(calls) and '(' not in rest and ')' not in rest and AGGREGATE_REST.fullmatch(rest) is not None
+
+
+def single_row_select(select_list: str) -> bool:
+    """True if every top-level item of a masked select list is an aggregate, so without GROUP BY it returns one row"""
+    select_list = select_list[LIST_HEAD.match(select_list).end():]
+    depths = _depths(select_list)
+    items, start = [], 0
+    for i, ch in enumerate(select_list):
+        if ch == ',' and depths[i] == 0:
+            items.append(select_list[start:i])
+            start = i + 1
+    items.append(select_list[start:])
+    return all(_aggregate_item(item) for item in items)
+
+
+def main_select_start(sql: str) -> Optional[int]:
+    """Offset of the statement's first top-level SELECT, i.e. the one after any WITH clause.
+
+    None for compound (UNION/INTERSECT/EXCEPT) or paged (OFFSET/FETCH)
+    statements, whose rows can't simply be counted from the outside.
+    """
+    masked = mask_literals(sql)
+    depths = _depths(masked)
+
+    def top_level(pattern):
+        return [m for m in re.finditer(pattern, masked, re.IGNORECASE) if depths[m.start()] == 0]
+
+    selects = top_level(r'\bSELECT\b')
+    if len(selects) != 1 or top_level(r'\b(UNION|INTERSECT|EXCEPT|OFFSET|FETCH)\b'):
+        return None
+    return selects[0].start()
+
+
+class SqlGuard:
+    """Checks LLM-generated SQL before it reaches the database.
+
+    Anything other than a single SELECT (optionally behind a WITH clause) is
+    rejected. Row-returning queries get a TOP max_rows clause, or have an
+    existing larger TOP lowered; single-row aggregates are left alone.
+    """
+
+    def __init__(self, max_rows: int = 1000, timeout: Optional[int] = 15):
+        self.max_rows = max_rows
+        self.timeout = timeout
+
+    def _top_level(self, pattern: str, masked: str, depths: List[int]):
+        return [m for m in re.finditer(pattern, masked, re.IGNORECASE) if depths[m.start()] == 0]
+
+    def check(self, sql: str) -> GuardedQuery:
+        start = time.perf_counter()
+        original = sql
+        sql = sql.strip().rstrip(';').strip()
+        masked = mask_literals(sql)
+
+        if not masked.strip():
+            raise UnsafeQueryError("Empty statement")
+        if ';' in masked:
+            raise UnsafeQueryError("Only a single statement is allowed")
+        first = re.match(r'\s*(\w+)', masked)
+        if not first or first.group(1).upper() not in ('SELECT', 'WITH'):
+            raise UnsafeQueryError(f"Only SELECT statements are allowed, got {first.group(1) if first else masked[:10]!r}")
+        forbidden = FORBIDDEN.search(masked)
+        if forbidden:
+            raise UnsafeQueryError(f"Statement contains forbidden keyword {forbidden.group(0).upper()}")
+
+        depths = _depths(masked)
+        rewrite, capped, table = None, False, None
+        selects = self._top_level(r'\bSELECT\b', masked, depths)
+        froms = self._top_level(r'\bFROM\b', masked, depths)
+        if froms:
+            table_match = re.match(r'FROM\s+([\w\.\[\]]+)', sql[froms[0].start():], re.IGNORECASE)
+            table = table_match.group(1) if table_match else None
+
+        if len(selects) > 1 or self._top_level(r'\b(UNION|INTERSECT|EXCEPT)\b', masked, depths):
+            print("[SqlGuard] Compound query left unbounded")
+        elif selects and not self._top_level(r'\b(OFFSET|FETCH)\b', masked, depths):
+            main = selects[0]
+            select_end = next((m.start() for m in froms if m.start() > main.start()), len(masked))
+            select_list = masked[main.end():select_end]
+            grouped = bool(self._top_level(r'\bGROUP\s+BY\b', masked, depths))
+            if not froms or (single_row_select(select_list) and not grouped):
+                pass  # returns a single row
+            else:
+                head = SELECT_HEAD.match(sql, main.start())
+                top = EXISTING_TOP.match(sql, head.end())
+                if top is None:
+                    sql = f"{sql[:head.end()]} TOP {self.max_rows}{sql[head.end():]}"
+                    rewrite = f"Injected TOP {self.max_rows}"
+                    capped = True
+                elif not top.group(4):
+                    current = int(top.group(2) or top.group(3))
+                    if current > self.max_rows:
+                        sql = f"{sql[:head.end()]} TOP {self.max_rows}{sql[top.end():]}"
+                        rewrite = f"Lowered TOP {current} to TOP {self.max_rows}"
+                        capped = True
+
+        return GuardedQuery(sql, original, rewrite, capped, table,
+                            (time.perf_counter() - start) * 1000)
@@ -0,0 +1,192 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+# WAL lets readers run while the writer commits; NORMAL only fsyncs at
+# checkpoints, which in WAL mode can lose the last commits on power loss
+# but never corrupts the database.
+DEFAULT_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -8000,        # KiB, i.e. 8 MB of page cache per connection
+    'mmap_size': 64 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+class StoreClosed(Exception):
+    """Raised for writes submitted after the store was closed"""
+
+
+class SqliteStore:
+    """SQLite database in WAL mode with one writer thread and per-thread readers.
+
+    Writes are functions of the writer's connection, queued with submit()
+    or run(). The writer takes everything waiting in the queue (up to
+    max_batch) and applies it in one transaction with one commit, each
+    write inside its own savepoint so a failing write is rolled back
+    without affecting the others in the batch. Reads use a connection
+    private to the calling thread, so they never wait for the writer.
+    """
+
+    def __init__(self, path: str, pragmas: Optional[Dict[str, Any]] = None, max_batch: int = 256):
+        self.path = path
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            'writes': 0,
+            'write_errors': 0,
+            'commits': 0,
+            'max_batch': 0,
+            'max_queue': 0,
+            'commit_time_total': 0.0,
+        }
+        # Autocommit mode: the writer issues BEGIN/COMMIT itself
+        conn = self._connect(isolation_level=None, check_same_thread=False)
+        self.journal_mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+        if self.journal_mode != 'wal':
+            print(f"[Store] WAL not available for {path}, using {self.journal_mode} journal")
+        self._writer = threading.Thread(target=self._write_loop, args=(conn,), daemon=True)
+        self._writer.start()
+
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, **kwargs)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name}={value}')
+        return conn
+
+    # Writes
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue fn(conn) to run on the writer; the future resolves once it is committed"""
+        if self._closed:
+            raise StoreClosed(f"{self.path} is closed")
+        future = Future()
+        self._queue.put((fn, future))
+        depth = self._queue.qsize()
+        if depth > self._stats['max_queue']:
+            self._stats['max_queue'] = depth
+        return future
+
+    def run(self, fn: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = None) -> Any:
+        """submit() and wait for the committed result"""
+        return self.submit(fn).result(timeout)
+
+    def write(self, sql: str, params: Sequence = (), timeout: Optional[float] = None) -> int:
+        """Execute one statement on the writer; returns the row count"""
+        return self.run(lambda conn: conn.execute(sql, params).rowcount, timeout)
+
+    def write_many(self, sql: str, rows: Iterable[Sequence], timeout: Optional[float] = None) -> int:
+        return self.run(lambda conn: conn.executemany(sql, rows).rowcount, timeout)
+
+    def _write_loop(self, conn: sqlite3.Connection):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._apply(conn, batch)
+        conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, batch):
+        start = time.perf_counter()
+        done = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            self._stats['write_errors'] += len(batch)
+            return
+        for fn, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            conn.execute('SAVEPOINT write')
+            try:
+                result = fn(conn)
+            except Exception as e:
+                conn.execute('ROLLBACK TO write')
+                conn.execute('RELEASE write')
+                self._stats['write_errors'] += 1
+                future.set_exception(e)
+                continue
+            conn.execute('RELEASE write')
+            done.append((future, result))
+        try:
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            self._stats['write_errors'] += len(done)
+            for future, _ in done:
+                future.set_exception(e)
+            return
+        self._stats['writes'] += len(done)
+        self._stats['commits'] += 1
+        self._stats['max_batch'] = max(self._stats['max_batch'], len(batch))
+        self._stats['commit_time_total'] += time.perf_counter() - start
+        for future, result in done:
+            future.set_result(result)
+
+    # Reads
+
+    def reader(self) -> sqlite3.Connection:
+        """This thread's read connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self._closed:
+                raise StoreClosed(f"{self.path} is closed")
+            # Only this thread uses it, but close() may close it from another
+            conn = self._connect(check_same_thread=False)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def read(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        return self.reader().execute(sql, params).fetchall()
+
+    def read_one(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        return self.reader().execute(sql, params).fetchone()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        commits = stats.pop('commit_time_total')
+        stats['avg_batch'] = stats['writes'] / stats['commits'] if stats['commits'] else 0.0
+        stats['avg_commit_ms'] = commits / stats['commits'] * 1000 if stats['commits'] else 0.0
+        stats['queued'] = self._queue.qsize()
+        stats['readers'] = len(self._readers)
+        stats['journal_mode'] = self.journal_mode
+        return stats
+
+    def close(self):
+        """Apply queued writes, stop the writer and close every connection"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            try:
+                conn.close()
+            except Exception:
+                pass
@@ -3,15 +3,57 @@ from utils.config import Config
 import sounddevice as sd
 import numpy as np
 import scipy.io.wavfile as wav
+import string
+import threading
+import time
+
+DEFAULT_SEGMENTATION_SILENCE_MS = 500  # Azure's own default
+RESULT_LATENCY_MS = 300  # time for a final result to come back once a segment ends
+
+def normalize_phrase(text):
+    return ' '.join(text.lower().translate(str.maketrans('', '', string.punctuation)).split())
 
 class SpeechRecognizer:
-    def __init__(self, lang=Config.DEFAULT_LANG):
+    def __init__(self, lang=Config.DEFAULT_LANG, use_push_stream=False, segmentation_silence_ms=None,
+                 front_end_delay_ms=0):
+        """use_push_stream feeds the recognizer from self.push_stream instead of the default microphone.
+
+        front_end_delay_ms is how long audio can be held back before it
+        reaches the recognizer (VAD hangover plus end padding); it counts
+        towards how long the gate stays shut after Eureka stops speaking.
+        """
         speech_config = speechsdk.SpeechConfig(
             subscription=Config.SPEECH_KEY,
             region=Config.SPEECH_REGION
         )
         speech_config.speech_recognition_language = lang
-        self.recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config)
+        if segmentation_silence_ms:
+            speech_config.set_property(speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs,
+                                       str(segmentation_silence_ms))
+        self.push_stream = None
+        if use_push_stream:
+            stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=16000, bits_per_sample=16, channels=1)
+            self.push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+            self.recognizer = speechsdk.SpeechRecognizer(
+                speech_config=speech_config,
+                audio_config=speechsdk.audio.AudioConfig(stream=self.push_stream)
+            )
+        else:
+            self.recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config)
+        # While the gate is closed (Eureka is speaking) results are dropped
+        # in-process instead of stopping the recognition session
+        self._gate_lock = threading.Lock()
+        self._gate_closed = False
+        self._gate_reopens_at = 0.0
+        # The echo of the last words spoken only ends its segment after the
+        # front end has passed it on and the recognizer has heard enough silence
+        self.gate_tail = (front_end_delay_ms + (segmentation_silence_ms or DEFAULT_SEGMENTATION_SILENCE_MS)
+                          + RESULT_LATENCY_MS) / 1000
+        self._barged_in = False
+        self.on_barge_in = None
+        self.barge_in_phrases = set()
+        self.dropped = 0
+        self.barge_ins = 0
 
     def recognize_once(self):
         res = self.recognizer.recognize_once()
@@ -19,14 +61,64 @@ class SpeechRecognizer:
             return res.text
         return None
 
-    def start_continuous(self, callback):
+    def start_continuous(self, callback, on_barge_in=None, barge_in_phrases=()):
+        """Recognize continuously; callback gets final text while the gate is open.
+
+        While the gate is closed, a partial or final result that is exactly
+        one of barge_in_phrases calls on_barge_in(text) once; everything
+        else is dropped.
+        """
+        self.on_barge_in = on_barge_in
+        self.barge_in_phrases = {normalize_phrase(p) for p in barge_in_phrases}
+
         def handle(evt):
             if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+                if self.is_gated():
+                    if not self._check_barge_in(evt.result.text):
+                        self.dropped += 1
+                    return
                 callback(evt.result.text)
+
+        def handle_partial(evt):
+            # Partial hypotheses arrive mid-word, well before the final result
+            if self.is_gated():
+                self._check_barge_in(evt.result.text)
+
         self.recognizer.recognized.connect(handle)
+        self.recognizer.recognizing.connect(handle_partial)
         self.recognizer.start_continuous_recognition()
         self._recognition_active = True
 
+    def close_gate(self):
+        """Drop recognition results until open_gate(); the session stays connected"""
+        with self._gate_lock:
+            self._gate_closed = True
+            self._barged_in = False
+
+    def open_gate(self, tail=None):
+        """Accept results again after tail seconds (gate_tail by default), which covers the echo of the last words spoken"""
+        if tail is None:
+            tail = self.gate_tail
+        with self._gate_lock:
+            self._gate_closed = False
+            self._gate_reopens_at = time.monotonic() + tail
+
+    def is_gated(self):
+        with self._gate_lock:
+            return self._gate_closed or time.monotonic() < self._gate_reopens_at
+
+    def _check_barge_in(self, text):
+        if normalize_phrase(text) not in self.barge_in_phrases:
+            return False
+        with self._gate_lock:
+            if self._barged_in:
+                return True
+            self._barged_in = True
+        self.barge_ins += 1
+        if self.on_barge_in:
+            self.on_barge_in(text)
+        return True
+
     def stop_continuous(self):
         self.recognizer.stop_continuous_recognition()
         self._recognition_active = False
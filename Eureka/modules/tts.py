@@ -1,30 +1,484 @@
-import azure.cognitiveservices.speech as speechsdk
-import uuid
+try:
+    import azure.cognitiveservices.speech as speechsdk
+    SPEECHSDK_AVAILABLE = True
+except ImportError:
+    SPEECHSDK_AVAILABLE = False
+
+import math
+import re
+import threading
+import time
+from array import array
+
+from modules.ring_buffer import StreamBuffer
+from modules.tts_cache import PhraseCache, phrase_key
 from utils.config import Config
 
-class TTS:
+VOICES = {
+    'en': 'en-US-JennyNeural',
+    'ur': 'ur-PK-UzmaNeural',
+    'hi': 'hi-IN-MadhurNeural'
+}
+
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\s*\n+\s*')
+CLAUSE_BREAK = re.compile(r'(?<=[,;:])\s+')
+
+def split_for_speech(text, max_chars=160, min_chars=12):
+    """Split a reply into sentences, and over-long sentences into clauses, for chunked synthesis"""
+    pieces = []
+    for sentence in SENTENCE_BREAK.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        current = ''
+        for clause in CLAUSE_BREAK.split(sentence):
+            if current and len(current) + len(clause) + 1 > max_chars:
+                pieces.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}".strip()
+        if current:
+            pieces.append(current)
+    # Fold fragments like "Yes." into the next piece so synthesis isn't choppy
+    merged = []
+    for piece in pieces:
+        if merged and len(merged[-1]) < min_chars:
+            merged[-1] = f"{merged[-1]} {piece}"
+        else:
+            merged.append(piece)
+    return merged
+
+def stream_sentences(chunks):
+    """Regroup streamed text into sentences (or lines), yielding each as soon as it is complete"""
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        parts = SENTENCE_BREAK.split(pending)
+        pending = parts.pop()
+        for sentence in parts:
+            if sentence.strip():
+                yield sentence.strip()
+    if pending.strip():
+        yield pending.strip()
+
+class LatencyStats:
     def __init__(self):
-        self.cfg = speechsdk.SpeechConfig(
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'avg_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+            'last_ms': self.last * 1000,
+        }
+
+
+class _SynthesisJob:
+    def __init__(self, sink):
+        self.sink = sink
+        self.started_at = time.perf_counter()
+        self.first_chunk_at = None
+        self.result_id = None  # id of the SDK result, known once its first event arrives
+        self.future = None
+        self.overflowed = False
+
+
+class PooledSynthesizer:
+    """One long-lived SpeechSynthesizer whose events are routed to whichever job is using it.
+
+    Events are matched to the job by result id, so anything still arriving
+    from an earlier synthesis is dropped. A stopped job keeps the
+    synthesizer until its own canceled or completed event arrives; only
+    then does it go back to the pool.
+    """
+
+    def __init__(self, sdk, cfg, on_done):
+        self.sdk = sdk
+        self.synth = sdk.SpeechSynthesizer(speech_config=cfg, audio_config=None)
+        self.connection = sdk.Connection.from_speech_synthesizer(self.synth)
+        self.job = None
+        self._lock = threading.Lock()
+        self._on_done = on_done
+        self.synth.synthesis_started.connect(self._job_for)
+        self.synth.synthesizing.connect(self._on_chunk)
+        self.synth.synthesis_completed.connect(self._on_completed)
+        self.synth.synthesis_canceled.connect(self._on_canceled)
+
+    def preconnect(self):
+        """Open the service connection now so the first request doesn't pay for it"""
+        self.connection.open(True)
+
+    def run(self, text, sink):
+        job = _SynthesisJob(sink)
+        with self._lock:
+            self.job = job
+        sink.on_cancel = lambda: self._cancel(job)
+        sink.handle = self
+        job.future = self.synth.speak_text_async(text)
+
+    def _job_for(self, evt):
+        """The job this event belongs to, or None for events from another synthesis"""
+        result_id = getattr(evt.result, 'result_id', None)
+        with self._lock:
+            job = self.job
+            if job is None:
+                return None
+            if job.result_id is None:
+                job.result_id = result_id
+            elif job.result_id != result_id:
+                return None
+            return job
+
+    def _on_chunk(self, evt):
+        job = self._job_for(evt)
+        if job is None or job.sink.cancelled or job.overflowed:
+            return
+        if job.first_chunk_at is None:
+            job.first_chunk_at = time.perf_counter()
+        # This runs on the SDK's event thread, so it must never wait for the reader
+        if not job.sink.try_write(evt.result.audio_data) and not job.sink.cancelled:
+            print("[TTS] Audio buffer full, dropping the rest of this piece")
+            job.overflowed = True
+            self._stop(job)
+
+    def _on_completed(self, evt):
+        self._finish(self._job_for(evt), None)
+
+    def _on_canceled(self, evt):
+        job = self._job_for(evt)
+        if job is None:
+            return
+        details = self.sdk.CancellationDetails.from_result(evt.result)
+        self._finish(job, RuntimeError(f"TTS failed: {details.error_details}"))
+
+    def _cancel(self, job):
+        if self.job is job:
+            self._stop(job)
+
+    def _stop(self, job):
+        self.synth.stop_speaking_async()
+        future = job.future
+
+        def wait_for_stop():
+            # The speak future resolves only after this synthesis has ended,
+            # in case its canceled event never reaches us
+            if future is not None:
+                future.get()
+            self._finish(job, None)
+
+        threading.Thread(target=wait_for_stop, daemon=True).start()
+
+    def _finish(self, job, error):
+        with self._lock:
+            if job is None or self.job is not job:
+                return
+            self.job = None
+        if job.sink.cancelled or job.overflowed:
+            error = None  # stopped on purpose; what was buffered still plays
+        job.sink.finish(error)
+        self._on_done(self, job, error)
+
+
+class VoicePool:
+    """Warm synthesizers for one voice; each one serves a single request at a time"""
+
+    def __init__(self, make_synthesizer, max_size=2):
+        self.make_synthesizer = make_synthesizer
+        self.max_size = max_size
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+        try:
+            return self.make_synthesizer()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, synthesizer):
+        with self._cond:
+            self._idle.append(synthesizer)
+            self._cond.notify()
+
+
+class AzureSynthesisBackend:
+    """Streams raw PCM from Azure Speech through the synthesizing event, without touching disk.
+
+    Keeps a small pool of pre-connected synthesizers per voice instead of
+    building one per reply. sdk can be swapped for modules.fake_speechsdk to
+    run without the service.
+    """
+    sample_rate = 24000
+    sample_width = 2
+    channels = 1
+
+    def __init__(self, voices=None, sdk=None, prewarm=True, max_per_voice=2):
+        if sdk is None:
+            if not SPEECHSDK_AVAILABLE:
+                raise RuntimeError("azure-cognitiveservices-speech is not installed")
+            sdk = speechsdk
+        self.sdk = sdk
+        self.max_per_voice = max_per_voice
+        self.voices = sorted(set((voices or VOICES).values()))
+        self.pools = {}
+        self.metrics = {}
+        self._lock = threading.Lock()
+        for voice in self.voices:
+            self._pool(voice)
+        if prewarm:
+            threading.Thread(target=self.warm_up, daemon=True).start()
+
+    def _make_config(self, voice):
+        cfg = self.sdk.SpeechConfig(
             subscription=Config.SPEECH_KEY,
             region=Config.SPEECH_REGION
         )
+        cfg.set_speech_synthesis_output_format(
+            self.sdk.SpeechSynthesisOutputFormat.Raw24Khz16BitMonoPcm
+        )
+        cfg.speech_synthesis_voice_name = voice
+        return cfg
 
-    def synthesize(self, text, lang='en'):
-        voices = {
-            'en': 'en-US-JennyNeural',
-            'ur': 'ur-PK-UzmaNeural',
-            'hi': 'hi-IN-MadhurNeural'
-        }
-        voice = voices.get(lang[:2], voices['en'])
-        self.cfg.speech_synthesis_voice_name = voice
-        # generate and store output filename
-        filename = f"tts_{uuid.uuid4()}.wav"
-        audio_cfg = speechsdk.audio.AudioOutputConfig(filename=filename)
-        # perform synthesis
-        synth = speechsdk.SpeechSynthesizer(speech_config=self.cfg, audio_config=audio_cfg)
-        result = synth.speak_text(text)
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            return filename
-        else:
-            details = speechsdk.CancellationDetails.from_result(result)
-            raise RuntimeError(f"TTS failed: {details.error_details}")
+    def _pool(self, voice):
+        with self._lock:
+            pool = self.pools.get(voice)
+            if pool is None:
+                cfg = self._make_config(voice)
+                on_done = lambda synth, job, error: self._job_done(voice, synth, job, error)
+                pool = VoicePool(lambda: PooledSynthesizer(self.sdk, cfg, on_done), self.max_per_voice)
+                self.pools[voice] = pool
+                self.metrics[voice] = {
+                    'connect': LatencyStats(),
+                    'first_chunk': LatencyStats(),
+                    'total': LatencyStats(),
+                    'errors': 0,
+                }
+            return pool
+
+    def warm_up(self):
+        """Create and connect one synthesizer per voice"""
+        for voice in self.voices:
+            pool = self._pool(voice)
+            try:
+                start = time.perf_counter()
+                synth = pool.acquire()
+                synth.preconnect()
+                with self._lock:
+                    self.metrics[voice]['connect'].add(time.perf_counter() - start)
+                pool.release(synth)
+            except Exception as e:
+                print(f"[TTS] Could not pre-connect {voice}: {e}")
+
+    def start(self, text, voice, sink):
+        synth = self._pool(voice).acquire()
+        synth.run(text, sink)
+
+    def _job_done(self, voice, synth, job, error):
+        now = time.perf_counter()
+        with self._lock:
+            metrics = self.metrics[voice]
+            if error:
+                metrics['errors'] += 1
+            if job.first_chunk_at is not None:
+                metrics['first_chunk'].add(job.first_chunk_at - job.started_at)
+            metrics['total'].add(now - job.started_at)
+        self.pools[voice].release(synth)
+
+    def stats(self):
+        """Per-voice connect, time-to-first-chunk and total synthesis latency"""
+        with self._lock:
+            return {
+                voice: {
+                    name: value.as_dict() if isinstance(value, LatencyStats) else value
+                    for name, value in metrics.items()
+                }
+                for voice, metrics in self.metrics.items()
+            }
+
+
+class FakeSynthesisBackend:
+    """Offline stand-in that 'speaks' a sine tone, for tests and benchmarks without Azure.
+
+    Audio length is proportional to the text; it is produced in chunk_ms
+    pieces at speed times real time after an initial first_chunk_delay.
+    """
+
+    def __init__(self, sample_rate=16000, chars_per_second=15, chunk_ms=50,
+                 speed=4.0, first_chunk_delay=0.05):
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.channels = 1
+        self.chars_per_second = chars_per_second
+        self.chunk_ms = chunk_ms
+        self.speed = speed
+        self.first_chunk_delay = first_chunk_delay
+        self.calls = []
+
+    def _tone(self, n_samples, offset):
+        step = 2 * math.pi * 440 / self.sample_rate
+        return array('h', (int(3000 * math.sin(step * (offset + i))) for i in range(n_samples))).tobytes()
+
+    def start(self, text, voice, sink):
+        self.calls.append((text, voice))
+
+        def produce():
+            time.sleep(self.first_chunk_delay)
+            total = int(len(text) / self.chars_per_second * self.sample_rate)
+            per_chunk = self.sample_rate * self.chunk_ms // 1000
+            produced = 0
+            while produced < total and not sink.cancelled:
+                n = min(per_chunk, total - produced)
+                sink.write(self._tone(n, produced))
+                produced += n
+                time.sleep(self.chunk_ms / 1000 / self.speed)
+            sink.finish()
+
+        threading.Thread(target=produce, daemon=True).start()
+
+
+class _RecordingBuffer(StreamBuffer):
+    """StreamBuffer that keeps a copy of everything written, for the phrase cache"""
+
+    def __init__(self, on_complete, max_record_bytes, **kwargs):
+        super().__init__(**kwargs)
+        self._on_complete = on_complete
+        self._max_record_bytes = max_record_bytes
+        self._recorded = bytearray()
+
+    def write(self, data, timeout=5.0):
+        return self._record(data, super().write(data, timeout))
+
+    def try_write(self, data):
+        return self._record(data, super().try_write(data))
+
+    def _record(self, data, written):
+        if not written:
+            self._recorded = None  # dropped audio must not end up in the cache
+        elif self._recorded is not None:
+            self._recorded += data
+            if len(self._recorded) > self._max_record_bytes:
+                self._recorded = None  # too long to be worth caching
+        return written
+
+    def finish(self, error=None):
+        super().finish(error)
+        if error is None and not self.cancelled and self._recorded:
+            self._on_complete(bytes(self._recorded))
+
+
+_shared_cache = None
+
+def shared_phrase_cache():
+    """Process-wide phrase cache, so every AudioInterface reuses the same audio"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = PhraseCache(
+            max_bytes=int(Config.TTS_CACHE_MEMORY_MB * (1 << 20)),
+            directory=Config.TTS_CACHE_DIR,
+            max_disk_bytes=int(Config.TTS_CACHE_DISK_MB * (1 << 20)),
+            disk_after_uses=Config.TTS_CACHE_DISK_AFTER
+        )
+    return _shared_cache
+
+
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+def shared_synthesis_backend():
+    """Process-wide Azure backend, so every AudioInterface shares one set of warm connections"""
+    global _shared_backend
+    with _shared_backend_lock:
+        if _shared_backend is None:
+            _shared_backend = AzureSynthesisBackend()
+        return _shared_backend
+
+
+class TTS:
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or shared_synthesis_backend()
+        self.cache = cache if cache is not None else shared_phrase_cache()
+        self.audio_format = f"{self.backend.sample_rate}:{self.backend.sample_width}:{self.backend.channels}"
+
+    def stats(self):
+        stats = getattr(self.backend, 'stats', None)
+        stats = stats() if stats else {}
+        if self.cache:
+            stats['phrase_cache'] = self.cache.stats()
+        return stats
+
+    def _buffer(self, cls=StreamBuffer, **kwargs):
+        return cls(
+            sample_rate=self.backend.sample_rate,
+            sample_width=self.backend.sample_width,
+            channels=self.backend.channels,
+            **kwargs
+        )
+
+    def stream(self, text, lang='en', persist=False):
+        """Start synthesizing text and return a StreamBuffer that fills as audio arrives.
+
+        Phrases already in the cache come back as a finished buffer without
+        calling the backend. New audio is cached in memory, and on disk only
+        with persist (or once it has been spoken often enough).
+        """
+        voice = VOICES.get(lang[:2], VOICES['en'])
+        if not self.cache:
+            sink = self._buffer()
+            self.backend.start(text, voice, sink)
+            return sink
+        key = phrase_key(text, voice, self.audio_format)
+        pcm = self.cache.get(key)
+        if pcm is not None:
+            sink = self._buffer(capacity=len(pcm))
+            sink.write(pcm)
+            sink.finish()
+            return sink
+        sink = self._buffer(_RecordingBuffer,
+                            on_complete=lambda pcm: self.cache.put(key, pcm, persist),
+                            max_record_bytes=self.cache.max_disk_bytes // 16)
+        self.backend.start(text, voice, sink)
+        return sink
+
+    def prerender(self, phrases, lang='en'):
+        """Synthesize phrases into the cache ahead of time; already cached ones are skipped"""
+        if not self.cache:
+            return 0
+        voice = VOICES.get(lang[:2], VOICES['en'])
+        rendered = 0
+        for phrase in phrases:
+            # Audio speaks text piece by piece, so cache the same pieces
+            for piece in split_for_speech(phrase):
+                if phrase_key(piece, voice, self.audio_format) in self.cache:
+                    continue
+                sink = self.stream(piece, lang, persist=True)
+                while sink.read(1 << 16):
+                    pass
+                if sink.error:
+                    print(f"[TTS] Could not pre-render {piece!r}: {sink.error}")
+                else:
+                    rendered += 1
+        if rendered:
+            print(f"[TTS] Pre-rendered {rendered} phrases")
+        return rendered
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+def phrase_key(text: str, voice: str, audio_format: str) -> str:
+    """Content address for a synthesized phrase: same text, voice and format give the same key"""
+    text = re.sub(r'\s+', ' ', text).strip()
+    return hashlib.sha1(f"{voice}\n{audio_format}\n{text}".encode('utf-8')).hexdigest()
+
+
+class PhraseCache:
+    """Synthesized PCM keyed by phrase_key().
+
+    Recent phrases are held in memory up to max_bytes (least recently used
+    first out). Phrases put with persist=True, and phrases spoken
+    disk_after_uses times while in memory, are also written to directory as
+    raw .pcm files so they survive restarts, with the directory trimmed to
+    max_disk_bytes; one-off replies stay in memory only. Pass directory=None
+    for a memory-only cache.
+    """
+
+    def __init__(self, max_bytes: int = 16 << 20, directory: Optional[str] = 'tts_cache',
+                 max_disk_bytes: int = 64 << 20, max_entry_bytes: Optional[int] = None,
+                 disk_after_uses: int = 3):
+        self.max_bytes = max_bytes
+        self.disk_after_uses = disk_after_uses
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._uses: Dict[str, int] = {}  # times each memory-only entry was spoken
+        self._bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(directory)
+                                       if entry.name.endswith('.pcm'))
+            except OSError as e:
+                print(f"[TTSCache] Disk cache disabled: {e}")
+                self.directory = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pcm')
+
+    def _remember(self, key, pcm):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = pcm
+        self._bytes += len(pcm)
+        while self._bytes > self.max_bytes and self._entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._uses.pop(evicted_key, None)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            pcm = self._entries.get(key)
+            persist = False
+            if pcm is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                if key in self._uses:
+                    self._uses[key] += 1
+                    persist = self._uses[key] >= self.disk_after_uses
+                    if persist:
+                        del self._uses[key]
+        if pcm is not None:
+            if persist:
+                self._write(key, pcm)
+            return pcm
+        if self.directory:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    pcm = f.read()
+                os.utime(self._path(key))  # mtime doubles as last-used time for trimming
+            except OSError:
+                pcm = None
+            if pcm:
+                with self._lock:
+                    self.disk_hits += 1
+                    if len(pcm) <= self.max_entry_bytes:
+                        self._remember(key, pcm)
+                return pcm
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, pcm: bytes, persist: bool = False):
+        """Cache pcm in memory, and on disk too if persist is set"""
+        if not pcm:
+            return
+        with self._lock:
+            if len(pcm) <= self.max_entry_bytes:
+                self._remember(key, pcm)
+                if persist:
+                    self._uses.pop(key, None)
+                else:
+                    self._uses[key] = 1
+        if persist:
+            self._write(key, pcm)
+
+    def _write(self, key: str, pcm: bytes):
+        if self.directory and not os.path.exists(self._path(key)):
+            try:
+                tmp = f"{self._path(key)}.{threading.get_ident()}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(pcm)
+                os.replace(tmp, self._path(key))
+                with self._lock:
+                    self._disk_bytes += len(pcm)
+                    over = self._disk_bytes > self.max_disk_bytes
+                if over:
+                    self._trim_disk()
+            except OSError as e:
+                print(f"[TTSCache] Could not write {key}: {e}")
+
+    def _trim_disk(self):
+        """Delete the least recently used files until the directory is back under budget"""
+        try:
+            files = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.pcm')),
+                           key=lambda entry: entry.stat().st_mtime)
+            total = sum(entry.stat().st_size for entry in files)
+            for entry in files:
+                if total <= self.max_disk_bytes * 0.9:
+                    break
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            with self._lock:
+                self._disk_bytes = total
+        except OSError as e:
+            print(f"[TTSCache] Could not trim disk cache: {e}")
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.directory) and os.path.exists(self._path(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._uses.clear()
+            self._bytes = 0
+        if self.directory:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.pcm'):
+                    os.remove(entry.path)
+            with self._lock:
+                self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'memory_bytes': self._bytes,
+                'disk_bytes': self._disk_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
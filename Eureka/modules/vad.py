@@ -0,0 +1,221 @@
+import threading
+import time
+import wave
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+
+def frame_features(pcm, frame_len: int):
+    """Per-frame energy (dBFS) and zero-crossing rate of 16-bit mono PCM, one row per frame"""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    n = len(samples) // frame_len
+    frames = samples[:n * frame_len].reshape(n, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20 * np.log10(rms / 32768.0 + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_len - 1)
+    return energy_db, zcr
+
+
+class VadEvent:
+    """'start' and 'end' mark an utterance; 'audio' carries speech to forward"""
+    __slots__ = ('kind', 'audio', 'offset_ms')
+
+    def __init__(self, kind: str, offset_ms: float, audio: bytes = b''):
+        self.kind = kind
+        self.offset_ms = offset_ms
+        self.audio = audio
+
+    def __repr__(self):
+        return f"VadEvent({self.kind!r}, {self.offset_ms:.0f}ms, {len(self.audio)} bytes)"
+
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing VAD over fixed frames, with hangover smoothing.
+
+    A frame counts as speech when its energy clears the adaptive threshold
+    (noise floor + margin_db, never below min_energy_db) and its
+    zero-crossing rate is below zcr_max, unless it is loud enough that the
+    ZCR doesn't matter (strong fricatives). start_frames speech frames in a
+    row open an utterance, which also forwards pre_roll_ms of audio from
+    before it; hangover_ms of non-speech closes it with an 'end' event.
+    service_end_silence_ms is the recognizer's own segmentation silence
+    (Azure's default is 500 ms), which stats() compares the hangover with.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20, min_energy_db: float = -50.0,
+                 margin_db: float = 10.0, zcr_max: float = 0.4, start_frames: int = 3,
+                 hangover_ms: int = 300, pre_roll_ms: int = 200, service_end_silence_ms: int = 500):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_len * 2
+        self.min_energy_db = min_energy_db
+        self.margin_db = margin_db
+        self.zcr_max = zcr_max
+        self.start_frames = start_frames
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.service_end_silence_ms = service_end_silence_ms  # what the recognizer would wait for otherwise
+        self.noise_floor = min_energy_db - margin_db
+        self.in_speech = False
+        self._pending = b''
+        self._run = 0
+        self._silence = 0
+        self._pre_roll = deque(maxlen=max(start_frames, pre_roll_ms // frame_ms))
+        self.frames_seen = 0
+        self.frames_forwarded = 0
+        self.segments = 0
+
+    def _classify(self, energy_db, zcr):
+        threshold = max(self.min_energy_db, self.noise_floor + self.margin_db)
+        speech = (energy_db > threshold) & ((zcr < self.zcr_max) | (energy_db > threshold + self.margin_db))
+        quiet = energy_db[~speech]
+        if len(quiet):
+            # Track the background level from non-speech frames only
+            level = float(np.median(quiet))
+            self.noise_floor = level if level < self.noise_floor else 0.9 * self.noise_floor + 0.1 * level
+        return speech
+
+    def process(self, pcm) -> List[VadEvent]:
+        """Feed captured PCM; returns the events it completes, in order"""
+        data = self._pending + bytes(pcm)
+        n = len(data) // self.frame_bytes
+        self._pending = data[n * self.frame_bytes:]
+        if not n:
+            return []
+        speech = self._classify(*frame_features(data[:n * self.frame_bytes], self.frame_len))
+        events = []
+        forward = []
+
+        def flush():
+            if forward:
+                events.append(VadEvent('audio', offset, b''.join(forward)))
+                forward.clear()
+
+        for i in range(n):
+            frame = data[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            offset = self.frames_seen * self.frame_ms
+            self.frames_seen += 1
+            if not self.in_speech:
+                self._pre_roll.append(frame)
+                self._run = self._run + 1 if speech[i] else 0
+                if self._run >= self.start_frames:
+                    self.in_speech = True
+                    self._silence = 0
+                    self.segments += 1
+                    events.append(VadEvent('start', offset - (self._run - 1) * self.frame_ms))
+                    forward.extend(self._pre_roll)
+                    self.frames_forwarded += len(self._pre_roll)
+                    self._pre_roll.clear()
+                continue
+            forward.append(frame)
+            self.frames_forwarded += 1
+            self._silence = 0 if speech[i] else self._silence + 1
+            if self._silence >= self.hangover_frames:
+                flush()
+                events.append(VadEvent('end', offset))
+                self.in_speech = False
+                self._run = 0
+        flush()
+        return events
+
+    def stats(self):
+        total_ms = self.frames_seen * self.frame_ms
+        forwarded_ms = self.frames_forwarded * self.frame_ms
+        hangover_ms = self.hangover_frames * self.frame_ms
+        return {
+            'audio_ms': total_ms,
+            'forwarded_ms': forwarded_ms,
+            'saved_ms': total_ms - forwarded_ms,
+            'saved_fraction': 1 - forwarded_ms / total_ms if total_ms else 0.0,
+            'segments': self.segments,
+            'end_delay_ms': hangover_ms,
+            'end_latency_saved_ms': max(0, self.service_end_silence_ms - hangover_ms) * self.segments,
+        }
+
+
+class VadFrontEnd:
+    """Moves microphone audio from a CaptureBuffer through the VAD into the recognizer.
+
+    Only speech segments are written; after each one, end_padding_ms of
+    silence is written so the recognizer finalizes the phrase right away
+    instead of waiting for more audio.
+    """
+
+    def __init__(self, capture, write, vad: Optional[VoiceActivityDetector] = None,
+                 on_speech_start=None, on_speech_end=None, poll_ms: int = 20, end_padding_ms: int = 400):
+        self.capture = capture
+        self.write = write
+        self.vad = vad or VoiceActivityDetector(sample_rate=capture.sample_rate)
+        self.on_speech_start = on_speech_start
+        self.on_speech_end = on_speech_end
+        self.poll_ms = poll_ms
+        self.end_padding = bytes(self.vad.sample_rate * end_padding_ms // 1000 * 2)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            pcm = self.capture.read()
+            if not len(pcm):
+                time.sleep(self.poll_ms / 1000)
+                continue
+            try:
+                for event in self.vad.process(pcm):
+                    if event.kind == 'audio':
+                        self.write(event.audio)
+                    elif event.kind == 'start':
+                        if self.on_speech_start:
+                            self.on_speech_start()
+                    else:
+                        self.write(self.end_padding)
+                        if self.on_speech_end:
+                            self.on_speech_end()
+            except Exception as e:
+                print(f"[VAD] Error: {e}")
+
+
+def analyze_wav(path: str, chunk_frames: int = 1024, **vad_options):
+    """Run a 16-bit mono WAV (e.g. from SpeechRecognizer.test_microphone) through the VAD.
+
+    Returns ([(start_ms, end_ms), ...], stats), feeding the file in
+    chunk_frames pieces the way the microphone callback does.
+    """
+    with wave.open(path, 'rb') as wav_file:
+        if wav_file.getsampwidth() != 2 or wav_file.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono PCM")
+        vad = VoiceActivityDetector(sample_rate=wav_file.getframerate(), **vad_options)
+        segments = []
+        start = None
+        while True:
+            chunk = wav_file.readframes(chunk_frames)
+            if not chunk:
+                break
+            for event in vad.process(chunk):
+                if event.kind == 'start':
+                    start = event.offset_ms
+                elif event.kind == 'end':
+                    segments.append((start, event.offset_ms))
+                    start = None
+        if start is not None:
+            segments.append((start, vad.frames_seen * vad.frame_ms))
+    return segments, vad.stats()
+
+
+if __name__ == '__main__':
+    import sys
+    for wav_path in sys.argv[1:] or ['mic_test.wav']:
+        found, summary = analyze_wav(wav_path)
+        print(f"{wav_path}: {len(found)} speech segments {found}")
+        print(f"  forwarded {summary['forwarded_ms']} of {summary['audio_ms']} ms "
+              f"({summary['saved_fraction']:.0%} saved)")
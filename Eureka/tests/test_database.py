@@ -0,0 +1,74 @@
+import re
+import sqlite3
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from utils.config import Config
+from modules.database import Database
+from modules.llm_client import FakeLLMBackend, LLMClient
+
+TOP = re.compile(r'\s*SELECT\s+TOP\s+(\d+)\s+(.*)', re.IGNORECASE | re.DOTALL)
+
+
+class TopCursor(sqlite3.Cursor):
+    """Runs the SELECT TOP n that SqlGuard injects as SQLite's LIMIT n"""
+
+    def execute(self, sql, *args):
+        match = TOP.match(sql)
+        if match:
+            sql = f"SELECT {match.group(2)} LIMIT {match.group(1)}"
+        return super().execute(sql, *args)
+
+
+class TopConnection(sqlite3.Connection):
+    def cursor(self, factory=TopCursor):
+        return super().cursor(factory)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'QUERY_CACHE_PATH', None)
+    monkeypatch.setattr(Config, 'SQL_MAX_ROWS', 1000)
+    path = str(tmp_path / 'products.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE Product (Name TEXT)')
+    conn.executemany('INSERT INTO Product VALUES (?)', [(f'p{i}',) for i in range(5000)])
+    conn.commit()
+    conn.close()
+
+    backend = FakeLLMBackend(lambda messages: "SELECT Name FROM Product")
+    database = Database(
+        connect_fn=lambda: sqlite3.connect(path, factory=TopConnection, check_same_thread=False),
+        llm=LLMClient(backend)
+    )
+    monkeypatch.setattr(database.schema_catalog, 'current_fingerprint', lambda: 'v1')
+    monkeypatch.setattr(database, 'find_attendance_table', lambda: None)
+    monkeypatch.setattr(database, '_fallback_prompt', lambda request: ('system', request))
+    yield database, backend
+    database.close()
+
+
+def test_cached_sql_keeps_real_count_and_truncation(db):
+    database, backend = db
+    answers = []
+    for _ in range(2):
+        guarded = database.generate_sql("list every product")
+        guarded, result = database.run_sql(guarded, "list every product")
+        answers.append((guarded.capped, result.row_count, result.truncated))
+
+    assert len(backend.calls) == 1
+    assert answers[0] == answers[1] == (True, 5000, True)
+
+
+def test_closing_a_stream_early_returns_its_connection(db):
+    database, _ = db
+    stream = database.stream_query("SELECT Name FROM Product", batch_size=10)
+    columns, rows = next(stream)
+    assert columns == ('Name',) and len(rows) == 10
+    stream.close()
+
+    assert database.pool.stats()['in_use'] == 0
+    conn = database.pool.acquire(timeout=0.1)
+    database.pool.release(conn)
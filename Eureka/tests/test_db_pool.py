@@ -0,0 +1,111 @@
+import sqlite3
+import time
+
+import pytest
+
+from modules.db_pool import ConnectionPool, PoolTimeout
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool(connect, min_size=1, max_size=1, acquire_timeout=0.1,
+                          health_check_interval=None)
+    yield pool
+    pool.close()
+
+
+def test_connection_released_when_holding_generator_is_closed(pool):
+    def rows():
+        with pool.connection() as conn:
+            for row in conn.execute('SELECT 1 UNION ALL SELECT 2'):
+                yield row
+
+    stream = rows()
+    assert next(stream) == (1,)
+    stream.close()
+
+    assert pool.stats()['in_use'] == 0
+    conn = pool.acquire()
+    pool.release(conn)
+
+
+def test_connection_kept_after_query_error(pool):
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection() as conn:
+            conn.execute('SELECT * FROM missing')
+    stats = pool.stats()
+    assert stats['in_use'] == 0 and stats['discarded'] == 0
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_checkout_and_release():
+    pool = ConnectionPool(connect, min_size=1, max_size=2, acquire_timeout=0.05,
+                          health_check_interval=None)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    stats = pool.stats()
+    assert (stats['size'], stats['in_use'], stats['checkouts'], stats['connects']) == (2, 2, 3, 2)
+    pool.close()
+
+
+def test_dead_connection_is_replaced_and_retried_once(pool):
+    dead = pool.acquire()
+    dead.close()
+    pool.release(dead)
+    used = []
+
+    def operation(conn):
+        used.append(conn)
+        return conn.execute('SELECT 42').fetchone()[0]
+
+    assert pool.run(operation) == 42
+    assert used[0] is dead and used[1] is not dead
+    stats = pool.stats()
+    assert (stats['retries'], stats['reconnects'], stats['discarded'], stats['size']) == (1, 1, 1, 1)
+
+
+def test_health_check_replaces_dead_idle_connections():
+    pool = ConnectionPool(connect, min_size=2, max_size=2, health_check_interval=0.05)
+    conns = [pool.acquire(), pool.acquire()]
+    conns[0].close()
+    for conn in conns:
+        pool.release(conn)
+    try:
+        assert wait_for(lambda: pool.stats()['discarded'] == 1 and pool.stats()['idle'] == 2)
+        stats = pool.stats()
+        assert stats['health_checks'] >= 2
+        assert stats['connects'] == 3 and stats['size'] == 2
+        with pool.connection() as conn:
+            assert conn.execute('SELECT 1').fetchone() == (1,)
+    finally:
+        pool.close()
+
+
+def test_thread_bound_connections_need_a_manual_health_check():
+    pool = ConnectionPool(lambda: sqlite3.connect(':memory:'), min_size=1, max_size=1,
+                          health_check_interval=None)
+    pool.health_check_interval = 0  # every idle connection is due
+    pool.check_idle()  # from the thread that opened it, so the ping succeeds
+    stats = pool.stats()
+    assert (stats['health_checks'], stats['discarded'], stats['idle']) == (1, 0, 1)
+    pool.close()
@@ -0,0 +1,62 @@
+import pytest
+
+from modules.intent_engine import IntentEngine, compile_phrases
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return IntentEngine()
+
+
+def test_phrases_match_whole_words_only():
+    matcher = compile_phrases(['data', 'how many'])
+    assert matcher.search("show me the data")
+    assert matcher.search("HOW   many orders")
+    assert not matcher.search("update windows")
+
+
+def test_rule_match_is_certain(engine):
+    assert engine.classify("how many orders shipped") == ('query_database', 1.0, 'rule')
+
+
+@pytest.mark.parametrize("text", [
+    "did ali take leave yesterday",
+    "was sara late on monday",
+    "is ahmed present today",
+    "late arrivals this week",
+    "who worked from home today",
+])
+def test_attendance_questions(engine, text):
+    assert engine.classify(text)[0] == 'query_database'
+
+
+@pytest.mark.parametrize("text", ["leave me alone", "i'm running late", "see you later"])
+def test_everyday_phrases_are_not_database_questions(engine, text):
+    assert engine.classify(text)[0] == 'unknown'
+
+
+def test_probability_is_calibrated(engine):
+    assert engine.probability("which employees joined last month") > 0.5
+    assert engine.probability("tell me a joke") < 0.5
+
+
+def test_thresholds_decide_when_to_ask_the_llm():
+    # Any probability falls between these, so every non-rule utterance is uncertain
+    unsure = IntentEngine(accept_threshold=1.01, reject_threshold=-0.01)
+    name, confidence, source = unsure.classify("who is our top salesperson")
+    assert source == 'uncertain'
+    assert name == 'unknown'
+    assert 0.0 <= confidence <= 1.0
+    assert unsure.classify("how many orders")[2] == 'rule'
+    assert unsure.stats()['llm_rate'] == 0.5
+
+    # Anything at or above zero is accepted
+    eager = IntentEngine(accept_threshold=0.0, reject_threshold=-0.01)
+    name, _, source = eager.classify("tell me a joke")
+    assert (name, source) == ('query_database', 'model')
+
+
+def test_follow_up_keeps_the_previous_intent(engine):
+    assert engine.classify("what about sara", 'query_database') == ('query_database', 1.0, 'context')
+    assert engine.classify("what about sara")[2] != 'context'
+    assert engine.classify("what about you", 'query_database')[2] != 'context'
@@ -0,0 +1,84 @@
+import pytest
+
+pytest.importorskip("dotenv")
+
+from modules import llm_client
+from modules.llm_client import FakeLLMBackend, LLMClient, LLMError
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Upper bounds of the random retry delays; the delays themselves become zero"""
+    bounds = []
+
+    def uniform(low, high):
+        assert low == 0  # full jitter
+        bounds.append(high)
+        return 0.0
+
+    monkeypatch.setattr(llm_client.random, 'uniform', uniform)
+    return bounds
+
+
+def test_retries_with_capped_full_jitter(backoffs):
+    backend = FakeLLMBackend(lambda messages: "SELECT 1", failures=3)
+    client = LLMClient(backend, max_retries=3, backoff=0.5, max_backoff=1.0)
+    assert client.chat('sql_generation', "system", "prompt") == "SELECT 1"
+    assert backoffs == [0.5, 1.0, 1.0]
+    stats = client.stats()['sql_generation']
+    assert (stats['calls'], stats['retries'], stats['errors']) == (1, 3, 0)
+
+
+def test_gives_up_after_max_retries(backoffs):
+    client = LLMClient(FakeLLMBackend(failures=5), max_retries=2)
+    with pytest.raises(LLMError, match="after 3 attempt"):
+        client.chat('summary', "system", "prompt")
+    assert client.stats()['summary']['errors'] == 1
+
+
+def test_other_errors_are_not_retried(backoffs):
+    def respond(messages):
+        raise ValueError("bad request")
+
+    client = LLMClient(FakeLLMBackend(respond))
+    with pytest.raises(LLMError):
+        client.chat('summary', "system", "prompt")
+    assert backoffs == []
+
+
+def test_stream_yields_pieces_and_retries_before_the_first(backoffs):
+    backend = FakeLLMBackend(lambda messages: "There are 504 products.", failures=1)
+    client = LLMClient(backend, backoff=0.5)
+    pieces = list(client.stream_chat('summary', "system", "prompt"))
+    assert pieces == ["There", " are", " 504", " products."]
+    assert len(backoffs) == 1
+    stats = client.stats()['summary']
+    assert (stats['calls'], stats['retries'], stats['completion_tokens']) == (1, 1, 4)
+    assert stats['avg_first_token_ms'] is not None
+
+
+def test_stream_is_not_retried_after_output(backoffs):
+    class Broken(FakeLLMBackend):
+        def stream(self, messages, max_tokens, timeout):
+            yield "Partial"
+            raise TimeoutError("fake timeout")
+
+    stream = LLMClient(Broken()).stream_chat('summary', "system", "prompt")
+    assert next(stream) == "Partial"
+    with pytest.raises(LLMError):
+        next(stream)
+    assert backoffs == []
+
+
+def test_stream_falls_back_to_a_single_reply():
+    client = LLMClient(FakeLLMBackend(lambda messages: "Done.", streaming=False))
+    assert list(client.stream_chat('summary', "system", "prompt")) == ["Done."]
+
+
+def test_closing_a_stream_records_the_call():
+    client = LLMClient(FakeLLMBackend(lambda messages: "one two three"))
+    stream = client.stream_chat('summary', "system", "prompt")
+    assert next(stream) == "one"
+    stream.close()
+    stats = client.stats()['summary']
+    assert (stats['calls'], stats['errors'], stats['completion_tokens']) == (1, 0, 1)
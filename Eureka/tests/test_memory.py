@@ -0,0 +1,90 @@
+import pytest
+
+from modules.memory import Memory
+
+
+@pytest.fixture
+def memory(tmp_path):
+    # A long flush interval so only the test decides when words are written
+    mem = Memory(str(tmp_path / 'memory.db'), flush_interval=3600)
+    yield mem
+    mem.close()
+
+
+def test_words_are_buffered_until_flush(memory):
+    memory.remember_sentence("Show the sales report", context="turn 1")
+    assert memory.conn.execute('SELECT COUNT(*) FROM word_memory').fetchone()[0] == 0
+    assert memory.flush() == 4
+    memory.remember_word('Sales')
+    assert memory.flush() == 1
+    rows = memory.conn.execute('SELECT word, frequency, context FROM word_memory ORDER BY word').fetchall()
+    assert rows == [('report', 1, 'turn 1'), ('sales', 2, 'turn 1'), ('show', 1, 'turn 1'), ('the', 1, 'turn 1')]
+    assert memory.flush() == 0
+
+
+def test_fuzzy_fact_recall(memory):
+    memory.remember('favourite colour', 'blue')
+    assert memory.recall('favourite colour') == 'blue'
+    assert memory.recall('favorite color') == 'blue'
+    memory.forget('favourite colour')
+    assert memory.recall('favourite colour') is None
+
+
+def test_chat_search_stems_and_ranks(memory):
+    if not memory.search_available:
+        pytest.skip("SQLite was built without FTS5")
+    memory.remember_chat_message('user', "Schedule the budget meetings for Monday")
+    memory.remember_chat_message('assistant', "Sales were up in March")
+    results = memory.search("meeting budget")
+    assert [r['text'] for r in results] == ["Schedule the budget meetings for Monday"]
+    assert '[' in results[0]['snippet']
+    assert memory.search("nothing like this") == []
+
+
+def test_search_input_is_not_query_syntax(memory):
+    if not memory.search_available:
+        pytest.skip("SQLite was built without FTS5")
+    memory.remember_chat_message('user', 'He said "NEAR" OR AND twice')
+    assert len(memory.search('"NEAR" OR')) == 1
+    assert len(memory.search('AND (')) == 1  # punctuation is dropped, not parsed
+
+
+def test_word_search_finds_substrings(memory):
+    memory.remember_sentence("inventory of mountain bikes", context="stock check")
+    words = [row[0] for row in memory.search_words('ount')]
+    assert words == ['mountain']
+    results = memory.search('vent', source='words')
+    assert [r['text'] for r in results] == ['inventory']
+    with pytest.raises(ValueError):
+        memory.search('bikes', source='files')
+
+
+def test_rollups_count_buffered_words(memory):
+    memory.remember_sentence("Show the sales report", context="turn 1")
+    memory.remember_sentence("sales, sales and more SALES!", context="turn 2")
+    assert memory.get_word_frequency('sales') == 4
+    assert memory.get_word_frequency('Sales', hours=24 * 30) == 4  # daily rollups
+    assert memory.get_most_common_words(limit=1) == [('sales', 4)]
+    assert memory.get_word_count() == 9
+
+
+def test_rollups_accumulate_across_flushes(memory):
+    memory.remember_word('helmet')
+    assert memory.flush() == 1
+    memory.remember_word('helmet')
+    memory.remember_word('x')  # too short to keep
+    assert memory.flush() == 1
+    assert memory.get_word_frequency('helmet') == 2
+    # Occurrences, not rows: both helmets were merged into one word_memory row
+    assert memory.conn.execute('SELECT COUNT(*) FROM word_memory').fetchone()[0] == 1
+    stats = memory.get_vocabulary_stats()
+    assert stats == {'unique_words': 1, 'total_words': 2, 'words_today': 2}
+
+
+def test_compaction_keeps_totals(memory):
+    memory.remember_sentence("quarterly revenue")
+    memory.flush()
+    memory.store.write("UPDATE word_memory SET timestamp = datetime('now', '-60 days') WHERE word = 'revenue'")
+    assert memory.compact() == 1
+    assert [row[0] for row in memory.get_recent_words()] == ['quarterly']
+    assert memory.get_vocabulary_stats()['total_words'] == 2
@@ -0,0 +1,55 @@
+from modules.prompt_templates import PromptLibrary, PromptTemplate
+
+
+class Compiler:
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return PromptTemplate("You write T-SQL.", f"Tables: {self.tables}\nRules: read-only.\n",
+                              "Request: {request}\nSQL:")
+
+
+def test_template_keeps_the_static_prefix_first():
+    template = Compiler('Sales.Customer')()
+    prompt = template.render(request="count customers")
+    assert prompt.startswith(template.prefix)
+    assert prompt.endswith("Request: count customers\nSQL:")
+
+
+def test_compiled_once_per_version():
+    library = PromptLibrary()
+    compile_fn = Compiler('Sales.Customer')
+    first = library.render('fallback', 'v1', compile_fn, request="count customers")
+    second = library.render('fallback', 'v1', compile_fn, request="list customers")
+    assert compile_fn.calls == 1
+    assert first[0] == second[0] == "You write T-SQL."
+    assert first[1].split('Request:')[0] == second[1].split('Request:')[0]
+
+    library.render('fallback', 'v2', compile_fn, request="count customers")
+    assert compile_fn.calls == 2
+    stats = library.stats()['fallback']
+    assert (stats['compiles'], stats['renders']) == (2, 3)
+    assert 0 < stats['static_fraction'] < 1
+
+
+def test_templates_are_cached_by_name():
+    library = PromptLibrary()
+    attendance, fallback = Compiler('dbo.Attendance'), Compiler('Sales.Customer')
+    library.render('attendance', 'v1', attendance, request="who is on leave")
+    library.render('fallback', 'v1', fallback, request="count customers")
+    library.render('attendance', 'v1', attendance, request="who was late")
+    assert (attendance.calls, fallback.calls) == (1, 1)
+
+
+def test_invalidate_forces_a_recompile():
+    library = PromptLibrary()
+    compile_fn = Compiler('Sales.Customer')
+    library.get('fallback', None, compile_fn)
+    library.invalidate('fallback')
+    library.get('fallback', None, compile_fn)
+    library.invalidate()
+    library.get('fallback', None, compile_fn)
+    assert compile_fn.calls == 3
@@ -0,0 +1,66 @@
+import time
+
+from modules.query_cache import LRUCache, QueryCache, normalize_request
+
+
+def test_normalize_request():
+    assert normalize_request("Eureka, can you tell me   the total SALES please?") == "the total sales"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_ttl_expires_entries():
+    cache = LRUCache(ttl=0.01)
+    cache.put('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_sql_and_summary_levels():
+    cache = QueryCache()
+    assert cache.get_sql("How many products?", 'v1') is None
+    cache.put_sql("how many products", "SELECT COUNT(*) FROM Product")
+    assert cache.get_sql("Please, how many products?", 'v1') == "SELECT COUNT(*) FROM Product"
+    cache.put_summary("SELECT COUNT(*) FROM Product", "There are 504 products.")
+    assert cache.get_summary("SELECT COUNT(*) FROM Product") == "There are 504 products."
+    assert cache.stats()['sql']['hits'] == 1
+
+
+def test_schema_change_clears_both_levels():
+    cache = QueryCache()
+    cache.get_sql("list products", 'v1')
+    cache.put_sql("list products", "SELECT Name FROM Product")
+    cache.put_summary("SELECT Name FROM Product", "Here are the products.")
+    assert cache.get_sql("list products", 'v2') is None
+    assert cache.get_summary("SELECT Name FROM Product") is None
+    assert cache.get_sql("list products", 'v1') is None
+
+
+def test_sql_persists_per_schema_version(tmp_path):
+    path = str(tmp_path / 'query_cache.db')
+    cache = QueryCache(path=path)
+    cache.get_sql("list products", 'v1')
+    cache.put_sql("list products", "SELECT Name FROM Product")
+    cache.close()
+
+    reopened = QueryCache(path=path)
+    assert reopened.get_sql("List products.", 'v1') == "SELECT Name FROM Product"
+    reopened.close()
+
+    changed = QueryCache(path=path)
+    assert changed.get_sql("list products", 'v2') is None
+    changed.close()
+    # The old version's rows were deleted from disk when the schema changed
+    again = QueryCache(path=path)
+    assert again.get_sql("list products", 'v1') is None
+    again.close()
@@ -0,0 +1,74 @@
+import datetime
+
+import pytest
+
+from modules.result_summarizer import ResultSummarizer, spoken_column, spoken_list
+
+
+@pytest.fixture
+def summarizer():
+    return ResultSummarizer()
+
+
+@pytest.mark.parametrize("columns, rows, shape", [
+    (('Total',), [(42,)], 'scalar'),
+    (('Name', 'Email'), [('Ken', 'ken@example.com')], 'single_row'),
+    (('Name',), [('Ken',), ('Terri',)], 'list'),
+    (('Territory', 'Sales'), [('North', 10), ('South', 20)], 'key_value'),
+    (('OrderDate', 'Total'), [(datetime.date(2014, 1, 1), 5), (datetime.date(2014, 1, 2), 7)], 'time_series'),
+    (('Year', 'Total'), [(2013, 5), (2014, 7)], 'time_series'),
+    (('Name', 'Color', 'Price'), [('Bike', 'Red', 100), ('Helmet', 'Blue', 20)], 'small_table'),
+    (('A', 'B', 'C', 'D', 'E'), [(1, 2, 3, 4, 5)] * 2, 'table'),
+    (('Name',), [], 'empty'),
+])
+def test_classify(summarizer, columns, rows, shape):
+    assert summarizer.classify(columns, rows) == shape
+
+
+def test_table_falls_back_to_llm(summarizer):
+    assert summarizer.summarize(('A', 'B', 'C', 'D', 'E'), [(1, 2, 3, 4, 5)] * 6) is None
+    assert summarizer.stats()['llm_fallbacks'] == 1
+
+
+def test_scalar(summarizer):
+    assert summarizer.summarize(('TotalDue',), [(12.5,)], 1) == "The total due is 12.50."
+
+
+def test_full_key_value_states_the_highest(summarizer):
+    rows = [(f"k{i}", i) for i in range(8)]
+    summary = summarizer.summarize(('Name', 'Total'), rows, 8)
+    assert "and 3 more" in summary
+    assert "The highest is k7 with 7." in summary
+
+
+def test_partial_key_value_qualifies_the_highest(summarizer):
+    rows = [(f"k{i}", i) for i in range(8)]
+    summary = summarizer.summarize(('Name', 'Total'), rows, 500)
+    assert "and 495 more" in summary
+    assert "Among the first 8, the highest is k7" in summary
+
+
+def test_unknown_total_counts_only_fetched_rows(summarizer):
+    summary = summarizer.summarize(('Name',), [(f"n{i}",) for i in range(8)], None)
+    assert summary.endswith("and at least 3 more.")
+
+
+def test_partial_time_series_is_qualified(summarizer):
+    rows = [(datetime.date(2014, 1, day), day) for day in range(1, 11)]
+    assert summarizer.summarize(('OrderDate', 'Total'), rows, 10).startswith("From 2014-01-01 to 2014-01-10")
+    assert summarizer.summarize(('OrderDate', 'Total'), rows, 100).startswith("In the first 10 rows, from")
+
+
+def test_registered_predicate_wins(summarizer):
+    summarizer.register('attendance', lambda columns, rows, total: "custom",
+                        lambda columns, rows: 'Status' in columns)
+    assert summarizer.summarize(('Name', 'Status'), [('Ali', 'P'), ('Sara', 'A')], 2) == "custom"
+    assert summarizer.stats()['local'] == {'attendance': 1}
+
+
+def test_spoken_helpers():
+    assert spoken_column('TotalDue') == 'total due'
+    assert spoken_column('order_count') == 'order count'
+    assert spoken_list(['a']) == 'a'
+    assert spoken_list(['a', 'b', 'c']) == 'a, b and c'
+    assert spoken_list(['a', 'b'], 4) == 'a, b and 4 more'
@@ -0,0 +1,79 @@
+from modules.ring_buffer import CaptureBuffer, StreamBuffer
+
+
+def capture(capacity_bytes):
+    # 1 kHz 16-bit mono: every millisecond is two bytes
+    return CaptureBuffer(seconds=capacity_bytes / 2000, sample_rate=1000)
+
+
+def test_capacity():
+    assert capture(100).capacity == 100
+
+
+def test_reads_across_the_wrap_are_contiguous():
+    buf = capture(100)
+    buf.write(bytes(60))
+    assert len(buf.read()) == 60
+    data = bytes(range(80))
+    buf.write(data)  # wraps past the end of the ring
+    view = buf.read()
+    assert isinstance(view, memoryview)
+    assert bytes(view) == data
+    assert buf.available() == 0
+
+
+def test_overflow_keeps_the_newest_audio():
+    buf = capture(100)
+    data = bytes(i % 256 for i in range(150))
+    buf.write(data[:70])
+    buf.write(data[70:])
+    assert buf.overflows == 1
+    assert buf.overflow_bytes == 50
+    assert bytes(buf.read()) == data[-100:]
+
+
+def test_oversized_write_keeps_its_tail():
+    buf = capture(100)
+    data = bytes(i % 256 for i in range(250))
+    buf.write(data)
+    assert bytes(buf.read()) == data[-100:]
+
+
+def test_read_returns_whole_frames():
+    buf = capture(100)
+    buf.write(bytes(11))
+    assert len(buf.read(7)) == 6
+    assert buf.available() == 5
+
+
+def test_last_does_not_consume():
+    buf = capture(100)
+    data = bytes(range(90))
+    buf.write(data)
+    assert bytes(buf.last(10)) == data[-20:]
+    assert buf.available() == 90
+    buf.clear()
+    assert buf.available() == 0
+    assert bytes(buf.last(10)) == data[-20:]
+
+
+def test_stream_buffer_try_write_never_blocks():
+    buf = StreamBuffer(capacity=10)
+    assert buf.try_write(b'abcdef')
+    assert not buf.try_write(b'ghijkl')  # no room: nothing is written
+    assert buf.read(4) == b'abcd'
+    assert buf.try_write(b'ghijkl')  # wraps around the ring
+    buf.finish()
+    assert buf.read(100) + buf.read(100) == b'efghijkl'
+    assert buf.read(100) == b''
+
+
+def test_stream_buffer_cancel_stops_writes():
+    buf = StreamBuffer(capacity=10)
+    cancelled = []
+    buf.on_cancel = lambda: cancelled.append(True)
+    buf.cancel()
+    assert cancelled == [True]
+    assert not buf.try_write(b'a')
+    assert not buf.write(b'a')
+    assert buf.read(10) == b''
@@ -0,0 +1,63 @@
+from modules.schema_index import SchemaIndex, build_schema_section, estimate_tokens, identifier_terms
+
+
+def columns(*names):
+    return [{'COLUMN_NAME': name} for name in names]
+
+
+SCHEMAS = {
+    'Sales': {
+        'SalesOrderHeader': columns('SalesOrderID', 'OrderDate', 'CustomerID', 'TerritoryID', 'TotalDue',
+                                    *[f'Extra{i}' for i in range(40)]),
+        'SalesTerritory': columns('TerritoryID', 'Name', 'CountryRegionCode'),
+    },
+    'HumanResources': {
+        'Employee': columns('BusinessEntityID', 'JobTitle', 'HireDate'),
+    },
+    'Person': {
+        'Address': columns('AddressID', 'AddressLine1', 'City'),
+    },
+}
+
+
+def test_identifier_terms():
+    assert identifier_terms('SalesOrderHeader') == ['sale', 'order', 'header']
+    assert identifier_terms('order_date') == ['order', 'date']
+    assert identifier_terms('Addresses') == ['address']
+
+
+def test_search_ranks_the_tables_a_request_is_about():
+    index = SchemaIndex(SCHEMAS)
+    ranked = [table for table, _, _ in index.search("total sales by territory", k=2)]
+    assert set(ranked) == {'Sales.SalesOrderHeader', 'Sales.SalesTerritory'}
+    assert index.search("employees hired")[0][0] == 'HumanResources.Employee'
+
+
+def test_misheard_words_map_to_the_closest_term():
+    index = SchemaIndex(SCHEMAS)
+    assert index.search("employes")[0][0] == 'HumanResources.Employee'
+
+
+def test_schema_section_puts_matching_columns_first():
+    index = SchemaIndex(SCHEMAS)
+    text, tables = build_schema_section(index, "total due per territory")
+    assert tables == ['Sales.SalesOrderHeader', 'Sales.SalesTerritory']
+    header, territory = text.splitlines()
+    assert header.startswith('Sales.SalesOrderHeader: [TotalDue, TerritoryID, SalesOrderID, OrderDate')
+    assert header.endswith(', ... 20 more]')  # max_columns
+    assert territory == 'Sales.SalesTerritory: [TerritoryID, Name, CountryRegionCode]'
+
+
+def test_schema_section_stays_within_its_token_budget():
+    index = SchemaIndex(SCHEMAS)
+    text, tables = build_schema_section(index, "total due per territory", budget_tokens=40)
+    assert estimate_tokens(text) <= 40
+    assert tables == ['Sales.SalesOrderHeader']
+    assert text.startswith('Sales.SalesOrderHeader: [TotalDue, TerritoryID, ')
+    assert text.endswith(' more]')
+
+
+def test_schema_section_falls_back_to_the_first_tables():
+    index = SchemaIndex(SCHEMAS)
+    text, tables = build_schema_section(index, "zzz", max_tables=2)
+    assert tables == index.tables[:2]
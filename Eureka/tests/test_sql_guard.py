@@ -0,0 +1,104 @@
+import pytest
+
+from modules.sql_guard import SqlGuard, UnsafeQueryError, main_select_start
+
+
+@pytest.fixture
+def guard():
+    return SqlGuard(max_rows=1000)
+
+
+def test_injects_top(guard):
+    checked = guard.check("SELECT Name FROM Production.Product;")
+    assert checked.sql == "SELECT TOP 1000 Name FROM Production.Product"
+    assert checked.capped
+    assert checked.rewrite == "Injected TOP 1000"
+    assert checked.table == "Production.Product"
+    assert checked.original == "SELECT Name FROM Production.Product;"
+
+
+def test_injects_top_after_distinct(guard):
+    assert guard.check("SELECT DISTINCT Color FROM Product").sql == "SELECT DISTINCT TOP 1000 Color FROM Product"
+
+
+def test_lowers_larger_top(guard):
+    checked = guard.check("SELECT TOP (5000) Name FROM Product")
+    assert checked.sql == "SELECT TOP 1000 Name FROM Product"
+    assert checked.rewrite == "Lowered TOP 5000 to TOP 1000"
+
+
+def test_keeps_smaller_top(guard):
+    checked = guard.check("SELECT TOP 10 Name FROM Product ORDER BY ListPrice DESC")
+    assert checked.sql == "SELECT TOP 10 Name FROM Product ORDER BY ListPrice DESC"
+    assert not checked.capped
+
+
+def test_single_row_aggregate_is_not_capped(guard):
+    checked = guard.check("SELECT COUNT(*) FROM Sales.SalesOrderHeader")
+    assert not checked.capped
+    assert checked.rewrite is None
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT SUM(TotalDue) / COUNT(*) AS AvgDue, MAX(TotalDue) [Largest] FROM Sales.SalesOrderHeader",
+    "SELECT COUNT(DISTINCT CustomerID) AS Customers FROM Sales.SalesOrderHeader",
+    "SELECT STRING_AGG(Name, ', ') FROM Production.Product",
+])
+def test_aggregate_select_lists_are_not_capped(guard, sql):
+    assert not guard.check(sql).capped
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT Name, COUNT(*) OVER () FROM Production.Product",
+    "SELECT COUNT(*) OVER (PARTITION BY Color) FROM Production.Product",
+    "SELECT Name, (SELECT MAX(ListPrice) FROM Production.Product) FROM Production.Product",
+    "SELECT Name FROM Production.Product WHERE ListPrice = (SELECT MAX(ListPrice) FROM Production.Product)",
+])
+def test_window_and_subquery_aggregates_are_capped(guard, sql):
+    checked = guard.check(sql)
+    assert checked.capped
+    assert checked.sql.startswith("SELECT TOP 1000 ")
+
+
+def test_grouped_aggregate_is_capped(guard):
+    checked = guard.check("SELECT TerritoryID, SUM(TotalDue) FROM Sales.SalesOrderHeader GROUP BY TerritoryID")
+    assert checked.sql.startswith("SELECT TOP 1000 TerritoryID")
+
+
+def test_cte_caps_the_main_select(guard):
+    checked = guard.check("WITH recent AS (SELECT * FROM Orders WHERE OrderDate > '2014-01-01') "
+                          "SELECT CustomerID FROM recent")
+    assert "(SELECT * FROM Orders" in checked.sql
+    assert checked.sql.endswith("SELECT TOP 1000 CustomerID FROM recent")
+
+
+def test_union_is_left_unbounded(guard):
+    checked = guard.check("SELECT Name FROM A UNION SELECT Name FROM B")
+    assert not checked.capped
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM Person.Person",
+    "UPDATE Product SET ListPrice = 0",
+    "SELECT * FROM Product; DROP TABLE Product",
+    "SELECT Name INTO Backup FROM Product",
+    "EXEC xp_cmdshell 'dir'",
+    "SELECT * FROM Product WAITFOR DELAY '00:00:10'",
+    "",
+    "-- only a comment",
+])
+def test_rejects_unsafe_statements(guard, sql):
+    with pytest.raises(UnsafeQueryError):
+        guard.check(sql)
+
+
+def test_keywords_inside_literals_and_comments_are_allowed(guard):
+    checked = guard.check("SELECT Name FROM Product WHERE Name = 'Drop; Delete' -- update later")
+    assert checked.sql.startswith("SELECT TOP 1000 Name")
+
+
+def test_main_select_start():
+    sql = "WITH x AS (SELECT a FROM t) SELECT a FROM x"
+    assert sql[main_select_start(sql):] == "SELECT a FROM x"
+    assert main_select_start("SELECT a FROM t UNION SELECT a FROM u") is None
+    assert main_select_start("SELECT a FROM t ORDER BY a OFFSET 5 ROWS") is None
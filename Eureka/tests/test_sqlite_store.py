@@ -0,0 +1,50 @@
+import sqlite3
+import threading
+
+import pytest
+
+from modules.sqlite_store import SqliteStore, StoreClosed
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteStore(str(tmp_path / 'store.db'))
+    store.write('CREATE TABLE items (name TEXT UNIQUE)')
+    yield store
+    store.close()
+
+
+def test_uses_wal(store):
+    assert store.journal_mode == 'wal'
+    assert store.read_one('PRAGMA journal_mode')[0] == 'wal'
+
+
+def test_failed_write_does_not_undo_its_batch(store):
+    futures = [store.submit(lambda conn, n=n: conn.execute('INSERT INTO items VALUES (?)', (n,)).rowcount)
+               for n in ('a', 'b', 'a', 'c')]
+    assert [f.result(5) for f in futures[:2]] == [1, 1]
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[2].result(5)
+    assert futures[3].result(5) == 1
+    assert store.read('SELECT name FROM items ORDER BY name') == [('a',), ('b',), ('c',)]
+
+
+def test_each_thread_reads_on_its_own_connection(store):
+    store.write('INSERT INTO items VALUES (?)', ('a',))
+    seen = []
+
+    def read():
+        seen.append((store.reader() is not main, store.read('SELECT name FROM items')))
+
+    main = store.reader()
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    assert seen == [(True, [('a',)])]
+    assert store.stats()['readers'] == 2
+
+
+def test_writes_after_close_are_refused(store):
+    store.close()
+    with pytest.raises(StoreClosed):
+        store.write('INSERT INTO items VALUES (?)', ('a',))
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("azure.cognitiveservices.speech")
+pytest.importorskip("sounddevice")
+pytest.importorskip("scipy")
+
+from utils.config import Config
+from modules.stt import RESULT_LATENCY_MS, SpeechRecognizer, normalize_phrase
+
+
+@pytest.fixture
+def recognizer(monkeypatch):
+    # Building a push-stream recognizer does not contact the service
+    monkeypatch.setattr(Config, 'SPEECH_KEY', 'test-key')
+    monkeypatch.setattr(Config, 'SPEECH_REGION', 'westus')
+    return SpeechRecognizer(use_push_stream=True, segmentation_silence_ms=300, front_end_delay_ms=700)
+
+
+def test_gate_tail_covers_the_recognition_pipeline(recognizer):
+    assert recognizer.gate_tail == pytest.approx((700 + 300 + RESULT_LATENCY_MS) / 1000)
+
+
+def test_gate_stays_shut_for_the_tail(recognizer):
+    assert not recognizer.is_gated()
+    recognizer.close_gate()
+    assert recognizer.is_gated()
+    recognizer.open_gate(tail=0.05)
+    assert recognizer.is_gated()
+    time.sleep(0.06)
+    assert not recognizer.is_gated()
+
+
+def test_barge_in_fires_once_per_closed_gate(recognizer):
+    heard = []
+    recognizer.on_barge_in = heard.append
+    recognizer.barge_in_phrases = {normalize_phrase(p) for p in ('stop', 'hold on')}
+
+    recognizer.close_gate()
+    assert not recognizer._check_barge_in("Stop the sales report")
+    assert recognizer._check_barge_in("Hold on.")
+    assert recognizer._check_barge_in("hold on")  # the final result after the partial
+    assert heard == ["Hold on."]
+
+    recognizer.open_gate(tail=0)
+    recognizer.close_gate()
+    assert recognizer._check_barge_in("STOP!")
+    assert heard == ["Hold on.", "STOP!"] and recognizer.barge_ins == 2
@@ -0,0 +1,62 @@
+import os
+
+from modules.tts_cache import PhraseCache, phrase_key
+
+
+def pcm_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.pcm'))
+
+
+def test_phrase_key_ignores_whitespace_but_not_voice():
+    key = phrase_key("Hello   there.", 'en-US-JennyNeural', 'raw-24khz')
+    assert key == phrase_key(" Hello there. ", 'en-US-JennyNeural', 'raw-24khz')
+    assert key != phrase_key("Hello there.", 'ur-PK-UzmaNeural', 'raw-24khz')
+
+
+def test_memory_evicts_least_recently_used():
+    cache = PhraseCache(max_bytes=300, directory=None, max_entry_bytes=100)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, bytes(100))
+    assert cache.get('a') is not None
+    cache.put('d', bytes(100))
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in ('a', 'c', 'd'))
+    assert cache.stats()['memory_bytes'] == 300
+
+
+def test_oversized_entries_are_not_kept_in_memory():
+    cache = PhraseCache(max_bytes=1000, directory=None, max_entry_bytes=100)
+    cache.put('big', bytes(101))
+    assert cache.get('big') is None
+
+
+def test_one_off_replies_stay_off_disk(tmp_path):
+    cache = PhraseCache(directory=str(tmp_path), disk_after_uses=3)
+    key = phrase_key("There are 504 products.", 'voice', 'fmt')
+    cache.put(key, b'pcm')
+    assert cache.get(key) == b'pcm'
+    assert pcm_files(tmp_path) == []
+    assert cache.get(key) == b'pcm'  # third use
+    assert pcm_files(tmp_path) == [key + '.pcm']
+
+
+def test_persisted_phrases_survive_a_restart(tmp_path):
+    cache = PhraseCache(directory=str(tmp_path))
+    cache.put('greeting', b'hello', persist=True)
+    assert pcm_files(tmp_path) == ['greeting.pcm']
+
+    reopened = PhraseCache(directory=str(tmp_path))
+    assert reopened.stats()['disk_bytes'] == 5
+    assert reopened.get('greeting') == b'hello'
+    assert reopened.get('greeting') == b'hello'
+    stats = reopened.stats()
+    assert (stats['disk_hits'], stats['memory_hits']) == (1, 1)
+
+
+def test_disk_is_trimmed_oldest_first(tmp_path):
+    cache = PhraseCache(directory=str(tmp_path), max_disk_bytes=250)
+    for i, key in enumerate(('a', 'b', 'c')):
+        cache.put(key, bytes(100), persist=True)
+        os.utime(tmp_path / f'{key}.pcm', (i, i))
+    assert pcm_files(tmp_path) == ['b.pcm', 'c.pcm']
+    assert cache.stats()['disk_bytes'] == 200
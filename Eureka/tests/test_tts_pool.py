@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from modules import fake_speechsdk
+from modules.ring_buffer import StreamBuffer
+from modules.tts import AzureSynthesisBackend, VoicePool
+
+VOICE = 'en-US-JennyNeural'
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setattr(fake_speechsdk, 'CONNECT_LATENCY', 0.01)
+    monkeypatch.setattr(fake_speechsdk, 'FIRST_CHUNK_LATENCY', 0.0)
+    monkeypatch.setattr(fake_speechsdk, 'SPEED', 50.0)
+    return AzureSynthesisBackend(voices={'en': VOICE}, sdk=fake_speechsdk, prewarm=False, max_per_voice=1)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def read_all(sink):
+    data = b''
+    while True:
+        chunk = sink.read(1 << 16, timeout=2.0)
+        if not chunk:
+            return data
+        data += chunk
+
+
+def idle(backend):
+    return len(backend.pools[VOICE]._idle)
+
+
+def test_voice_pool_reuses_and_bounds_synthesizers():
+    made = []
+    pool = VoicePool(lambda: made.append(object()) or made[-1], max_size=1)
+    first = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    assert got == []  # the only synthesizer is busy
+    pool.release(first)
+    waiter.join(1)
+    assert got == [first] and len(made) == 1
+
+
+def test_synthesizer_is_reused_across_requests(backend):
+    for text in ("Hello there.", "Here is your answer."):
+        sink = StreamBuffer(sample_rate=backend.sample_rate)
+        backend.start(text, VOICE, sink)
+        audio = read_all(sink)
+        assert len(audio) == int(len(text) / fake_speechsdk.CHARS_PER_SECOND * backend.sample_rate) * 2
+        assert sink.error is None
+        assert wait_for(lambda: idle(backend) == 1)
+    synth = backend.pools[VOICE]._idle[0]
+    assert synth.synth.requests == 2
+    stats = backend.stats()[VOICE]
+    assert stats['errors'] == 0 and stats['total']['count'] == 2
+
+
+def test_cancelled_request_returns_synthesizer_without_stale_audio(backend):
+    sink = StreamBuffer(sample_rate=backend.sample_rate)
+    backend.start("A long reply that the user interrupts before it finishes playing.", VOICE, sink)
+    assert sink.read(1024, timeout=2.0)
+    sink.cancel()
+    assert wait_for(lambda: idle(backend) == 1)
+
+    text = "Next."
+    sink = StreamBuffer(sample_rate=backend.sample_rate)
+    backend.start(text, VOICE, sink)
+    assert len(read_all(sink)) == int(len(text) / fake_speechsdk.CHARS_PER_SECOND * backend.sample_rate) * 2
+
+
+def test_full_buffer_stops_synthesis_without_blocking(backend):
+    sink = StreamBuffer(capacity=4096, sample_rate=backend.sample_rate)
+    backend.start("Nobody is reading this reply, so the buffer fills up.", VOICE, sink)
+    assert wait_for(lambda: idle(backend) == 1)
+    assert sink.error is None
+    assert len(read_all(sink)) <= 4096
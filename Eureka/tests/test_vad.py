@@ -0,0 +1,91 @@
+import wave
+
+import numpy as np
+import pytest
+
+from modules.vad import VoiceActivityDetector, analyze_wav
+
+RATE = 16000
+
+
+def tone(ms, freq=440, amplitude=8000):
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def silence(ms, seed=0):
+    # Faint noise rather than digital zero, like a real microphone
+    return np.random.default_rng(seed).normal(0, 5, RATE * ms // 1000).astype(np.int16)
+
+
+def pcm(*parts):
+    return np.concatenate(parts).tobytes()
+
+
+def feed(vad, data, chunk=2048):
+    events = []
+    for i in range(0, len(data), chunk):
+        events += vad.process(data[i:i + chunk])
+    return events
+
+
+def test_hangover_closes_segment_after_silence():
+    vad = VoiceActivityDetector(sample_rate=RATE, hangover_ms=300)
+    events = feed(vad, pcm(silence(500), tone(500), silence(1000)))
+    kinds = [e.kind for e in events if e.kind != 'audio']
+    assert kinds == ['start', 'end']
+    start, end = [e.offset_ms for e in events if e.kind != 'audio']
+    assert start == 500
+    # The segment ends one hangover after the speech does, to within a frame
+    assert 1000 + 300 - vad.frame_ms <= end <= 1000 + 300
+
+
+def test_pause_shorter_than_hangover_stays_one_segment():
+    vad = VoiceActivityDetector(sample_rate=RATE, hangover_ms=300)
+    events = feed(vad, pcm(silence(300), tone(400), silence(200), tone(400), silence(800)))
+    assert [e.kind for e in events if e.kind != 'audio'] == ['start', 'end']
+
+
+def test_only_speech_is_forwarded():
+    vad = VoiceActivityDetector(sample_rate=RATE, hangover_ms=300, pre_roll_ms=200)
+    data = pcm(silence(1000), tone(500), silence(1500))
+    forwarded = sum(len(e.audio) for e in feed(vad, data) if e.kind == 'audio')
+    assert 0 < forwarded < len(data) / 2
+    assert vad.stats()['segments'] == 1
+
+
+@pytest.mark.parametrize("service_end_silence_ms, saved", [(500, 200), (300, 0)])
+def test_end_latency_saved_uses_the_recognizer_silence(service_end_silence_ms, saved):
+    vad = VoiceActivityDetector(sample_rate=RATE, hangover_ms=300, service_end_silence_ms=service_end_silence_ms)
+    feed(vad, pcm(silence(500), tone(500), silence(1000), tone(500), silence(1000)))
+    stats = vad.stats()
+    assert stats['segments'] == 2
+    assert stats['end_latency_saved_ms'] == saved * 2
+
+
+def test_analyze_wav(tmp_path):
+    path = tmp_path / 'speech.wav'
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(RATE)
+        wav_file.writeframes(pcm(silence(400), tone(600), silence(1000, seed=1), tone(600), silence(600, seed=2)))
+    segments, stats = analyze_wav(str(path), hangover_ms=300)
+    assert len(segments) == 2
+    (first_start, first_end), (second_start, _) = segments
+    assert first_start == 400
+    assert first_end < second_start
+    assert second_start == 2000
+    assert stats['segments'] == 2
+    assert stats['audio_ms'] == 3200
+
+
+def test_analyze_wav_rejects_stereo(tmp_path):
+    path = tmp_path / 'stereo.wav'
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(RATE)
+        wav_file.writeframes(bytes(400))
+    with pytest.raises(ValueError):
+        analyze_wav(str(path))
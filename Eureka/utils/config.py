@@ -16,6 +16,41 @@ class Config:
     DEFAULT_LANG    = 'en-US'
     URDU_LANG       = 'ur-PK'
     OPENWEATHERMAP_API_KEY = os.getenv('OPENWEATHERMAP_API_KEY')
+    DB_CONNECTION_STRING = os.getenv(
+        'DB_CONNECTION_STRING',
+        "Driver={ODBC Driver 17 for SQL Server};"
+        "Server=ITCS-AWAIS\\SQLEXPRESS;"
+        "Database=ITCS;"
+        "Trusted_Connection=yes;"
+    )
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '4'))
+    DB_POOL_TIMEOUT  = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    DB_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_HEALTH_CHECK_INTERVAL', '60'))
+    QUERY_CACHE_PATH = os.getenv('QUERY_CACHE_PATH', 'query_cache.db') or None  # empty disables persistence
+    QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '256'))
+    SUMMARY_CACHE_TTL = float(os.getenv('SUMMARY_CACHE_TTL', '120'))
+    LLM_TIMEOUT     = float(os.getenv('LLM_TIMEOUT', '20'))  # seconds per attempt
+    LLM_INTENT_TIMEOUT = float(os.getenv('LLM_INTENT_TIMEOUT', '5'))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+    SCHEMA_PROMPT_TOKENS = int(os.getenv('SCHEMA_PROMPT_TOKENS', '600'))  # budget for table listings in SQL prompts
+    SQL_MAX_ROWS    = int(os.getenv('SQL_MAX_ROWS', '1000'))
+    SQL_QUERY_TIMEOUT = int(os.getenv('SQL_QUERY_TIMEOUT', '15'))  # seconds, 0 disables
+    VAD_ENABLED     = os.getenv('VAD_ENABLED', '1') == '1'  # 0 streams the raw microphone to Azure
+    VAD_MIN_ENERGY_DB = float(os.getenv('VAD_MIN_ENERGY_DB', '-50'))
+    VAD_HANGOVER_MS = int(os.getenv('VAD_HANGOVER_MS', '300'))
+    STT_SEGMENTATION_SILENCE_MS = int(os.getenv('STT_SEGMENTATION_SILENCE_MS', '300'))
+    TTS_CACHE_DIR   = os.getenv('TTS_CACHE_DIR', 'tts_cache') or None  # empty keeps the cache in memory only
+    TTS_CACHE_MEMORY_MB = float(os.getenv('TTS_CACHE_MEMORY_MB', '16'))
+    TTS_CACHE_DISK_MB = float(os.getenv('TTS_CACHE_DISK_MB', '64'))
+    TTS_CACHE_DISK_AFTER = int(os.getenv('TTS_CACHE_DISK_AFTER', '3'))  # times a reply is spoken before it is kept on disk
+    TTS_PRERENDER_PHRASES = [p.strip() for p in os.getenv(
+        'TTS_PRERENDER_PHRASES',
+        "I can only answer questions about the database. Please ask me something about the AdventureWorks database.|"
+        "The query returned no results.|"
+        "Playing the first YouTube result.|"
+        "No video found for your search."
+    ).split('|') if p.strip()]  # '|'-separated
 
     @classmethod
     def debug_print(cls):
@@ -28,4 +63,5 @@ class Config:
         print("OPENAI_ENDPOINT:", cls.OPENAI_ENDPOINT)
         print("OPENAI_DEPLOYMENT_NAME:", cls.OPENAI_DEPLOYMENT_NAME)
         print("EMAIL_USER:    ", cls.EMAIL_USER)
+        print("DB_POOL_SIZE:  ", f"{cls.DB_POOL_MIN_SIZE}-{cls.DB_POOL_MAX_SIZE}")
         print("=====================")
\ No newline at end of file